@@ -0,0 +1,148 @@
+# src/core/load_test.py
+"""
+Year-6 explanation:
+A load test is a pretend rush hour: lots of requests at the same time,
+against the pretend OpenAI in mock_server.py. For each kind of bad day
+(slow answers, random errors, "too many requests", hangs) we count how
+many requests worked, how many per second we got through, and how long
+the slow ones took — not just the average, because users feel the worst
+ones.
+
+Technical notes:
+- One MockLLMServer per profile, one shared OpenAIClient pointed at it
+  (base_url); `concurrency` threads send `requests` calls in total.
+- Every call must reach the server, so the client's shortcuts are off
+  whatever the shell/.env says: no response cache, no single-flight, no
+  client-side rate limiter. DRY_RUN=1 / REPLAY=1 never touch the network,
+  so the load test refuses to run under them.
+- Retries are OpenAIClient's RetryPolicy (the SDK's own are off); pick
+  the jitter mode / deadline with --jitter / --deadline-s to compare.
+- Latency percentiles are nearest-rank over successful calls; failed
+  calls are counted by error type.
+- Throughput = successful calls / wall time.
+
+Run:
+    python load_test.py
+    python load_test.py --profiles healthy,ratelimited --requests 400 --concurrency 32
+    python load_test.py --profiles ratelimited --jitter none     # lockstep retries, for comparison
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import openai_client
+from mock_server import PROFILES, MockLLMServer, Profile
+from openai_client import OpenAIClient
+from retry_policy import RetryPolicy
+
+MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Give me three facts about the moon."},
+]
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (pct in 0..100); None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_load(
+    profile: Profile,
+    requests: int = 200,
+    concurrency: int = 16,
+    timeout: float = 2.0,
+    retries: int = 3,
+    seed: Optional[int] = 0,
+    policy: Optional[RetryPolicy] = None,
+) -> Dict[str, Any]:
+    """Drive OpenAIClient against a fresh mock server; returns one report row."""
+    with MockLLMServer(profile, seed=seed) as server:
+        client = OpenAIClient(api_key="sk-mock", base_url=server.base_url, retry_policy=policy,
+                              cache_path="", replay=False, single_flight=False)
+        client.rate_limiter = None   # rate_limiter=None would still pick up RATE_LIMITS
+        if openai_client.DRY_RUN or openai_client.REPLAY:   # read after the client loaded .env
+            raise RuntimeError("Load tests need real calls: unset DRY_RUN / REPLAY.")
+
+        def one(_):
+            start = time.perf_counter()
+            try:
+                res = client.chat(MESSAGES, max_tokens=50, retries=retries, timeout=timeout)
+                return True, time.perf_counter() - start, None, res.retries, res.retry_sleep_s
+            except Exception as e:
+                cause = e.__cause__ or e
+                return False, time.perf_counter() - start, type(cause).__name__, 0, 0.0
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as pool:
+            outcomes = list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - start
+        served = dict(server.stats)
+
+    latencies: List[float] = [o[1] for o in outcomes if o[0]]
+    failures = Counter(o[2] for o in outcomes if not o[0])
+    return {
+        "profile": profile.name,
+        "requests": requests,
+        "ok": len(latencies),
+        "failed": requests - len(latencies),
+        "failures": dict(failures),
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        **{f"p{p}_s": _round(percentile(latencies, p)) for p in (50, 90, 99)},
+        "max_s": _round(max(latencies, default=None)),
+        "retries": sum(o[3] for o in outcomes),
+        "retry_sleep_s": _round(sum(o[4] for o in outcomes)),
+        "server": served,   # what the mock injected (incl. retried attempts)
+    }
+
+
+def _round(x: Optional[float]) -> Optional[float]:
+    return None if x is None else round(x, 3)
+
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    cols = ["profile", "ok", "failed", "throughput_per_s", "p50_s", "p90_s", "p99_s", "max_s", "retries", "wall_s"]
+    print(" | ".join(f"{c:>16}" for c in cols))
+    for row in rows:
+        print(" | ".join(f"{str(row[c]):>16}" for c in cols))
+    for row in rows:
+        extra = f" failures={row['failures']}" if row["failures"] else ""
+        print(f"- {row['profile']}: server saw {row['server']}{extra}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load-test OpenAIClient against the local mock LLM server.")
+    ap.add_argument("--profiles", default=",".join(PROFILES), help="Comma-separated profile names")
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--timeout", type=float, default=2.0, help="Per-request timeout (s)")
+    ap.add_argument("--retries", type=int, default=3, help="Max attempts per request")
+    ap.add_argument("--jitter", choices=["none", "full", "equal", "decorrelated"], default="full")
+    ap.add_argument("--base-delay-s", type=float, default=0.2, help="Backoff base delay")
+    ap.add_argument("--deadline-s", type=float, default=None, help="Overall budget per request")
+    args = ap.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)   # one INFO line per call would drown the report
+
+    rows = []
+    for name in filter(None, (s.strip() for s in args.profiles.split(","))):
+        if name not in PROFILES:
+            raise SystemExit(f"Unknown profile '{name}'. Choose from: {', '.join(PROFILES)}")
+        policy = RetryPolicy(base_delay_s=args.base_delay_s, jitter=args.jitter, deadline_s=args.deadline_s)
+        rows.append(run_load(PROFILES[name], args.requests, args.concurrency, args.timeout, args.retries,
+                             policy=policy))
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# src/core/mock_server.py
+"""
+Year-6 explanation:
+DRY_RUN answers instantly with the same sentence every time, so it can
+never show what happens when the real service is slow, busy ("429: too
+many requests") or broken. This file is a pretend OpenAI that runs on
+your own computer. It answers in exactly the same format as the real one,
+but we choose how it behaves: how long answers take, how often it fails,
+how often it says "slow down, try again in N seconds".
+
+Technical notes:
+- POST /v1/chat/completions, same JSON as the real API (choices, usage),
+  including stream=True (SSE chunks, `stream_options.include_usage`).
+- A Profile sets the behaviour:
+  * latency: fixed | uniform (latency_s..latency_spread) |
+    lognormal (median latency_s, sigma latency_spread) -> realistic long tail
+  * error_rate -> 500, ratelimit_rate -> 429 with a Retry-After header,
+    hang_rate -> waits hang_s before answering (client timeouts)
+  * token_delay_s -> gap between streamed chunks
+- Usage: prompt tokens ~ characters / 4 per message (+4), completion
+  tokens = words in the answer (capped by max_tokens).
+- ThreadingHTTPServer (stdlib only); random choices come from one seeded
+  Random, so a profile + seed gives the same failure pattern every time.
+
+Run:
+    python mock_server.py --profile flaky --port 8123
+    OPENAI_BASE_URL=http://127.0.0.1:8123/v1 python test_client.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str = "healthy"
+    latency: str = "lognormal"         # fixed | uniform | lognormal
+    latency_s: float = 0.05            # fixed value / uniform low / lognormal median
+    latency_spread: float = 0.5        # uniform high / lognormal sigma
+    token_delay_s: float = 0.0         # streaming: gap between chunks
+    error_rate: float = 0.0            # -> HTTP 500
+    ratelimit_rate: float = 0.0        # -> HTTP 429 + Retry-After
+    retry_after_s: Optional[float] = 1.0
+    hang_rate: float = 0.0             # -> answer only after hang_s
+    hang_s: float = 30.0
+    completion_words: int = 20
+
+
+PROFILES: Dict[str, Profile] = {
+    "healthy": Profile("healthy"),
+    "slow_tail": Profile("slow_tail", latency_s=0.08, latency_spread=1.0),
+    "flaky": Profile("flaky", error_rate=0.05),
+    "ratelimited": Profile("ratelimited", ratelimit_rate=0.2, retry_after_s=0.2),
+    "timeouts": Profile("timeouts", hang_rate=0.02, hang_s=5.0),
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256   # default 5 -> dropped SYNs (1s stalls) under load
+
+
+def _prompt_tokens(messages) -> int:
+    return sum(math.ceil(len(str(m.get("content") or "")) / 4) + 4 for m in messages) + 2
+
+
+class MockLLMServer:
+    """
+    Chat-completions stand-in on a background thread.
+
+        with MockLLMServer(PROFILES["flaky"]) as server:
+            client = OpenAIClient(api_key="sk-mock", base_url=server.base_url)
+    """
+
+    def __init__(self, profile: Profile = PROFILES["healthy"], host: str = "127.0.0.1",
+                 port: int = 0, seed: Optional[int] = 0):
+        self.profile = profile
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "ratelimited": 0, "hung": 0}
+        self._httpd = _Server((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---------- Behaviour ----------
+
+    def _draw(self) -> Dict[str, Any]:
+        """Pick this request's fate + latency (one lock, so the seed is reproducible)."""
+        p = self.profile
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self._rng.random()
+            if p.latency == "fixed":
+                latency = p.latency_s
+            elif p.latency == "uniform":
+                latency = self._rng.uniform(p.latency_s, p.latency_spread)
+            else:
+                latency = self._rng.lognormvariate(math.log(max(p.latency_s, 1e-6)), p.latency_spread)
+            fate = "ok"
+            for name, rate in (("ratelimited", p.ratelimit_rate), ("errors", p.error_rate), ("hung", p.hang_rate)):
+                if roll < rate:
+                    fate = name
+                    break
+                roll -= rate
+            self.stats[fate] += 1
+        return {"fate": fate, "latency": latency}
+
+    def _answer(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            n = self.stats["requests"]
+        words = [f"word{i}" for i in range(self.profile.completion_words)]
+        max_tokens = body.get("max_tokens") or len(words)
+        content = " ".join(words[:max_tokens])
+        prompt_tokens = _prompt_tokens(body.get("messages") or [])
+        completion_tokens = len(content.split())
+        return {
+            "id": f"chatcmpl-mock-{n}",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "content": content,
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+
+            def log_message(self, *args):    # quiet: load tests make thousands of requests
+                pass
+
+            def _json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b"{}"
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self._json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+                try:
+                    body = json.loads(raw)
+                except ValueError:
+                    self._json(400, {"error": {"message": "Body is not JSON", "type": "invalid_request_error"}})
+                    return
+
+                draw = server._draw()
+                p = server.profile
+                if draw["fate"] == "ratelimited":
+                    headers = {"Retry-After": f"{p.retry_after_s:g}"} if p.retry_after_s is not None else {}
+                    self._json(429, {"error": {"message": "Rate limit reached (mock)", "type": "requests",
+                                               "code": "rate_limit_exceeded"}}, headers)
+                    return
+                time.sleep(p.hang_s if draw["fate"] == "hung" else draw["latency"])
+                if draw["fate"] == "errors":
+                    self._json(500, {"error": {"message": "The server had an error (mock)", "type": "server_error"}})
+                    return
+
+                answer = server._answer(body)
+                if body.get("stream"):
+                    include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+                    self._stream(answer, include_usage)
+                else:
+                    self._json(200, {
+                        "id": answer["id"], "object": "chat.completion", "created": answer["created"],
+                        "model": answer["model"],
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": answer["content"]}}],
+                        "usage": answer["usage"],
+                    })
+
+            def _stream(self, answer: Dict[str, Any], include_usage: bool):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def send(payload) -> None:
+                    data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode("utf-8")
+                    self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                    self.wfile.flush()
+
+                base = {"id": answer["id"], "object": "chat.completion.chunk",
+                        "created": answer["created"], "model": answer["model"]}
+                words = answer["content"].split(" ")
+                for i, word in enumerate(words):
+                    if i and server.profile.token_delay_s:
+                        time.sleep(server.profile.token_delay_s)
+                    piece = word if i == len(words) - 1 else word + " "
+                    send({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+                send({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                if include_usage:
+                    send({**base, "choices": [], "usage": answer["usage"]})
+                send("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+# ---------- CLI ----------
+def main():
+    ap = argparse.ArgumentParser(description="Local chat-completions stand-in with failure injection.")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="healthy")
+    ap.add_argument("--port", type=int, default=8123)
+    ap.add_argument("--latency-s", type=float, default=None, help="Override the profile's median/fixed latency")
+    ap.add_argument("--ratelimit-rate", type=float, default=None, help="Override the share of 429 answers")
+    ap.add_argument("--seed", type=int, default=None, help="Seed for reproducible failures (default: random)")
+    args = ap.parse_args()
+
+    profile = PROFILES[args.profile]
+    if args.latency_s is not None:
+        profile = replace(profile, latency_s=args.latency_s)
+    if args.ratelimit_rate is not None:
+        profile = replace(profile, ratelimit_rate=args.ratelimit_rate)
+
+    server = MockLLMServer(profile, port=args.port, seed=args.seed)
+    print(f"Mock LLM ({profile.name}) on {server.base_url}  — Ctrl+C to stop")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        print(f"Served: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,99 @@
 # src/core/openai_client.py
 
 import os
+import re
+import sys
 import time
+import json
+import asyncio
+import hashlib
 import logging
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
+from types import SimpleNamespace
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Dict, Optional, Tuple
 
-from dotenv import load_dotenv
+# ---- Shared pricing registry (Week06/src/pricing.py) -------------------------
+_WEEK_SRC = Path(__file__).resolve().parents[3] / "src"
+if str(_WEEK_SRC) not in sys.path:
+    sys.path.append(str(_WEEK_SRC))
 
-# ---- OpenAI SDK imports (tolerant if not installed in DRY mode) --------------
-try:
-    from openai import OpenAI
-    from openai import APIError, RateLimitError, APIConnectionError, AuthenticationError
-    from openai._exceptions import APITimeoutError  # correct timeout class in latest SDK
-except Exception:  # pragma: no cover
-    OpenAI = None
-    APIError = RateLimitError = APIConnectionError = AuthenticationError = APITimeoutError = Exception  # type: ignore
+import pricing
+from rate_limiter import RateLimiter, Reservation
+from retry_policy import RetryPolicy, RetryState, parse_retry_after
 
 # ---- Local simulated exception for demoing retries ---------------------------
 class SimulatedRateLimit(Exception):
     """Used to fake 429s for retry/backoff demos without making network calls."""
     pass
 
+# ---- Local replay exception ---------------------------------------------------
+class ReplayMiss(RuntimeError):
+    """Strict replay mode (REPLAY=1) found no cached response for a request."""
+    pass
+
 # ---- Env + logging -----------------------------------------------------------
-load_dotenv()
 logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
 
-API_KEY = os.getenv("OPENAI_API_KEY", "")
-DRY_RUN = os.getenv("DRY_RUN", "0") == "1"                 # set to 1 to avoid network/spend
-SIMULATE_RATELIMIT = os.getenv("SIMULATE_RATELIMIT", "0") == "1"  # set to 1 to force retries
+def _read_settings() -> None:
+    global API_KEY, DRY_RUN, SIMULATE_RATELIMIT, RESPONSE_CACHE, RESPONSE_CACHE_TTL_S, REPLAY
+    global RATE_LIMITS, RATE_LIMIT_DB, DRY_RUN_TTFT_S, DRY_RUN_TOKEN_DELAY_S, SINGLE_FLIGHT
+    API_KEY = os.getenv("OPENAI_API_KEY", "")
+    DRY_RUN = os.getenv("DRY_RUN", "0") == "1"                 # set to 1 to avoid network/spend
+    SIMULATE_RATELIMIT = os.getenv("SIMULATE_RATELIMIT", "0") == "1"  # set to 1 to force retries
+    RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "")           # SQLite path -> cache responses ("" = off)
+    RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", str(7 * 24 * 3600)))  # 0 = never expire
+    REPLAY = os.getenv("REPLAY", "0") == "1"                   # 1 = cache only, a miss is an error
+    RATE_LIMITS = os.getenv("RATE_LIMITS", "")                 # e.g. gpt-4o-mini=500:200000 (RPM:TPM)
+    RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", "")             # SQLite path -> share limits across processes
+    DRY_RUN_TTFT_S = float(os.getenv("DRY_RUN_TTFT_S", "0.05"))            # mock wait before the first token
+    DRY_RUN_TOKEN_DELAY_S = float(os.getenv("DRY_RUN_TOKEN_DELAY_S", "0.01"))  # mock gap between streamed tokens
+    SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "0") == "1"     # 1 = identical in-flight requests share one call
+
+_read_settings()
+
+_ENV_LOADED = False
+
+def _load_env() -> None:
+    """
+    Read .env once, the first time a client is built (not at import time),
+    then refresh the settings above in case .env provided them.
+    """
+    global _ENV_LOADED
+    if _ENV_LOADED:
+        return
+    _ENV_LOADED = True
+    from dotenv import load_dotenv
+    if load_dotenv():
+        _read_settings()
 
-# ---- Pricing table (USD per 1K tokens) ---------------------------------------
-PRICING_USD_PER_1K = {
-    "gpt-4o":       {"in": 0.005,   "out": 0.015},
-    "gpt-4o-mini":  {"in": 0.00015, "out": 0.00060},
-    # fallback if an unknown model is used
-    "_default":     {"in": 0.00020, "out": 0.00080},
-}
+# ---- OpenAI SDK imports (lazy; tolerant if not installed in DRY mode) --------
+@lru_cache(maxsize=None)
+def _sdk() -> SimpleNamespace:
+    """
+    Import the OpenAI SDK on first real use. DRY_RUN never calls this,
+    so practising (and --help) doesn't pay the SDK's import cost.
+    """
+    try:
+        from openai import OpenAI, AsyncOpenAI
+        from openai import APIError, APIStatusError, RateLimitError, APIConnectionError, AuthenticationError
+        from openai._exceptions import APITimeoutError  # correct timeout class in latest SDK
+    except Exception:  # pragma: no cover
+        OpenAI = AsyncOpenAI = None
+        APIError = APIStatusError = RateLimitError = APIConnectionError = AuthenticationError = APITimeoutError = Exception  # type: ignore
+    return SimpleNamespace(
+        OpenAI=OpenAI,
+        AsyncOpenAI=AsyncOpenAI,
+        APIError=APIError,
+        APIStatusError=APIStatusError,
+        RateLimitError=RateLimitError,
+        APIConnectionError=APIConnectionError,
+        AuthenticationError=AuthenticationError,
+        APITimeoutError=APITimeoutError,
+    )
 
 @dataclass
 class ChatResult:
@@ -47,27 +104,418 @@ class ChatResult:
     cost_usd: float
     latency_s: float
     model: str
+    cached: bool = False   # True when served from the response cache (no API call)
+    ttft_s: Optional[float] = None   # streaming only: time to first token
+    itl_s: Optional[float] = None    # streaming only: mean gap between tokens
+    coalesced: bool = False  # True when this answer was shared from an identical in-flight call
+    retries: int = 0         # extra attempts after the first one
+    retry_sleep_s: float = 0.0   # time spent waiting between attempts
 
-class OpenAIClient:
+# ---- Response cache (opt-in: RESPONSE_CACHE=path/to/cache.sqlite) ------------
+class ResponseCache:
     """
-    Friendly wrapper:
-    - DRY_RUN mode for zero-cost practicing
-    - Exponential backoff (1s, 2s, 4s ...)
-    - Clean error messages
-    - Token + cost logging per call
+    Finished chat responses saved in SQLite, keyed by a hash of the request.
+    Asking the exact same question again returns the saved answer for free.
+    Entries older than `ttl_s` seconds count as missing (ttl_s=0: keep forever).
+    """
+
+    VERSION = 1  # bump if the key recipe changes, so old rows stop matching
+
+    def __init__(self, path: str, ttl_s: float = 7 * 24 * 3600):
+        self.path = path
+        self.ttl_s = ttl_s
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    result TEXT NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @classmethod
+    def key(cls, model: str, messages: List[Dict[str, str]], **params) -> str:
+        """
+        Canonical request hash: same model + messages + params -> same key,
+        no matter the dict order or float spelling (0.2 vs 0.20).
+        """
+        blob = json.dumps(
+            {"v": cls.VERSION, "model": model, "messages": messages, "params": params},
+            sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+        )
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[ChatResult]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT created_at, result FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            created_at, result = row
+            if self.ttl_s and time.time() - created_at > self.ttl_s:
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            with conn:
+                conn.execute("UPDATE responses SET hits = hits + 1 WHERE key = ?", (key,))
+        finally:
+            conn.close()
+        data = json.loads(result)
+        data.update(latency_s=0.0, cached=True)
+        return ChatResult(**data)
+
+    def put(self, key: str, result: ChatResult) -> None:
+        data = asdict(result)
+        for timing_only in ("cached", "ttft_s", "itl_s", "coalesced", "retries", "retry_sleep_s"):
+            data.pop(timing_only, None)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, created_at, result, hits) VALUES (?, ?, ?, 0)",
+                    (key, time.time(), json.dumps(data, ensure_ascii=False)),
+                )
+        finally:
+            conn.close()
+
+    def purge_expired(self) -> int:
+        """Delete rows past their TTL. Returns how many were removed."""
+        if not self.ttl_s:
+            return 0
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_s,))
+            return cur.rowcount
+        finally:
+            conn.close()
+
+# ---- Single-flight (opt-in: SINGLE_FLIGHT=1) ----------------------------------
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Calls with the same key that overlap in time share ONE execution: the
+    first caller (the leader) runs fn, the rest wait and get its result
+    (or its exception). Nothing is remembered once the call finishes —
+    that's the response cache's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns (result, shared) — shared=True for callers that waited on the leader."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+# One group per process, so workers with separate clients still coalesce.
+_FLIGHTS = SingleFlight()
+
+
+# ---- Streaming helpers -------------------------------------------------------
+class _StreamTimer:
+    """Notes when each piece of text arrives: TTFT + inter-token latency."""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.gaps = 0.0
+        self.pieces = 0
+
+    def tick(self) -> None:
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        else:
+            self.gaps += now - self.last
+        self.last = now
+        self.pieces += 1
+
+    @property
+    def ttft_s(self) -> Optional[float]:
+        return None if self.first is None else self.first - self.start
+
+    @property
+    def itl_s(self) -> Optional[float]:
+        return self.gaps / (self.pieces - 1) if self.pieces > 1 else None
+
+
+class ChatStream:
+    """
+    What chat_stream() returns. Loop over it to get text pieces as they
+    arrive; once the loop ends, `.result` is the usual ChatResult (with
+    ttft_s / itl_s filled in) and `.text` is the whole answer.
+    """
+
+    def __init__(self):
+        self.result: Optional[ChatResult] = None
+        self.text = ""
+        self._pieces: Optional[Iterator[str]] = None
+
+    def __iter__(self) -> Iterator[str]:
+        for piece in self._pieces:
+            self.text += piece
+            yield piece
+
+
+_DRY_TOKENS = re.compile(r"\S+\s*")
+
+class _ClientBase:
+    """
+    What the sync and async clients share: settings, response cache,
+    cost maths, logging, and how API errors are handled.
     """
 
-    def __init__(self, api_key: Optional[str] = None, default_model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        default_model: str = "gpt-4o-mini",
+        cache_path: Optional[str] = None,
+        cache_ttl_s: Optional[float] = None,
+        replay: Optional[bool] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        _load_env()
         self.api_key = api_key or API_KEY
         self.model_default = default_model
+        self.base_url = base_url   # None = SDK default (OPENAI_BASE_URL or api.openai.com)
+
+        cache_path = cache_path if cache_path is not None else RESPONSE_CACHE
+        ttl = cache_ttl_s if cache_ttl_s is not None else RESPONSE_CACHE_TTL_S
+        self.cache = ResponseCache(cache_path, ttl) if cache_path else None
+        self.replay = REPLAY if replay is None else replay
+        if self.replay and self.cache is None:
+            raise ValueError("Replay mode needs a response cache: set RESPONSE_CACHE or pass cache_path.")
+        self.cache_stats = {"hits": 0, "misses": 0, "saved_usd": 0.0}
+
+        if rate_limiter is None and RATE_LIMITS:
+            rate_limiter = RateLimiter.from_spec(RATE_LIMITS, db_path=RATE_LIMIT_DB)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
 
+    def _offline(self) -> bool:
+        """Log which mode we're in; True when no SDK client is needed (DRY_RUN or replay)."""
         if DRY_RUN:
             logging.info("DRY_RUN=1 → No network calls will be made. Returning mock responses.")
+            return True
+        if self.replay:
+            logging.info("REPLAY=1 → Answers come only from the response cache; a miss is an error.")
+            return True
+        if not self.api_key:
+            logging.warning("No OPENAI_API_KEY found. Set it in .env or enable DRY_RUN=1.")
+        return False
+
+    # ------------------------- shared steps of chat() --------------------------
+    def _cache_lookup(self, model: str, messages: List[Dict[str, str]], **params):
+        """Returns (cache_key, cached ChatResult or None). Raises ReplayMiss in replay mode."""
+        if self.cache is None:
+            return None, None
+        cache_key = ResponseCache.key(model, messages, **params)
+        hit = self.cache.get(cache_key)
+        if hit is not None:
+            self._record_cache(hit=True, saved=hit.cost_usd, key=cache_key)
+            return cache_key, hit
+        self._record_cache(hit=False, saved=0.0, key=cache_key)
+        if self.replay:
+            raise ReplayMiss(f"No cached response for {model} request {cache_key[:12]} (REPLAY=1).")
+        return cache_key, None
+
+    def _settle(self, res: Optional[Reservation], result: Optional[ChatResult]) -> None:
+        """Tell the limiter how many tokens the call really used (failed call: keep the booking)."""
+        if res is not None and result is not None:
+            self.rate_limiter.reconcile(res, result.total_tokens)
+
+    DRY_CONTENT = "[DRY_RUN] Hello! (no API call made)"
+
+    def _dry_result(self, model: str, start: float, timer: Optional[_StreamTimer] = None) -> ChatResult:
+        prompt_tokens, completion_tokens = 30, 15  # pretend usage
+        return self._make_result(model, self.DRY_CONTENT, prompt_tokens, completion_tokens, None, start, timer)
+
+    def _to_result(self, response, model: str, start: float) -> ChatResult:
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) if usage else 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) if usage else 0
+        total = getattr(usage, "total_tokens", prompt_tokens + completion_tokens)
+
+        content = response.choices[0].message.content if response and response.choices else ""
+        return self._make_result(model, content, prompt_tokens, completion_tokens, total, start)
+
+    def _make_result(
+        self,
+        model: str,
+        content: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        total: Optional[int],
+        start: float,
+        timer: Optional[_StreamTimer] = None,
+    ) -> ChatResult:
+        latency = time.perf_counter() - start
+        total = total if total is not None else prompt_tokens + completion_tokens
+        cost = self._calc_cost(model, prompt_tokens, completion_tokens)
+        ttft = timer.ttft_s if timer else None
+        itl = timer.itl_s if timer else None
+
+        self._log_cost(model, total, prompt_tokens, completion_tokens, cost, latency, ttft, itl)
+
+        return ChatResult(content, prompt_tokens, completion_tokens, total, cost, latency, model,
+                          ttft_s=ttft, itl_s=itl)
+
+    def _backoff(self, e: Exception, state: RetryState) -> float:
+        """
+        Decide what to do with an API error: return how long to wait before
+        retrying (retry_policy: jitter, Retry-After, deadline), or raise a
+        friendly RuntimeError if retrying won't help or we're out of tries.
+        """
+        sdk = _sdk()
+        if isinstance(e, sdk.AuthenticationError):
+            raise RuntimeError(
+                "Authentication failed. Check your OPENAI_API_KEY in .env "
+                "or run with DRY_RUN=1 to practice without a key."
+            ) from e
+
+        status = getattr(e, "status_code", None)
+        transient = (sdk.APITimeoutError, sdk.APIConnectionError, SimulatedRateLimit)
+        if isinstance(e, transient) or (isinstance(e, sdk.APIStatusError) and status in self.retry_policy.retry_statuses):
+            retry_after = parse_retry_after(getattr(getattr(e, "response", None), "headers", None))
+            wait = state.next_wait(retry_after)
+            if wait is None:
+                raise RuntimeError(
+                    f"Giving up after {state.attempts} attempt(s), {state.slept_s:.1f}s of backoff: {e}"
+                ) from e
+            hint = f", server asked for {retry_after:g}s" if retry_after is not None else ""
+            logging.warning(
+                f"Retry {state.attempts}/{state.max_attempts - 1} after transient error "
+                f"({status or type(e).__name__}{hint}): {e}. Waiting {wait:.2f}s."
+            )
+            return wait
+        if isinstance(e, sdk.APIError):
+            raise RuntimeError(f"OpenAI API error (not retried, status={status}): {e}") from e
+        raise RuntimeError(f"Unexpected error while calling OpenAI API: {e}") from e
+
+    @staticmethod
+    def _note_retries(result: ChatResult, state: RetryState) -> ChatResult:
+        result.retries = state.retries
+        result.retry_sleep_s = round(state.slept_s, 3)
+        return result
+
+    def _calc_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        # Newest registry rate; unknown models fall back to pricing's "_default".
+        return round(pricing.cost_usd(model, prompt_tokens, completion_tokens), 8)
+
+    def _record_cache(self, hit: bool, saved: float, key: str) -> None:
+        stats = self.cache_stats
+        stats["hits" if hit else "misses"] += 1
+        stats["saved_usd"] += saved
+        lookups = stats["hits"] + stats["misses"]
+        logging.info(
+            f"Cache {'HIT' if hit else 'MISS'} {key[:12]} | saved=${saved:.6f} | "
+            f"hit rate={stats['hits'] / lookups:.0%} ({stats['hits']}/{lookups}) | "
+            f"total saved=${stats['saved_usd']:.6f}"
+        )
+
+    def _log_cost(
+        self,
+        model: str,
+        total: int,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cost: float,
+        latency: float,
+        ttft: Optional[float] = None,
+        itl: Optional[float] = None,
+    ):
+        timing = f"latency={latency:.2f}s"
+        if ttft is not None:
+            timing += f" | ttft={ttft:.3f}s"
+        if itl is not None:
+            timing += f" | itl={itl * 1000:.1f}ms"
+        logging.info(
+            f"Model={model} | prompt={prompt_tokens} | completion={completion_tokens} | "
+            f"total={total} | cost=${cost:.6f} | {timing}"
+        )
+
+class OpenAIClient(_ClientBase):
+    """
+    Friendly wrapper:
+    - DRY_RUN mode for zero-cost practicing
+    - Retries via a RetryPolicy (jittered backoff, Retry-After, deadline,
+      per-attempt timeouts); ChatResult.retries / retry_sleep_s report them
+    - Clean error messages
+    - Token + cost logging per call
+    - Optional response cache (RESPONSE_CACHE) and strict replay (REPLAY=1)
+    - Optional client-side RPM/TPM limiter (RATE_LIMITS / rate_limiter=)
+    - chat_stream(): text pieces as they arrive + TTFT / inter-token latency
+    - Optional single-flight (SINGLE_FLIGHT=1 / single_flight=True): identical
+      requests in flight at the same time share one API call
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        default_model: str = "gpt-4o-mini",
+        cache_path: Optional[str] = None,
+        cache_ttl_s: Optional[float] = None,
+        replay: Optional[bool] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        single_flight: Optional[bool] = None,
+        flights: Optional[SingleFlight] = None,
+        base_url: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        super().__init__(api_key, default_model, cache_path, cache_ttl_s, replay, rate_limiter, base_url,
+                         retry_policy)
+        self.single_flight = SINGLE_FLIGHT if single_flight is None else single_flight
+        self.flights = flights or _FLIGHTS
+        self.coalesce_stats = {"calls": 0, "coalesced": 0, "saved_usd": 0.0}
+        self._stats_lock = threading.Lock()  # chat() runs on many threads at once
+        if self._offline():
             self.client = None
         else:
-            if not self.api_key:
-                logging.warning("No OPENAI_API_KEY found. Set it in .env or enable DRY_RUN=1.")
-            self.client = OpenAI(api_key=self.api_key) if OpenAI else None
+            OpenAI = _sdk().OpenAI
+            # max_retries=0: retries are ours (retry_policy), not stacked under the SDK's own
+            self.client = OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0) if OpenAI else None
 
     def chat(
         self,
@@ -75,26 +523,59 @@ class OpenAIClient:
         model: Optional[str] = None,
         max_tokens: int = 300,
         temperature: float = 0.2,
-        retries: int = 3,
-        timeout: int = 20,
+        retries: Optional[int] = None,
+        timeout: Optional[float] = 20,
     ) -> ChatResult:
-        """Send a chat completion with retries + cost logging. Returns ChatResult."""
+        """
+        Send a chat completion with retries + cost logging. Returns ChatResult.
+        retries = max attempts (default: retry_policy.max_attempts); timeout is per attempt.
+        """
         model = model or self.model_default
+        if not self.single_flight:
+            return self._chat(messages, model, max_tokens, temperature, retries, timeout)
+
+        # ---- Single-flight: an identical request already in flight? Share it.
+        start = time.perf_counter()
+        key = ResponseCache.key(model, messages, temperature=temperature, max_tokens=max_tokens)
+        result, shared = self.flights.do(
+            key, lambda: self._chat(messages, model, max_tokens, temperature, retries, timeout)
+        )
+        with self._stats_lock:
+            self.coalesce_stats["calls"] += 1
+            if not shared:
+                return result
+            self.coalesce_stats["coalesced"] += 1
+            if not result.cached:
+                self.coalesce_stats["saved_usd"] += result.cost_usd
+            coalesced, calls = self.coalesce_stats["coalesced"], self.coalesce_stats["calls"]
+        logging.info(
+            f"Coalesced {key[:12]} with an in-flight call | saved=${result.cost_usd:.6f} | "
+            f"coalesced {coalesced}/{calls}"
+        )
+        return replace(result, coalesced=True, latency_s=time.perf_counter() - start)
+
+    def _chat(self, messages, model, max_tokens, temperature, retries, timeout) -> ChatResult:
         start = time.perf_counter()
 
+        # ---- Response cache (hit = no call, no spend) ------------------------
+        cache_key, hit = self._cache_lookup(model, messages, temperature=temperature, max_tokens=max_tokens)
+        if hit is not None:
+            return hit
+
+        # ---- Proactive RPM/TPM limit (waits here instead of hitting 429s) ----
+        res = None
+        if self.rate_limiter is not None:
+            res = self.rate_limiter.acquire(model, messages, max_tokens)
+
         # ---- DRY mode (no network, no spend) ---------------------------------
         if DRY_RUN:
             time.sleep(0.05)
-            content = "[DRY_RUN] Hello! (no API call made)"
-            prompt_tokens, completion_tokens = 30, 15  # pretend usage
-            total = prompt_tokens + completion_tokens
-            cost = self._calc_cost(model, prompt_tokens, completion_tokens)
-            latency = time.perf_counter() - start
-            self._log_cost(model, total, prompt_tokens, completion_tokens, cost, latency)
-            return ChatResult(content, prompt_tokens, completion_tokens, total, cost, latency, model)
+            result = self._dry_result(model, start)
+            self._settle(res, result)
+            return result
 
         # ---- Real call path with optional simulation of rate limits ----------
-        def _do_call():
+        def _do_call(attempt_timeout):
             if SIMULATE_RATELIMIT:
                 logging.warning("⚠️ Simulating a RateLimitError for retry demo...")
                 raise SimulatedRateLimit("Simulated 429: Too Many Requests")
@@ -104,65 +585,255 @@ class OpenAIClient:
                 messages=messages,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                timeout=timeout,
+                timeout=attempt_timeout,
             )
 
-        response = self._retry(_do_call, retries=retries)
+        response, state = self._retry(_do_call, retries=retries, timeout=timeout)
+        result = self._note_retries(self._to_result(response, model, start), state)
+        self._settle(res, result)
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
 
-        latency = time.perf_counter() - start
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        max_tokens: int = 300,
+        temperature: float = 0.2,
+        retries: Optional[int] = None,
+        timeout: Optional[float] = 20,
+    ) -> ChatStream:
+        """
+        Like chat(), but hands back text pieces as soon as they arrive:
 
-        usage = getattr(response, "usage", None)
-        prompt_tokens = getattr(usage, "prompt_tokens", 0) if usage else 0
-        completion_tokens = getattr(usage, "completion_tokens", 0) if usage else 0
-        total = getattr(usage, "total_tokens", prompt_tokens + completion_tokens)
+            stream = client.chat_stream(messages)
+            for piece in stream:
+                print(piece, end="", flush=True)
+            print(stream.result.ttft_s, stream.result.itl_s)
 
-        content = response.choices[0].message.content if response and response.choices else ""
-        cost = self._calc_cost(model, prompt_tokens, completion_tokens)
+        Retries only cover opening the stream; a break mid-answer raises.
+        """
+        stream = ChatStream()
+        stream._pieces = self._stream_pieces(stream, messages, model or self.model_default,
+                                             max_tokens, temperature, retries, timeout)
+        return stream
+
+    def _stream_pieces(self, stream: ChatStream, messages, model, max_tokens, temperature, retries, timeout):
+        start = time.perf_counter()
+        timer = _StreamTimer(start)
+
+        # ---- Response cache: a hit arrives as one piece ----------------------
+        cache_key, hit = self._cache_lookup(model, messages, temperature=temperature, max_tokens=max_tokens)
+        if hit is not None:
+            timer.tick()
+            hit.ttft_s = timer.ttft_s
+            stream.result = hit
+            yield hit.content
+            return
 
-        self._log_cost(model, total, prompt_tokens, completion_tokens, cost, latency)
+        res = None
+        if self.rate_limiter is not None:
+            res = self.rate_limiter.acquire(model, messages, max_tokens)
 
-        return ChatResult(content, prompt_tokens, completion_tokens, total, cost, latency, model)
+        # ---- DRY mode: the mock answer, one word at a time -------------------
+        if DRY_RUN:
+            time.sleep(DRY_RUN_TTFT_S)
+            for i, piece in enumerate(_DRY_TOKENS.findall(self.DRY_CONTENT)):
+                if i:
+                    time.sleep(DRY_RUN_TOKEN_DELAY_S)
+                timer.tick()
+                yield piece
+            stream.result = self._dry_result(model, start, timer)
+            self._settle(res, stream.result)
+            return
+
+        # ---- Real streamed call -------------------------------------------
+        def _open(attempt_timeout):
+            if SIMULATE_RATELIMIT:
+                logging.warning("⚠️ Simulating a RateLimitError for retry demo...")
+                raise SimulatedRateLimit("Simulated 429: Too Many Requests")
+
+            return self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=attempt_timeout,
+                stream=True,
+                stream_options={"include_usage": True},   # last chunk carries usage
+            )
+
+        chunks, state = self._retry(_open, retries=retries, timeout=timeout)
+        parts: List[str] = []
+        usage = None
+        try:
+            for chunk in chunks:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    timer.tick()
+                    parts.append(piece)
+                    yield piece
+        except Exception as e:
+            raise RuntimeError(f"Stream broke after {len(parts)} pieces: {e}") from e
+
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) if usage else 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) if usage else timer.pieces
+        total = getattr(usage, "total_tokens", None) if usage else None
+        stream.result = self._note_retries(
+            self._make_result(model, "".join(parts), prompt_tokens, completion_tokens, total, start, timer), state
+        )
+        self._settle(res, stream.result)
+        if cache_key is not None:
+            self.cache.put(cache_key, stream.result)
 
     # ------------------------- helpers -----------------------------------------
-    def _retry(self, func, retries: int = 3, base_delay: float = 1.0):
-        """Exponential backoff: 1s, 2s, 4s ..."""
-        for attempt in range(retries):
+    def _retry(self, func, retries: Optional[int] = None, timeout: Optional[float] = None):
+        """Run func(attempt_timeout) under retry_policy. Returns (response, RetryState)."""
+        state = self.retry_policy.start(retries)
+        while True:
             try:
-                return func()
-            except (RateLimitError, APITimeoutError, APIConnectionError, SimulatedRateLimit) as e:
-                wait = base_delay * (2 ** attempt)
-                logging.warning(f"Retry {attempt+1}/{retries} after transient error: {e}. Waiting {wait:.1f}s.")
-                time.sleep(wait)
-            except AuthenticationError as e:
-                raise RuntimeError(
-                    "Authentication failed. Check your OPENAI_API_KEY in .env "
-                    "or run with DRY_RUN=1 to practice without a key."
-                ) from e
-            except APIError as e:
-                wait = base_delay * (2 ** attempt)
-                logging.warning(f"APIError on attempt {attempt+1}: {e}. Waiting {wait:.1f}s.")
-                time.sleep(wait)
+                return func(state.attempt_timeout(timeout)), state
             except Exception as e:
-                raise RuntimeError(f"Unexpected error while calling OpenAI API: {e}") from e
+                wait = self._backoff(e, state)
+                time.sleep(wait)
+                state.record_sleep(wait)
 
-        raise RuntimeError("Max retries reached without success.")
+class AsyncOpenAIClient(_ClientBase):
+    """
+    Same answers, costs, logs and DRY_RUN/cache behaviour as OpenAIClient,
+    but `await client.chat(...)` — so one process can keep hundreds of
+    requests waiting at once without one thread each.
 
-    def _calc_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
-        prices = PRICING_USD_PER_1K.get(model, PRICING_USD_PER_1K["_default"])
-        cost_in = (prompt_tokens / 1000.0) * prices["in"]
-        cost_out = (completion_tokens / 1000.0) * prices["out"]
-        return round(cost_in + cost_out, 8)
+    - One keep-alive HTTP pool (httpx) shared by every call of this client
+      (pass `http_client=` to share it between clients too).
+    - A semaphore caps requests in flight (`max_in_flight`).
+    - Backoff waits with `await asyncio.sleep`, so other calls keep going.
+    Use `async with AsyncOpenAIClient() as client:` (or `await client.aclose()`).
+    """
 
-    def _log_cost(
+    def __init__(
         self,
-        model: str,
-        total: int,
-        prompt_tokens: int,
-        completion_tokens: int,
-        cost: float,
-        latency: float,
+        api_key: Optional[str] = None,
+        default_model: str = "gpt-4o-mini",
+        max_in_flight: int = 64,
+        http_client=None,
+        cache_path: Optional[str] = None,
+        cache_ttl_s: Optional[float] = None,
+        replay: Optional[bool] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
     ):
-        logging.info(
-            f"Model={model} | prompt={prompt_tokens} | completion={completion_tokens} | "
-            f"total={total} | cost=${cost:.6f} | latency={latency:.2f}s"
-        )
+        super().__init__(api_key, default_model, cache_path, cache_ttl_s, replay, rate_limiter, base_url,
+                         retry_policy)
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be > 0")
+        self.max_in_flight = max_in_flight
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._http = http_client
+        self._owns_http = http_client is None
+        self.client = None if self._offline() else self._make_client()
+
+    def _make_client(self):
+        AsyncOpenAI = _sdk().AsyncOpenAI
+        if AsyncOpenAI is None:
+            return None
+        if self._http is None:
+            import httpx  # comes with the openai SDK
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_in_flight,
+                    max_keepalive_connections=self.max_in_flight,
+                    keepalive_expiry=30.0,
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            )
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=self._http, max_retries=0)
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        max_tokens: int = 300,
+        temperature: float = 0.2,
+        retries: Optional[int] = None,
+        timeout: Optional[float] = 20,
+    ) -> ChatResult:
+        """Async chat completion with retries + cost logging. Returns ChatResult."""
+        model = model or self.model_default
+        start = time.perf_counter()
+
+        # ---- Response cache (SQLite work runs off the event loop) ------------
+        cache_key = hit = None
+        if self.cache is not None:
+            cache_key, hit = await asyncio.to_thread(
+                self._cache_lookup, model, messages, temperature=temperature, max_tokens=max_tokens
+            )
+            if hit is not None:
+                return hit
+
+        # ---- Proactive RPM/TPM limit (async wait, the loop keeps running) ----
+        res = None
+        if self.rate_limiter is not None:
+            if self.rate_limiter.buckets.shared:   # SQLite: keep file locks off the loop
+                res = await asyncio.to_thread(self.rate_limiter.reserve, model, messages, max_tokens)
+            else:
+                res = self.rate_limiter.reserve(model, messages, max_tokens)
+            if res.wait_s > 0:
+                await asyncio.sleep(res.wait_s)
+
+        async with self._semaphore:
+            # ---- DRY mode (no network, no spend) -----------------------------
+            if DRY_RUN:
+                await asyncio.sleep(0.05)
+                result = self._dry_result(model, start)
+                self._settle(res, result)
+                return result
+
+            async def _do_call(attempt_timeout):
+                if SIMULATE_RATELIMIT:
+                    logging.warning("⚠️ Simulating a RateLimitError for retry demo...")
+                    raise SimulatedRateLimit("Simulated 429: Too Many Requests")
+
+                return await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    timeout=attempt_timeout,
+                )
+
+            response, state = await self._retry(_do_call, retries=retries, timeout=timeout)
+
+        result = self._note_retries(self._to_result(response, model, start), state)
+        self._settle(res, result)
+        if cache_key is not None:
+            await asyncio.to_thread(self.cache.put, cache_key, result)
+        return result
+
+    async def _retry(self, func, retries: Optional[int] = None, timeout: Optional[float] = None):
+        """Same policy as the sync client, but backoff waits don't block the event loop."""
+        state = self.retry_policy.start(retries)
+        while True:
+            try:
+                return await func(state.attempt_timeout(timeout)), state
+            except Exception as e:
+                wait = self._backoff(e, state)
+                await asyncio.sleep(wait)
+                state.record_sleep(wait)
+
+    async def aclose(self) -> None:
+        """Close the HTTP pool (only if this client created it)."""
+        if self._owns_http and self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self) -> "AsyncOpenAIClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Make src/core importable so 'import openai_client' works (like test_client.py)
+CORE = Path(__file__).resolve().parents[1] / "src" / "core"
+if str(CORE) not in sys.path:
+    sys.path.insert(0, str(CORE))
+
+import openai_client
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions; counts real calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, messages, max_tokens, temperature, timeout, stream=False, **kw):
+        self.calls += 1
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50, total_tokens=150)
+        content = f"answer #{self.calls} to {messages[-1]['content']}"
+        if stream:
+            return self._chunks(content, usage)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=message)])
+
+    @staticmethod
+    def _chunks(content, usage):
+        # Like the SDK with include_usage: one delta per word, then a usage-only chunk.
+        for word in content.split(" "):
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)])
+        yield SimpleNamespace(usage=usage, choices=[])
+
+
+@pytest.fixture(autouse=True)
+def offline_env(monkeypatch):
+    """No .env, no DRY_RUN/REPLAY/cache from the developer's shell."""
+    monkeypatch.setattr(openai_client, "_ENV_LOADED", True)
+    monkeypatch.setattr(openai_client, "DRY_RUN", False)
+    monkeypatch.setattr(openai_client, "SIMULATE_RATELIMIT", False)
+    monkeypatch.setattr(openai_client, "RESPONSE_CACHE", "")
+    monkeypatch.setattr(openai_client, "REPLAY", False)
+    monkeypatch.setattr(openai_client, "RATE_LIMITS", "")
+    monkeypatch.setattr(openai_client, "SINGLE_FLIGHT", False)
+
+
+@pytest.fixture
+def make_client():
+    """Build an OpenAIClient whose network calls go to FakeCompletions."""
+    def _make(**kwargs):
+        client = openai_client.OpenAIClient(api_key="sk-test", **kwargs)
+        fake = FakeCompletions()
+        client.client = SimpleNamespace(chat=SimpleNamespace(completions=fake))
+        client.fake = fake
+        return client
+    return _make
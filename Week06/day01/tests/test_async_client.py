@@ -0,0 +1,101 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import openai_client
+from openai_client import AsyncOpenAIClient, SimulatedRateLimit
+from retry_policy import RetryPolicy
+
+
+class FakeAsyncCompletions:
+    """Async stand-in for client.chat.completions: sleeps, tracks concurrency."""
+
+    def __init__(self, delay=0.05, fail_first=0):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.calls = self.in_flight = self.peak = 0
+
+    async def create(self, model, messages, max_tokens, temperature, timeout, **kw):
+        self.calls += 1
+        if self.calls <= self.fail_first:
+            raise SimulatedRateLimit("429")
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+        message = SimpleNamespace(content=messages[-1]["content"].upper())
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=message)])
+
+
+def _client(fake, **kwargs):
+    client = AsyncOpenAIClient(api_key="sk-test", **kwargs)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=fake))
+    return client
+
+
+def _ask(i):
+    return [{"role": "user", "content": f"q{i}"}]
+
+
+def test_many_concurrent_calls_share_one_client():
+    fake = FakeAsyncCompletions(delay=0.05)
+
+    async def main():
+        async with _client(fake, max_in_flight=50) as client:
+            start = time.perf_counter()
+            results = await asyncio.gather(*(client.chat(_ask(i)) for i in range(200)))
+            return results, time.perf_counter() - start
+
+    results, wall = asyncio.run(main())
+    assert [r.content for r in results] == [f"Q{i}" for i in range(200)]
+    assert fake.peak == 50                      # semaphore cap respected
+    assert wall < 1.0                           # ~4 waves of 0.05s, not 200 x 0.05s
+    assert results[0].cost_usd == round(openai_client.pricing.cost_usd("gpt-4o-mini", 10, 5), 8)
+
+
+def test_async_backoff_does_not_block_other_calls(monkeypatch):
+    fake = FakeAsyncCompletions(delay=0.01, fail_first=1)
+    client = _client(fake, max_in_flight=4, retry_policy=RetryPolicy(base_delay_s=0.05, jitter="none"))
+
+    async def main():
+        return await asyncio.gather(*(client.chat(_ask(i)) for i in range(4)))
+
+    results = asyncio.run(main())
+    assert len(results) == 4 and fake.calls == 5
+    assert sorted(r.retries for r in results) == [0, 0, 0, 1]
+
+
+def test_dry_run_is_async(monkeypatch):
+    monkeypatch.setattr(openai_client, "DRY_RUN", True)
+    client = AsyncOpenAIClient()
+    assert client.client is None
+
+    async def main():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client.chat(_ask(i)) for i in range(100)))
+        return results, time.perf_counter() - start
+
+    results, wall = asyncio.run(main())
+    assert all(r.content.startswith("[DRY_RUN]") and r.total_tokens == 45 for r in results)
+    assert wall < 1.0                           # 100 x 0.05s would be 5s if it blocked
+
+
+def test_async_cache_hit(tmp_path):
+    fake = FakeAsyncCompletions(delay=0.0)
+    client = _client(fake, cache_path=str(tmp_path / "cache.sqlite"))
+
+    async def main():
+        first = await client.chat(_ask(1))
+        second = await client.chat(_ask(1))
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert fake.calls == 1 and second.cached and second.content == first.content
+
+
+def test_max_in_flight_must_be_positive():
+    with pytest.raises(ValueError):
+        AsyncOpenAIClient(api_key="sk-test", max_in_flight=0)
@@ -0,0 +1,64 @@
+import httpx
+import pytest
+
+import openai_client
+from load_test import percentile, run_load
+from mock_server import MockLLMServer, Profile
+from openai_client import OpenAIClient
+
+MSGS = [{"role": "user", "content": "Hello there"}]
+FAST = Profile("fast", latency="fixed", latency_s=0.001, completion_words=6)
+
+
+def test_client_talks_to_mock():
+    with MockLLMServer(FAST) as server:
+        client = OpenAIClient(api_key="sk-mock", base_url=server.base_url)
+        res = client.chat(MSGS, max_tokens=4)
+
+        assert res.content == "word0 word1 word2 word3"
+        assert res.completion_tokens == 4 and res.prompt_tokens == 9
+        assert res.cost_usd > 0
+
+        stream = client.chat_stream(MSGS)
+        assert list(stream) == ["word0 ", "word1 ", "word2 ", "word3 ", "word4 ", "word5"]
+        assert stream.result.total_tokens == 15 and stream.result.ttft_s is not None
+
+
+def test_ratelimit_and_errors_on_the_wire():
+    with MockLLMServer(Profile("busy", latency="fixed", latency_s=0, ratelimit_rate=1.0, retry_after_s=0.5)) as server:
+        r = httpx.post(f"{server.base_url}/chat/completions", json={"model": "m", "messages": MSGS})
+        assert r.status_code == 429 and r.headers["Retry-After"] == "0.5"
+        assert r.json()["error"]["code"] == "rate_limit_exceeded"
+
+    with MockLLMServer(Profile("down", latency="fixed", latency_s=0, error_rate=1.0)) as server:
+        r = httpx.post(f"{server.base_url}/chat/completions", json={"model": "m", "messages": MSGS})
+        assert r.status_code == 500 and server.stats["errors"] == 1
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50 and percentile(values, 99) == 99 and percentile(values, 100) == 100
+    assert percentile([], 50) is None
+
+
+def test_load_report_under_failures():
+    flaky = Profile("flaky", latency="fixed", latency_s=0.005, error_rate=0.2, completion_words=3)
+    report = run_load(flaky, requests=40, concurrency=8, retries=1)
+
+    assert report["ok"] + report["failed"] == 40
+    assert report["failed"] == report["server"]["errors"] > 0     # retries=1 -> errors surface
+    assert report["throughput_per_s"] > 0
+    assert report["p50_s"] <= report["p90_s"] <= report["p99_s"] <= report["max_s"]
+
+
+def test_load_test_bypasses_client_shortcuts(monkeypatch, tmp_path):
+    monkeypatch.setattr(openai_client, "RESPONSE_CACHE", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(openai_client, "SINGLE_FLIGHT", True)
+    monkeypatch.setattr(openai_client, "RATE_LIMITS", "gpt-4o-mini=1:100")
+    healthy = Profile("healthy", latency="fixed", latency_s=0.005, completion_words=3)
+    report = run_load(healthy, requests=20, concurrency=4)
+    assert report["ok"] == report["server"]["requests"] == 20     # every call reached the server
+
+    monkeypatch.setattr(openai_client, "DRY_RUN", True)
+    with pytest.raises(RuntimeError, match="DRY_RUN"):
+        run_load(healthy, requests=1)
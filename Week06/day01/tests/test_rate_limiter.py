@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from rate_limiter import Limit, RateLimiter, SQLiteBuckets, estimate_request_tokens
+
+MSGS = [{"role": "user", "content": "x" * 400}]          # ~100 prompt tokens
+
+
+def test_rpm_bucket_spaces_requests():
+    waits = []
+    limiter = RateLimiter({"m": Limit(rpm=600)}, burst_s=0.1, sleep_fn=waits.append)   # 10/s, burst 1
+    for _ in range(4):
+        limiter.acquire("m", MSGS, max_tokens=10)
+    assert waits == pytest.approx([0.1, 0.2, 0.3], abs=0.02)     # first call is free
+    assert limiter.stats["acquired"] == 4 and limiter.stats["waited"] == 3
+    assert limiter.acquire("other", MSGS, 10).wait_s == 0.0       # unlimited model
+
+
+def test_tpm_estimate_and_reconcile():
+    limiter = RateLimiter({"m": Limit(tpm=6000)}, sleep_fn=lambda s: None)  # 100 tokens/s
+    est = estimate_request_tokens(MSGS, 1000)
+    assert est == 100 + 4 + 2 + 1000
+
+    first = limiter.acquire("m", MSGS, 1000)
+    assert first.tokens == est and first.wait_s == 0.0
+    for _ in range(4):
+        limiter.acquire("m", MSGS, 1000)
+    # 5 x 1106 = 5530 booked of 6000 -> the next one must wait ~(6636-6000)/100 s
+    assert limiter.reserve("m", MSGS, 1000).wait_s == pytest.approx(6.36, abs=0.05)
+
+    limiter2 = RateLimiter({"m": Limit(tpm=6000)}, sleep_fn=lambda s: None)
+    for _ in range(5):
+        limiter2.reconcile(limiter2.acquire("m", MSGS, 1000), actual_tokens=150)   # refund ~956 each
+    assert limiter2.stats["refunded_tokens"] == 5 * (est - 150)
+    assert limiter2.reserve("m", MSGS, 1000).wait_s == 0.0
+
+
+def test_threads_share_one_limiter():
+    limiter = RateLimiter({"m": Limit(rpm=6000)}, burst_s=0.1, sleep_fn=lambda s: None)  # 100/s, burst 10
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(50):
+            w = limiter.reserve("m", MSGS, 10).wait_s
+            with lock:
+                waits.append(w)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert limiter.stats["acquired"] == 400
+    # 400 requests, 10 free, 100/s -> the last one waits ~3.9s (minus refill while running)
+    assert 3.0 < max(waits) <= 3.91
+
+
+def test_sqlite_buckets_are_shared(tmp_path):
+    db = str(tmp_path / "limits.sqlite")
+    a = RateLimiter({"m": Limit(rpm=60)}, buckets=SQLiteBuckets(db), burst_s=2, sleep_fn=lambda s: None)
+    b = RateLimiter({"m": Limit(rpm=60)}, buckets=SQLiteBuckets(db), burst_s=2, sleep_fn=lambda s: None)
+    assert a.reserve("m", MSGS, 10).wait_s == 0.0
+    assert b.reserve("m", MSGS, 10).wait_s == 0.0
+    assert a.reserve("m", MSGS, 10).wait_s == pytest.approx(1.0, abs=0.05)   # b's booking counted
+    assert b.reserve("m", MSGS, 10).wait_s == pytest.approx(2.0, abs=0.05)
+
+
+def test_from_spec():
+    limiter = RateLimiter.from_spec("gpt-4o=500:30000, gpt-4o-mini=:200000, *=60:")
+    assert limiter.limits == {"gpt-4o": Limit(500, 30000), "gpt-4o-mini": Limit(None, 200000)}
+    assert limiter.default == Limit(60, None)
+    with pytest.raises(ValueError):
+        RateLimiter.from_spec("gpt-4o")
+
+
+def test_client_books_and_reconciles(make_client):
+    waits = []
+    limiter = RateLimiter({"gpt-4o-mini": Limit(rpm=60, tpm=100_000)}, burst_s=1, sleep_fn=waits.append)
+    client = make_client(rate_limiter=limiter)
+    messages = [{"role": "user", "content": "hello"}]
+    client.chat(messages, max_tokens=300)
+    client.chat(messages, max_tokens=300)
+    assert waits == [pytest.approx(1.0, abs=0.05)]                 # rpm burst of 1
+    est = estimate_request_tokens(messages, 300)
+    assert limiter.stats["refunded_tokens"] == 2 * (est - 150)     # fake usage: 150 tokens
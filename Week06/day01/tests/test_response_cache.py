@@ -0,0 +1,69 @@
+import sqlite3
+import time
+
+import pytest
+
+import openai_client
+from openai_client import ReplayMiss, ResponseCache
+
+MSGS = [{"role": "user", "content": "What is a token?"}]
+
+
+def test_key_is_canonical():
+    a = ResponseCache.key("gpt-4o-mini", [{"role": "user", "content": "hi"}], temperature=0.2, max_tokens=10)
+    b = ResponseCache.key("gpt-4o-mini", [{"content": "hi", "role": "user"}], max_tokens=10, temperature=0.20)
+    c = ResponseCache.key("gpt-4o-mini", [{"role": "user", "content": "hi"}], temperature=0.3, max_tokens=10)
+    assert a == b != c
+
+
+def test_hit_returns_stored_result_without_calling(make_client, tmp_path):
+    client = make_client(cache_path=str(tmp_path / "cache.sqlite"))
+    first = client.chat(MSGS)
+    second = client.chat(MSGS)
+    assert client.fake.calls == 1
+    assert not first.cached and second.cached
+    assert second.content == first.content and second.cost_usd == first.cost_usd
+    assert second.latency_s == 0.0
+    assert client.cache_stats == {"hits": 1, "misses": 1, "saved_usd": first.cost_usd}
+
+    client.chat(MSGS, temperature=0.9)       # different params -> new call
+    assert client.fake.calls == 2
+
+
+def test_cache_persists_and_replays(make_client, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    make_client(cache_path=path).chat(MSGS)
+
+    replayer = make_client(cache_path=path, replay=True)
+    assert replayer.chat(MSGS).cached
+    with pytest.raises(ReplayMiss):
+        replayer.chat([{"role": "user", "content": "never asked"}])
+    assert replayer.fake.calls == 0
+
+
+def test_replay_requires_cache(make_client):
+    with pytest.raises(ValueError):
+        make_client(replay=True)
+
+
+def test_ttl_expiry(make_client, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    client = make_client(cache_path=path, cache_ttl_s=60)
+    client.chat(MSGS)
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE responses SET created_at = ?", (time.time() - 120,))
+    conn.commit()
+    conn.close()
+
+    client.chat(MSGS)                        # expired -> real call again
+    assert client.fake.calls == 2
+    assert client.cache.purge_expired() == 0
+
+
+def test_dry_run_results_are_not_cached(make_client, tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    monkeypatch.setattr(openai_client, "DRY_RUN", True)
+    make_client(cache_path=path).chat(MSGS)
+    monkeypatch.setattr(openai_client, "DRY_RUN", False)
+    client = make_client(cache_path=path)
+    assert not client.chat(MSGS).cached
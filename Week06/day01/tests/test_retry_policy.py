@@ -0,0 +1,94 @@
+import random
+import time
+
+import httpx
+import openai
+import pytest
+
+from retry_policy import RetryPolicy, parse_retry_after
+
+MSGS = [{"role": "user", "content": "retry me"}]
+
+
+def _status_error(cls, status, headers=None):
+    request = httpx.Request("POST", "http://mock/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return cls(f"HTTP {status}", response=response, body=None)
+
+
+def _failing(client, errors):
+    """Raise the given errors first, then answer normally; records timeouts."""
+    create = client.fake.create
+    seen = []
+
+    def flaky_create(**kw):
+        seen.append(kw["timeout"])
+        if errors:
+            raise errors.pop(0)
+        return create(**kw)
+
+    client.client.chat.completions.create = flaky_create
+    return seen
+
+
+@pytest.mark.parametrize("jitter,lo,hi", [("none", 4, 4), ("full", 0, 4), ("equal", 2, 4)])
+def test_jitter_bounds(jitter, lo, hi):
+    policy = RetryPolicy(base_delay_s=1, max_delay_s=30, jitter=jitter, rng=random.Random(1))
+    waits = [policy.backoff(2) for _ in range(200)]          # cap = 1 * 2**2
+    assert all(lo <= w <= hi for w in waits)
+    if jitter != "none":
+        assert len(set(waits)) > 100                        # workers don't line up
+
+
+def test_decorrelated_jitter_grows_from_previous_sleep():
+    policy = RetryPolicy(base_delay_s=0.5, max_delay_s=10, jitter="decorrelated", rng=random.Random(2))
+    assert all(0.5 <= policy.backoff(0, 2.0) <= 6.0 for _ in range(100))
+    assert all(policy.backoff(5, 100.0) <= 10 for _ in range(100))
+
+
+def test_parse_retry_after():
+    now = 1_700_000_000
+    assert parse_retry_after({"Retry-After": "2"}) == 2.0
+    assert parse_retry_after({"retry-after": "0.5"}) == 0.5
+    assert parse_retry_after({"retry-after-ms": "250", "Retry-After": "9"}) == 0.25
+    assert parse_retry_after({"Retry-After": "Tue, 14 Nov 2023 22:13:30 GMT"}, now_epoch=now) == 10.0
+    assert parse_retry_after({"Retry-After": "soon"}) is None
+    assert parse_retry_after({}) is None and parse_retry_after(None) is None
+
+
+def test_retry_after_is_honoured_and_reported(make_client):
+    client = make_client(retry_policy=RetryPolicy(base_delay_s=0.01, jitter="full"))
+    _failing(client, [_status_error(openai.RateLimitError, 429, {"retry-after": "0.2"}),
+                      _status_error(openai.InternalServerError, 503)])
+
+    res = client.chat(MSGS)
+    assert res.content.startswith("answer") and res.retries == 2
+    assert 0.2 <= res.retry_sleep_s < 0.3
+
+
+def test_client_errors_are_not_retried(make_client):
+    client = make_client(retry_policy=RetryPolicy(base_delay_s=0.01))
+    seen = _failing(client, [_status_error(openai.BadRequestError, 400)])
+    with pytest.raises(RuntimeError, match="not retried, status=400"):
+        client.chat(MSGS)
+    assert len(seen) == 1
+
+
+def test_deadline_stops_retrying_and_caps_attempt_timeouts(make_client):
+    policy = RetryPolicy(max_attempts=10, base_delay_s=0.2, jitter="none", deadline_s=0.5)
+    client = make_client(retry_policy=policy)
+    seen = _failing(client, [openai.APIConnectionError(request=httpx.Request("POST", "http://mock"))
+                             for _ in range(10)])
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="Giving up after 2 attempt"):
+        client.chat(MSGS, timeout=20)
+    assert time.monotonic() - start < 0.5                   # 0.2 slept, next 0.4 would cross it
+    assert seen[0] <= 0.5 and seen[1] <= 0.3                # per-attempt timeout cut to time left
+
+
+def test_per_attempt_timeout_from_policy(make_client):
+    client = make_client(retry_policy=RetryPolicy(attempt_timeout_s=3))
+    seen = _failing(client, [])
+    assert client.chat(MSGS, timeout=20).retries == 0
+    assert seen == [3]
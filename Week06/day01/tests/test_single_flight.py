@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from openai_client import SingleFlight
+
+MSGS = [{"role": "user", "content": "Same question"}]
+
+
+def _slow(fake, delay=0.2):
+    create = fake.create
+
+    def slow_create(**kw):
+        time.sleep(delay)
+        return create(**kw)
+    return slow_create
+
+
+def _together(n, fn):
+    barrier = threading.Barrier(n)
+    out = [None] * n
+
+    def run(i):
+        barrier.wait()
+        try:
+            out[i] = fn(i)
+        except Exception as e:
+            out[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_identical_requests_share_one_call(make_client):
+    # Separate clients (one per worker) still share the process-wide group.
+    clients = [make_client(single_flight=True) for _ in range(5)]
+    fake = clients[0].fake
+    for c in clients:
+        c.client.chat.completions.create = _slow(fake)
+
+    results = _together(5, lambda i: clients[i].chat(MSGS))
+
+    assert fake.calls == 1
+    assert len({r.content for r in results}) == 1
+    assert sorted(r.coalesced for r in results) == [False] + [True] * 4
+    coalesced = sum(c.coalesce_stats["coalesced"] for c in clients)
+    saved = sum(c.coalesce_stats["saved_usd"] for c in clients)
+    assert coalesced == 4 and saved == pytest.approx(4 * results[0].cost_usd)
+
+
+def test_shared_client_counts_every_call(make_client):
+    # One client used by many threads: the counters must not lose updates.
+    client = make_client(single_flight=True)
+    client.client.chat.completions.create = _slow(client.fake)
+
+    _together(16, lambda i: client.chat(MSGS))
+
+    assert client.fake.calls == 1
+    assert client.coalesce_stats["calls"] == 16
+    assert client.coalesce_stats["coalesced"] == 15
+
+
+def test_different_params_and_later_calls_are_not_coalesced(make_client):
+    client = make_client(single_flight=True)
+    client.client.chat.completions.create = _slow(client.fake, 0.1)
+
+    results = _together(2, lambda i: client.chat(MSGS, temperature=0.1 * i))
+    assert client.fake.calls == 2 and not any(r.coalesced for r in results)
+
+    client.chat(MSGS)                    # nothing in flight any more -> a new call
+    assert client.fake.calls == 3
+
+
+def test_followers_get_the_leaders_error():
+    flights = SingleFlight()
+
+    def boom():
+        time.sleep(0.1)
+        raise ValueError("upstream down")
+
+    out = _together(3, lambda i: flights.do("k", boom))
+    assert all(isinstance(e, ValueError) for e in out)
+    assert flights.do("k", lambda: 42) == (42, False)
+
+
+def test_off_by_default(make_client):
+    client = make_client()
+    client.client.chat.completions.create = _slow(client.fake, 0.05)
+    _together(3, lambda i: client.chat(MSGS))
+    assert client.fake.calls == 3
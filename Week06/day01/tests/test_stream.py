@@ -0,0 +1,68 @@
+import pytest
+
+import openai_client
+
+MSGS = [{"role": "user", "content": "Say hello"}]
+
+
+def test_stream_yields_pieces_and_timings(make_client):
+    client = make_client()
+    stream = client.chat_stream(MSGS)
+    pieces = list(stream)
+
+    assert len(pieces) == 5                       # "answer #1 to Say hello"
+    assert stream.text == "".join(pieces) == stream.result.content
+    res = stream.result
+    assert (res.prompt_tokens, res.completion_tokens, res.total_tokens) == (100, 50, 150)
+    assert res.cost_usd == client._calc_cost("gpt-4o-mini", 100, 50)
+    assert 0 <= res.ttft_s <= res.latency_s
+    assert res.itl_s is not None and res.itl_s >= 0
+
+
+def test_stream_is_lazy(make_client):
+    client = make_client()
+    stream = client.chat_stream(MSGS)
+    assert client.fake.calls == 0 and stream.result is None
+    next(iter(stream))
+    assert client.fake.calls == 1
+
+
+def test_dry_run_mock_uses_configured_delays(make_client, monkeypatch, caplog):
+    monkeypatch.setattr(openai_client, "DRY_RUN", True)
+    monkeypatch.setattr(openai_client, "DRY_RUN_TTFT_S", 0.05)
+    monkeypatch.setattr(openai_client, "DRY_RUN_TOKEN_DELAY_S", 0.02)
+    client = make_client()
+
+    with caplog.at_level("INFO"):
+        stream = client.chat_stream(MSGS)
+        text = "".join(stream)
+
+    assert text == client.DRY_CONTENT and client.fake.calls == 0
+    res = stream.result
+    assert res.ttft_s >= 0.05
+    assert res.itl_s >= 0.02
+    assert res.latency_s >= res.ttft_s + 0.02 * 5   # 6 words -> 5 gaps
+    assert "ttft=" in caplog.text and "itl=" in caplog.text
+
+
+def test_stream_cache_hit_is_one_piece(make_client, tmp_path):
+    client = make_client(cache_path=str(tmp_path / "cache.sqlite"))
+    first = client.chat_stream(MSGS)
+    list(first)
+
+    again = client.chat_stream(MSGS)
+    assert list(again) == [first.result.content]
+    assert again.result.cached and client.fake.calls == 1
+    assert again.result.itl_s is None
+
+
+def test_broken_stream_raises(make_client):
+    client = make_client()
+
+    def broken(**kw):
+        yield from client.fake._chunks("half an", None)
+        raise ConnectionError("reset by peer")
+
+    client.client.chat.completions.create = broken
+    with pytest.raises(RuntimeError, match="after 2 pieces"):
+        list(client.chat_stream(MSGS))
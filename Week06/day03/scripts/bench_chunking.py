@@ -0,0 +1,56 @@
+# scripts/bench_chunking.py
+"""
+Chunking Benchmark
+- Builds synthetic documents of doubling size (from data/sample_texts/demo_text.txt)
+- Times chunk_text_by_tokens on each
+- Prints seconds and seconds-per-MB: a flat s/MB column means linear scaling
+
+Run:
+  python scripts/bench_chunking.py
+  python scripts/bench_chunking.py --max-mb 8 --max-chunk-tokens 300 --model gpt-4o
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]  # .../day03/
+sys.path.append(str(ROOT / "src"))
+
+from utils.token_tools import chunk_text_by_tokens, safe_encoding_for_model
+from prompt_runner.prompt_runner import load_text
+
+
+def build_doc(seed_text: str, size_bytes: int) -> str:
+    seed = seed_text.strip() + " "
+    reps = size_bytes // max(1, len(seed.encode("utf-8"))) + 1
+    return (seed * reps)[:size_bytes]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark chunk_text_by_tokens scaling")
+    ap.add_argument("--model", default="gpt-4o")
+    ap.add_argument("--max-chunk-tokens", type=int, default=300)
+    ap.add_argument("--start-mb", type=float, default=0.25)
+    ap.add_argument("--max-mb", type=float, default=4.0)
+    ap.add_argument("--seed-file", default=str(ROOT / "data" / "sample_texts" / "demo_text.txt"))
+    args = ap.parse_args()
+
+    seed_text = load_text(Path(args.seed_file))
+    safe_encoding_for_model(args.model)  # load the tokenizer outside the timings
+
+    print(f"{'size_MB':>8} {'chunks':>8} {'seconds':>9} {'s_per_MB':>9}")
+    mb = args.start_mb
+    while mb <= args.max_mb:
+        doc = build_doc(seed_text, int(mb * 1024 * 1024))
+        start = time.perf_counter()
+        chunks = chunk_text_by_tokens(doc, args.max_chunk_tokens, model=args.model)
+        secs = time.perf_counter() - start
+        print(f"{mb:>8.2f} {len(chunks):>8} {secs:>9.3f} {secs / mb:>9.3f}")
+        mb *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# scripts/calibrate_estimator.py
+"""
+Estimator Calibration
+- Splits sample files into paragraphs (one sample each)
+- Counts real tokens with the model's tokenizer and extracts estimator features
+- Fits EstimatorCoefficients by least squares on the relative error (each
+  sample weighted by 1/real tokens, so long texts don't drown short ones)
+- Samples under --min-tokens real tokens are left out: 1 token off on a
+  3-token line is 33%, which says nothing about prompt-sized text
+- rel_error = the --bound-pct percentile of the relative error
+- Prints a set_estimator_coefficients(...) line to paste into your setup
+
+Run:
+  python scripts/calibrate_estimator.py --dir data/sample_texts --model gpt-4o
+  python scripts/calibrate_estimator.py --dir ../../docs --glob "**/*.md" --model gpt-4o-mini
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]  # .../day03/
+sys.path.append(str(ROOT / "src"))
+
+from utils.token_tools import (
+    EstimatorCoefficients,
+    _estimator_family,
+    count_tokens,
+    estimator_features,
+)
+from prompt_runner.prompt_runner import load_text, percentile
+
+FIELDS = ["words", "letters", "digit_groups", "punct_runs", "newline_runs", "non_ascii", "bias"]
+
+
+def solve(a: List[List[float]], b: List[float]) -> List[float]:
+    """Gaussian elimination with partial pivoting (tiny systems only)."""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        if abs(m[col][col]) < 1e-12:
+            continue  # feature never seen in the corpus -> leave weight at 0
+        for r in range(n):
+            if r != col:
+                f = m[r][col] / m[col][col]
+                m[r] = [x - f * y for x, y in zip(m[r], m[col])]
+    return [m[i][n] / m[i][i] if abs(m[i][i]) >= 1e-12 else 0.0 for i in range(n)]
+
+
+def fit(xs: Sequence[Sequence[float]], ys: Sequence[float], ridge: float = 1e-6) -> List[float]:
+    """Least squares via the normal equations (X^T X + ridge*I) w = X^T y."""
+    k = len(xs[0])
+    xtx = [[sum(x[i] * x[j] for x in xs) + (ridge if i == j else 0.0) for j in range(k)] for i in range(k)]
+    xty = [sum(x[i] * y for x, y in zip(xs, ys)) for i in range(k)]
+    return solve(xtx, xty)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fit estimate_tokens() coefficients against a real tokenizer")
+    ap.add_argument("--dir", default=str(ROOT / "data" / "sample_texts"))
+    ap.add_argument("--glob", default="**/*.txt")
+    ap.add_argument("--model", default="gpt-4o")
+    ap.add_argument("--bound-pct", type=float, default=95.0, help="Percentile used as the error bound")
+    ap.add_argument("--min-tokens", type=int, default=10, help="Skip samples shorter than this (real tokens)")
+    args = ap.parse_args()
+
+    samples: List[str] = []
+    for path in sorted(Path(args.dir).glob(args.glob)):
+        if path.is_file():
+            samples.extend(p.strip() for p in load_text(path).split("\n\n") if p.strip())
+    if not samples:
+        raise SystemExit("No samples found. Point --dir/--glob at some text files.")
+
+    counted = ((s, float(count_tokens(args.model, s, use_cache=False))) for s in samples)
+    kept = [(s, y) for s, y in counted if y >= max(1, args.min_tokens)]
+    if not kept:
+        raise SystemExit(f"No samples with >= {args.min_tokens} tokens.")
+    xs = [list(estimator_features(s)) + [1.0] for s, _ in kept]
+    ys = [y for _, y in kept]
+    # Relative error: (w.x - y) / y = w.(x/y) - 1  ->  fit w.(x/y) ~ 1
+    w = fit([[v / y for v in x] for x, y in zip(xs, ys)], [1.0] * len(ys))
+
+    errors = sorted(abs(sum(wi * xi for wi, xi in zip(w, x)) - y) / y for x, y in zip(xs, ys))
+    bound = percentile(errors, args.bound_pct)
+    coeffs = EstimatorCoefficients(*[round(v, 4) for v in w], rel_error=round(bound, 3))
+
+    print(f"Samples: {len(kept)} of {len(samples)} (>= {args.min_tokens} tokens)  Tokens: {int(sum(ys))}  "
+          f"Family: {_estimator_family(args.model)}")
+    for name, val in zip(FIELDS, w):
+        print(f"  {name:>13}: {val:.4f}")
+    print(f"Relative error p50={percentile(errors, 50):.3f} p{args.bound_pct:g}={bound:.3f} max={errors[-1]:.3f}")
+    print("\nRegister with:")
+    print(f"set_estimator_coefficients({_estimator_family(args.model)!r}, {coeffs!r})")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,25 @@ Prompt Runner (Pre-Flight)
 - Estimates cost (optionally include expected completion tokens)
 - Warns if cost/size exceed thresholds
 - Optionally chunks the text and logs results
+- Corpus mode (--dir/--glob): counts + prices many files across a process pool,
+  streams per-file results to JSONL, prints totals and percentiles
 
 No API key needed. Purely local checks.
+
+Run:
+  python src/prompt_runner/prompt_runner.py --path data/sample_texts/demo_text.txt --chunk
+  python src/prompt_runner/prompt_runner.py --dir data/sample_texts --glob "**/*.txt" --workers 8
 """
 
 from __future__ import annotations
 import argparse
 import json
+import math
 import os
+import time
 from pathlib import Path
 from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
 
 # Allow imports like: from utils.token_tools import ...
 import sys
@@ -24,9 +33,13 @@ sys.path.append(str(ROOT / "src"))
 
 from utils.token_tools import (
     count_tokens,
+    count_tokens_many,
     estimate_cost,
+    estimate_tokens,
+    estimator_error_bound,
     estimate_cost_for_text,
     chunk_text_by_tokens,
+    sniff_encoding,
 )
 
 # ----------------------------
@@ -37,12 +50,16 @@ def load_text(path: Path) -> str:
     if not path.exists():
         raise FileNotFoundError(f"Prompt file not found: {path}")
 
-    for enc in ("utf-8", "utf-8-sig", "utf-16", "utf-16-le", "utf-16-be", "cp1252"):
-        try:
-            return path.read_text(encoding=enc)
-        except UnicodeDecodeError:
-            continue
-    raise UnicodeDecodeError("utf-8", b"", 0, 1, f"Could not decode {path}. Re-save as UTF-8.")
+    # Read the bytes once, pick the codec from the BOM/first bytes, decode once.
+    data = path.read_bytes()
+    enc = sniff_encoding(data[:64 * 1024])
+    try:
+        text = data.decode(enc)
+    except UnicodeDecodeError:
+        # Looked like UTF-8 at the start but isn't further in: last-resort codec
+        text = data.decode("cp1252", errors="replace")
+    # Same newline handling as read_text()
+    return text.replace("\r\n", "\n").replace("\r", "\n")
 
 
 def ensure_dir(p: Path):
@@ -55,6 +72,183 @@ def save_log(payload: dict, logs_dir: Path):
     out.write_text(json.dumps(payload, indent=2), encoding="utf-8")
     return out
 
+# ----------------------------
+# Corpus mode (many files, process pool)
+# ----------------------------
+
+def iter_corpus_files(root: Path, pattern: str) -> Iterator[Path]:
+    """Yield matching files under `root` in a stable (sorted) order."""
+    return iter(sorted(p for p in root.glob(pattern) if p.is_file()))
+
+
+def _batched(items: List[Path], size: int) -> Iterator[List[Path]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def count_file_batch(paths: List[str], model: str, expected_completion: int,
+                     approx: bool = False) -> List[Dict]:
+    """
+    Worker job: load a batch of files, count tokens with one batch encode
+    (or the approximate estimate when `approx`), and price each file.
+    Runs inside a pool process (tokenizer loads once per process).
+    Rows come back in the same order as `paths`.
+    """
+    results: List[Dict] = []
+    texts: List[str] = []
+    ok: List[Dict] = []
+    for p in paths:
+        try:
+            text = load_text(Path(p))
+        except (OSError, UnicodeDecodeError) as e:
+            results.append({"path": p, "status": "error", "error": str(e)})
+            continue
+        texts.append(text)
+        ok.append({"path": p, "status": "ok", "chars": len(text)})
+        results.append(ok[-1])
+
+    if approx:
+        counts = [estimate_tokens(model, t) for t in texts]
+    else:
+        counts = count_tokens_many(model, texts)
+    for row, n in zip(ok, counts):
+        row["prompt_tokens"] = n
+        row["estimated_cost_usd"] = estimate_cost(model, n, expected_completion)
+    return results
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already-sorted list (0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_corpus(
+    root: Path,
+    pattern: str,
+    model: str,
+    expected_completion: int,
+    out_path: Path,
+    workers: int,
+    batch_size: int,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: tuple = (),
+    mp_context=None,
+    approx: bool = False,
+) -> Dict:
+    """
+    Count + price every file matching root/pattern across a process pool.
+    Per-file rows are streamed to `out_path` (JSONL) in file order, so two runs
+    over the same corpus write the same file. Returns the aggregate summary.
+    approx=True prices with estimate_tokens instead of the real tokenizer.
+    initializer/initargs/mp_context go to ProcessPoolExecutor: workers may be
+    spawned fresh (macOS/Windows default), so per-process setup belongs in
+    `initializer`, not in the parent's state.
+    """
+    from concurrent.futures import ProcessPoolExecutor  # corpus mode only
+
+    files = [str(p) for p in iter_corpus_files(root, pattern)]
+    ensure_dir(out_path.parent)
+    start = time.perf_counter()
+
+    tokens: List[int] = []
+    costs: List[float] = []
+    errors = 0
+    with out_path.open("w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                                initializer=initializer, initargs=initargs) as pool:
+        jobs = [
+            pool.submit(count_file_batch, batch, model, expected_completion, approx)
+            for batch in _batched(files, batch_size)
+        ]
+        for job in jobs:  # submission order; later batches keep running meanwhile
+            for row in job.result():
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                if row["status"] == "ok":
+                    tokens.append(row["prompt_tokens"])
+                    costs.append(row["estimated_cost_usd"])
+                else:
+                    errors += 1
+
+    tokens.sort()
+    costs.sort()
+    return {
+        "files": len(files),
+        "files_ok": len(tokens),
+        "files_error": errors,
+        "total_prompt_tokens": sum(tokens),
+        "total_estimated_cost_usd": round(sum(costs), 6),
+        "prompt_tokens_p50": percentile(tokens, 50),
+        "prompt_tokens_p90": percentile(tokens, 90),
+        "prompt_tokens_p99": percentile(tokens, 99),
+        "prompt_tokens_max": tokens[-1] if tokens else 0,
+        "cost_usd_p50": percentile(costs, 50),
+        "cost_usd_p90": percentile(costs, 90),
+        "cost_usd_p99": percentile(costs, 99),
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
+
+
+def main_corpus(args) -> None:
+    model = args.model
+    root = Path(args.dir)
+    if not root.is_dir():
+        raise NotADirectoryError(f"Corpus directory not found: {root}")
+
+    logs_dir = ROOT / "logs" / "cost_tests"
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    out_path = Path(args.out) if args.out else logs_dir / f"{stamp}_corpus.jsonl"
+
+    summary = run_corpus(
+        root,
+        args.glob,
+        model,
+        args.expected_completion,
+        out_path,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        approx=args.approx,
+    )
+
+    print("\n=== CORPUS PRE-FLIGHT ESTIMATE ===")
+    print(f"Model: {model}")
+    print(f"Corpus: {root} ({args.glob})")
+    print(f"Files: {summary['files']} (ok={summary['files_ok']}, errors={summary['files_error']})")
+    if args.approx:
+        print(f"Total prompt tokens (approx, ±{estimator_error_bound(model):.0%} p95 per file): "
+              f"{summary['total_prompt_tokens']}")
+    else:
+        print(f"Total prompt tokens: {summary['total_prompt_tokens']}")
+    print(f"Expected completion tokens per file: {args.expected_completion}")
+    print(f"Estimated total cost (USD): ${summary['total_estimated_cost_usd']:.6f}")
+    print(
+        f"Prompt tokens p50/p90/p99/max: {summary['prompt_tokens_p50']}/"
+        f"{summary['prompt_tokens_p90']}/{summary['prompt_tokens_p99']}/{summary['prompt_tokens_max']}"
+    )
+    print(
+        f"Cost per file p50/p90/p99: ${summary['cost_usd_p50']:.6f}/"
+        f"${summary['cost_usd_p90']:.6f}/${summary['cost_usd_p99']:.6f}"
+    )
+    print(f"Elapsed: {summary['elapsed_s']}s")
+    print(f"Per-file results: {out_path}")
+
+    payload = {
+        "timestamp": datetime.now().isoformat(),
+        "mode": "corpus",
+        "model": model,
+        "corpus_dir": str(root),
+        "glob": args.glob,
+        "expected_completion_tokens": args.expected_completion,
+        "prompt_tokens_approx": bool(args.approx),
+        "per_file_results": str(out_path),
+        **summary,
+    }
+    out_file = save_log(payload, logs_dir)
+    print(f"\n📝 Logged corpus summary to: {out_file}\n")
+
+
 # ----------------------------
 # Main
 # ----------------------------
@@ -89,6 +283,11 @@ def main():
         default=6000,
         help="Warn if prompt tokens exceed this amount (rough safety budget)",
     )
+    parser.add_argument(
+        "--approx",
+        action="store_true",
+        help="Use the fast approximate token estimate (no tokenizer load)",
+    )
     parser.add_argument(
         "--chunk",
         action="store_true",
@@ -100,8 +299,40 @@ def main():
         default=300,
         help="Max tokens per chunk when --chunk is used (default: 300)",
     )
+    corpus = parser.add_argument_group("corpus mode")
+    corpus.add_argument(
+        "--dir",
+        default=None,
+        help="Count/price every file under this directory instead of --path",
+    )
+    corpus.add_argument(
+        "--glob",
+        default="**/*.txt",
+        help="File pattern inside --dir (default: **/*.txt)",
+    )
+    corpus.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for corpus mode (default: CPU count)",
+    )
+    corpus.add_argument(
+        "--batch-size",
+        type=int,
+        default=64,
+        help="Files per worker job (default: 64)",
+    )
+    corpus.add_argument(
+        "--out",
+        default=None,
+        help="Per-file JSONL output (default: logs/cost_tests/<timestamp>_corpus.jsonl)",
+    )
     args = parser.parse_args()
 
+    if args.dir:
+        main_corpus(args)
+        return
+
     prompt_path = Path(args.path)
     model = args.model
 
@@ -109,14 +340,20 @@ def main():
     prompt_text = load_text(prompt_path)
 
     # 2) Count tokens & estimate cost
-    prompt_tokens = count_tokens(model, prompt_text)
+    if args.approx:
+        prompt_tokens = estimate_tokens(model, prompt_text)
+    else:
+        prompt_tokens = count_tokens(model, prompt_text)
     est_cost = estimate_cost(model, prompt_tokens, args.expected_completion)
 
     # 3) Print summary
     print("\n=== PRE-FLIGHT ESTIMATE ===")
     print(f"Model: {model}")
     print(f"Prompt file: {prompt_path}")
-    print(f"Prompt tokens: {prompt_tokens}")
+    if args.approx:
+        print(f"Prompt tokens (approx, ±{estimator_error_bound(model):.0%} p95): {prompt_tokens}")
+    else:
+        print(f"Prompt tokens: {prompt_tokens}")
     print(f"Expected completion tokens: {args.expected_completion}")
     print(f"Estimated cost (USD): ${est_cost:.6f}")
 
@@ -146,6 +383,7 @@ def main():
         "model": model,
         "prompt_file": str(prompt_path),
         "prompt_tokens": prompt_tokens,
+        "prompt_tokens_approx": bool(args.approx),
         "expected_completion_tokens": args.expected_completion,
         "estimated_cost_usd": est_cost,
         "warn_cost_threshold": args.warn_cost,
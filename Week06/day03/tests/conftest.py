@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+import pytest
+import tiktoken
+
+# Make 'src' importable so 'from utils.token_tools import ...' works
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from utils import token_tools
+
+
+def _toy_bpe() -> tiktoken.Encoding:
+    """
+    Tiny offline BPE: every byte is a token, plus a few merges so that
+    joining/splitting text behaves like a real tokenizer (no downloads).
+    """
+    ranks = {bytes([i]): i for i in range(256)}
+    for merge in (b"th", b"he", b" t", b"the", b" the", b"in", b"ing", b"er", b"an", b". ", b"is", b" is"):
+        ranks[merge] = len(ranks)
+    return tiktoken.Encoding(
+        name="toy_bpe",
+        pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+        mergeable_ranks=ranks,
+        special_tokens={"<|endoftext|>": len(ranks)},
+    )
+
+
+def use_toy_tokenizer() -> None:
+    """ProcessPoolExecutor initializer: the same toy BPE inside a worker process
+    (spawned workers don't inherit the test's monkeypatching)."""
+    enc = _toy_bpe()
+    tiktoken.encoding_for_model = lambda model: enc
+    token_tools.safe_encoding_for_model.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def toy_tokenizer(monkeypatch):
+    """Route every model to the toy BPE and start each test with empty caches."""
+    enc = _toy_bpe()
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model: enc)
+    token_tools.safe_encoding_for_model.cache_clear()
+    token_tools.configure_token_cache(4096)
+    yield enc
+    token_tools.safe_encoding_for_model.cache_clear()
@@ -0,0 +1,70 @@
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+import pricing
+from utils.token_tools import estimate_cost, estimate_costs, get_pricing
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # register_rate mutates the shared table -> give each test its own copy
+    monkeypatch.setattr(pricing, "REGISTRY", {k: list(v) for k, v in pricing.REGISTRY.items()})
+    return pricing
+
+
+def test_dated_lookup_and_aliases(registry):
+    assert registry.get_rate("gpt-4o", on="2024-06-01").input_per_1k == 0.005
+    assert registry.get_rate("gpt-4o", on=dt.date(2025, 1, 1)).input_per_1k == 0.0025
+    assert registry.get_rate("gpt-4o").version == "2024-10 price cut"
+    # before the first rate -> first rate; dated model ids -> base model
+    assert registry.get_rate("gpt-4o", on="2020-01-01").input_per_1k == 0.005
+    assert registry.get_rate("gpt-4o-mini-2024-07-18") == registry.get_rate("gpt-4o-mini")
+
+
+def test_unknown_model_strict_and_default(registry):
+    with pytest.raises(KeyError):
+        get_pricing("not-a-model")
+    assert registry.get_rate("not-a-model", strict=False).model == registry.DEFAULT_MODEL
+
+
+def test_token_tools_uses_registry(registry):
+    assert get_pricing("gpt-4o-mini") == {"input": 0.00015, "output": 0.0006}
+    registry.register_rate("gpt-4o-mini", 0.0001, 0.0004, "2030-01-01", "future")
+    assert estimate_cost("gpt-4o-mini", 1000, 1000) == 0.0005
+
+
+def test_estimate_costs_matches_scalar(registry):
+    df = pd.DataFrame({
+        "model_name": ["gpt-4o", "gpt-4o-mini", "mystery", None, "gpt-4o"],
+        "prompt_tokens": [1000, 2000, 500, 100, None],
+        "completion_tokens": [200, 300, 50, 10, 400],
+        "timestamp": ["2024-06-01T10:00:00", "2024-08-01", "2024-08-01", "2024-08-01", "2025-02-01"],
+    })
+
+    today = estimate_costs(df)
+    for i, row in df.iterrows():
+        if pd.isna(row.model_name):
+            assert pd.isna(today[i])
+            continue
+        p = 0 if pd.isna(row.prompt_tokens) else row.prompt_tokens
+        assert today[i] == round(registry.cost_usd(row.model_name, p, row.completion_tokens), 8)
+
+    as_logged = estimate_costs(df, time_col="timestamp")
+    assert as_logged[0] == round(registry.cost_usd("gpt-4o", 1000, 200, on="2024-06-01"), 8)
+    assert as_logged[0] > today[0]          # logged before the gpt-4o price cut
+    assert as_logged[4] == today[4]         # logged after it
+    assert as_logged[1] == today[1]         # single-version model
+
+
+def test_estimate_costs_after_price_change(registry):
+    df = pd.DataFrame({
+        "model_name": ["gpt-4o-mini"] * 3,
+        "prompt_tokens": [1000] * 3,
+        "completion_tokens": [1000] * 3,
+        "timestamp": ["2024-08-01", "2031-01-01", "not a date"],
+    })
+    registry.register_rate("gpt-4o-mini", 0.0001, 0.0004, "2030-01-01", "future")
+    costs = estimate_costs(df, time_col="timestamp")
+    assert costs.tolist() == [0.00075, 0.0005, 0.0005]   # undated rows use the newest rate
@@ -0,0 +1,73 @@
+import json
+import multiprocessing
+from pathlib import Path
+
+from conftest import use_toy_tokenizer
+from prompt_runner.prompt_runner import percentile, run_corpus
+from utils.token_tools import count_tokens, estimate_cost, estimate_tokens
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 90) == 90
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+def test_run_corpus_counts_every_file(tmp_path):
+    corpus = tmp_path / "docs"
+    (corpus / "nested").mkdir(parents=True)
+    texts = {f"doc{i}.txt": "the thing is interesting. " * (i + 1) for i in range(7)}
+    for name, text in texts.items():
+        (corpus / ("nested" if name.endswith(("1.txt", "2.txt")) else "") / name).write_text(text, encoding="utf-8")
+    (corpus / "skip.md").write_text("not matched", encoding="utf-8")
+    (corpus / "utf16.txt").write_text("the thing", encoding="utf-16")
+
+    out = tmp_path / "results.jsonl"
+    # spawn: workers start clean on every OS, so the toy tokenizer comes from the initializer
+    summary = run_corpus(corpus, "**/*.txt", "gpt-4o-mini", 100, out, workers=2, batch_size=3,
+                         initializer=use_toy_tokenizer, mp_context=multiprocessing.get_context("spawn"))
+
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert len(rows) == summary["files"] == 8
+    assert [r["path"] for r in rows] == sorted(str(p) for p in corpus.glob("**/*.txt"))
+    assert summary["files_error"] == 0
+
+    expected = sum(count_tokens("gpt-4o-mini", t) for t in texts.values()) + count_tokens("gpt-4o-mini", "the thing")
+    assert summary["total_prompt_tokens"] == expected
+    by_name = {Path(r["path"]).name: r for r in rows}
+    n0 = count_tokens("gpt-4o-mini", texts["doc0.txt"])
+    assert by_name["doc0.txt"]["estimated_cost_usd"] == estimate_cost("gpt-4o-mini", n0, 100)
+    assert summary["prompt_tokens_max"] == count_tokens("gpt-4o-mini", texts["doc6.txt"])
+
+
+def test_run_corpus_approx_uses_the_estimate(tmp_path):
+    corpus = tmp_path / "docs"
+    corpus.mkdir()
+    texts = [f"file {i}: " + "words and more words. " * (i + 1) for i in range(4)]
+    for i, text in enumerate(texts):
+        (corpus / f"doc{i}.txt").write_text(text, encoding="utf-8")
+
+    out = tmp_path / "results.jsonl"
+    summary = run_corpus(corpus, "*.txt", "gpt-4o-mini", 0, out, workers=2, batch_size=1,
+                         mp_context=multiprocessing.get_context("spawn"), approx=True)
+
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["prompt_tokens"] for r in rows] == [estimate_tokens("gpt-4o-mini", t) for t in texts]
+    assert summary["total_prompt_tokens"] == sum(r["prompt_tokens"] for r in rows)
+
+
+def test_import_does_not_load_tiktoken():
+    # --help / --approx runs should never pay for the tokenizer import.
+    import subprocess
+    import sys
+
+    src = Path(__file__).resolve().parents[1] / "src"
+    code = (
+        f"import sys; sys.path.insert(0, {str(src)!r}); "
+        "import prompt_runner.prompt_runner; "
+        "print('tiktoken' in sys.modules, 'concurrent.futures.process' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False"]
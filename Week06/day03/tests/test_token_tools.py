@@ -0,0 +1,321 @@
+import random
+
+import pytest
+import tiktoken
+
+from utils import token_tools
+from utils.token_tools import (
+    count_tokens,
+    count_tokens_many,
+    configure_token_cache,
+    token_cache_stats,
+    safe_encoding_for_model,
+    chunk_text_by_tokens,
+    iter_file_chunks,
+    sniff_encoding,
+    sliding_token_windows,
+    EstimatorCoefficients,
+    estimate_cost_for_text,
+    estimate_tokens,
+    estimator_error_bound,
+    estimator_features,
+    set_estimator_coefficients,
+)
+
+
+def test_encoding_is_reused_per_model(monkeypatch, toy_tokenizer):
+    calls = []
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda m: calls.append(m) or toy_tokenizer)
+    for _ in range(5):
+        safe_encoding_for_model("gpt-4o")
+    safe_encoding_for_model("gpt-4o-mini")
+    assert calls == ["gpt-4o", "gpt-4o-mini"]
+
+
+def test_count_tokens_matches_encoder(toy_tokenizer):
+    text = "the thing is interesting."
+    assert count_tokens("gpt-4o", text) == len(toy_tokenizer.encode(text))
+    assert count_tokens("gpt-4o", "") == 0
+    assert count_tokens("gpt-4o", None) == 0
+
+
+def test_repeated_counts_hit_cache():
+    for _ in range(10):
+        count_tokens("gpt-4o", "Summarize this paragraph in one sentence.")
+    stats = token_cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 9
+    assert stats["size"] == 1
+
+
+def test_cache_key_includes_model():
+    count_tokens("gpt-4o", "same text")
+    count_tokens("gpt-4o-mini", "same text")
+    assert token_cache_stats()["misses"] == 2
+
+
+def test_cache_is_bounded_lru():
+    configure_token_cache(2)
+    count_tokens("gpt-4o", "a")
+    count_tokens("gpt-4o", "b")
+    count_tokens("gpt-4o", "a")      # refresh 'a'
+    count_tokens("gpt-4o", "c")      # evicts 'b'
+    count_tokens("gpt-4o", "a")
+    count_tokens("gpt-4o", "b")
+    stats = token_cache_stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2 and stats["misses"] == 4
+
+
+def test_cache_can_be_disabled():
+    configure_token_cache(0)
+    count_tokens("gpt-4o", "x y z")
+    count_tokens("gpt-4o", "x y z")
+    assert token_cache_stats()["size"] == 0
+
+
+def test_count_tokens_many_dedupes(toy_tokenizer):
+    texts = ["template A", "template B", "template A", None, "template A"]
+    out = count_tokens_many("gpt-4o", texts)
+    assert out == [len(toy_tokenizer.encode(t or "")) for t in texts]
+    stats = token_cache_stats()
+    assert stats["misses"] == 3  # A, B, ""
+    assert count_tokens("gpt-4o", "template B") == out[1]
+    assert token_cache_stats()["hits"] == 1
+
+
+# ---------- chunk_text_by_tokens ----------
+
+# Pre-tokenizer patterns of the real encodings (cl100k_base, o200k_base).
+CL100K_PAT = r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+"""
+O200K_PAT = "|".join([
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""\p{N}{1,3}""",
+    r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+    r"""\s*[\r\n]+""",
+    r"""\s+(?!\S)""",
+    r"""\s+""",
+])
+
+
+def _legacy_chunker(text, max_tokens, enc):
+    """The original re-encode-the-candidate implementation (reference only)."""
+    import re
+    cleaned = (text or "").strip()
+    if not cleaned:
+        return []
+    sentences = re.compile(r'(?<=\.|\?|!)\s+').split(cleaned)
+    chunks, current = [], ""
+    token_len = lambda s: len(enc.encode(s))
+    for sent in sentences:
+        sent = sent.strip()
+        if not sent:
+            continue
+        if token_len(sent) > max_tokens:
+            token_ids = enc.encode(sent)
+            start = 0
+            while start < len(token_ids):
+                end = min(start + max_tokens, len(token_ids))
+                piece = enc.decode(token_ids[start:end]).strip()
+                if piece:
+                    if current:
+                        chunks.append(current.strip())
+                        current = ""
+                    chunks.append(piece)
+                start = end
+            continue
+        candidate = (f"{current} {sent}".strip()) if current else sent
+        if token_len(candidate) <= max_tokens:
+            current = candidate
+        else:
+            if current:
+                chunks.append(current.strip())
+            current = sent
+    if current:
+        chunks.append(current.strip())
+    return chunks
+
+
+def _random_text(rng, n_sentences):
+    words = ["the", "thing", "is", "interesting", "Running", "don't", "it's", "42", "1999",
+             "e.g.", "(note)", "naïve", "café", "x_y", "—", "\"quoted\"", "end:", "'s", "...",
+             "HTTPServer", "ok?!", "10.5", "a\tb", "new\nline"]
+    out = []
+    for _ in range(n_sentences):
+        n = rng.randint(1, 12)
+        sent = " ".join(rng.choice(words) for _ in range(n))
+        out.append(sent + rng.choice([".", "!", "?", ".", ""]))
+    return rng.choice([" ", "  ", "\n", " \n "]).join(out)
+
+
+@pytest.mark.parametrize("pat_str", [None, CL100K_PAT, O200K_PAT], ids=["gpt2", "cl100k", "o200k"])
+@pytest.mark.parametrize("max_tokens", [5, 17, 40, 200])
+def test_chunker_matches_legacy_boundaries(monkeypatch, toy_tokenizer, pat_str, max_tokens):
+    enc = toy_tokenizer
+    if pat_str is not None:
+        enc = tiktoken.Encoding(
+            name=f"toy_{len(pat_str)}",
+            pat_str=pat_str,
+            mergeable_ranks=toy_tokenizer._mergeable_ranks,
+            special_tokens={},
+        )
+        monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model: enc)
+        token_tools.safe_encoding_for_model.cache_clear()
+
+    rng = random.Random(max_tokens)
+    for _ in range(25):
+        text = _random_text(rng, rng.randint(1, 40))
+        assert chunk_text_by_tokens(text, max_tokens) == _legacy_chunker(text, max_tokens, enc)
+
+
+def test_long_sentence_is_hard_split(toy_tokenizer):
+    sentence = "word " * 50 + "end."
+    chunks = chunk_text_by_tokens("Short one. " + sentence + " Tail.", 20)
+    assert chunks[0] == "Short one."
+    assert chunks[-1] == "Tail."
+    assert len(chunks) > 3
+
+
+def test_chunker_edge_cases():
+    assert chunk_text_by_tokens("   ", 10) == []
+    with pytest.raises(ValueError):
+        chunk_text_by_tokens("text", 0)
+
+
+# ---------- iter_file_chunks (streaming) ----------
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "utf-16", "cp1252"])
+@pytest.mark.parametrize("block_chars", [7, 64, 1 << 20])
+def test_stream_matches_whole_text_chunker(tmp_path, encoding, block_chars):
+    rng = random.Random(block_chars)
+    text = _random_text(rng, 120)
+    if encoding == "cp1252":
+        text = text.replace("—", "-")
+    path = tmp_path / "doc.txt"
+    path.write_bytes(text.encode(encoding))
+
+    chunks = list(iter_file_chunks(path, 25, block_chars=block_chars))
+    assert [c.text for c in chunks] == chunk_text_by_tokens(text, 25)
+
+
+def test_stream_offsets_point_back_into_file(tmp_path):
+    text = "First sentence here.  Second one, café!\r\nThird?\n\n" + "Fourth ends it. " * 40
+    path = tmp_path / "doc.txt"
+    raw = text.encode("utf-8")
+    path.write_bytes(raw)
+
+    chunks = list(iter_file_chunks(path, 60, block_chars=16))
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    token_pos = 0
+    for c in chunks:
+        # The bytes under each chunk are its sentences (whitespace may differ).
+        span = raw[c.byte_start:c.byte_end].decode("utf-8")
+        assert span.split() == c.text.split()
+        assert c.token_start == token_pos
+        token_pos = c.token_end
+    assert chunks[0].byte_start == 0
+    assert chunks[-1].byte_end == len(raw.rstrip())
+
+
+def test_stream_caps_runaway_sentences(tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_text("no punctuation at all " * 500, encoding="utf-8")
+    chunks = list(iter_file_chunks(path, 50, block_chars=100, max_sentence_chars=300))
+    assert chunks
+    assert "".join(c.text for c in chunks).replace(" ", "") == ("no punctuation at all " * 500).replace(" ", "")
+
+
+def test_sniff_encoding():
+    assert sniff_encoding(b"\xef\xbb\xbfhi") == "utf-8-sig"
+    assert sniff_encoding(b"\xff\xfeh\x00") == "utf-16"
+    assert sniff_encoding("café".encode("utf-8")[:-1]) == "utf-8"  # cut mid-character
+    assert sniff_encoding("cafés".encode("cp1252")) == "cp1252"
+
+
+# ---------- sliding_token_windows ----------
+
+
+def test_windows_cover_text_with_overlap(toy_tokenizer):
+    text = "the thing is interesting. " * 20
+    n = len(toy_tokenizer.encode(text))
+    spans = sliding_token_windows(text, 30, overlap=10)
+
+    assert spans[0].start_token == 0
+    assert spans[-1].end_token == n
+    assert spans[-1].char_end == len(text)
+    for prev, cur in zip(spans, spans[1:]):
+        assert cur.start_token - prev.start_token == 20
+        assert prev.end_token - cur.start_token == 10
+    for s in spans:
+        # zero-copy slice == what decoding the window's tokens would give
+        assert text[s.char_start:s.char_end] == toy_tokenizer.decode(toy_tokenizer.encode(text)[s.start_token:s.end_token])
+
+
+def test_windows_with_stride_and_gaps():
+    text = "one two three four five six seven eight nine ten"
+    spans = sliding_token_windows(text, 4, stride=6)
+    assert [s.start_token for s in spans][:2] == [0, 6]
+
+    def ranges(n):   # toy BPE: one token per "x"
+        return [(s.start_token, s.end_token) for s in sliding_token_windows("x" * n, 4, stride=6)]
+
+    assert ranges(5) == [(0, 4), (1, 5)]
+    assert ranges(10) == [(0, 4), (6, 10)]
+    assert ranges(11) == [(0, 4), (6, 10), (7, 11)]
+    assert ranges(12) == [(0, 4), (6, 10), (8, 12)]
+    assert ranges(17) == [(0, 4), (6, 10), (12, 16), (13, 17)]
+    assert ranges(18) == [(0, 4), (6, 10), (12, 16), (14, 18)]
+
+
+def test_windows_multibyte_characters(toy_tokenizer):
+    text = "naïve café ☕ " * 5
+    spans = sliding_token_windows(text, 3, overlap=1)
+    assert spans[-1].char_end == len(text)
+    assert all(0 <= s.char_start <= s.char_end <= len(text) for s in spans)
+
+
+def test_windows_short_text_and_errors():
+    assert sliding_token_windows("", 10) == []
+    assert len(sliding_token_windows("tiny", 10)) == 1
+    with pytest.raises(ValueError):
+        sliding_token_windows("x", 10, overlap=10)
+    with pytest.raises(ValueError):
+        sliding_token_windows("x", 10, overlap=2, stride=3)
+
+
+# ---------- estimate_tokens (approximate) ----------
+
+
+def test_estimator_features():
+    text = "Hello world, 12345 café!\n\nBye"
+    assert estimator_features(text) == (4, 16, 2, 2, 1, 1)
+
+
+def test_estimate_does_not_load_tokenizer(monkeypatch):
+    def boom(model):
+        raise AssertionError("tokenizer should not be loaded")
+    monkeypatch.setattr(tiktoken, "encoding_for_model", boom)
+    monkeypatch.setattr(tiktoken, "get_encoding", boom)
+    token_tools.safe_encoding_for_model.cache_clear()
+
+    n = estimate_tokens("gpt-4o", "The quick brown fox jumps over the lazy dog.")
+    assert 8 <= n <= 12
+    assert estimate_tokens("gpt-4o", "") == 0
+    assert estimate_cost_for_text("gpt-4o-mini", "hello there", 10, approx=True) > 0
+
+
+def test_estimate_exact_switch(toy_tokenizer):
+    text = "the thing is interesting."
+    assert estimate_tokens("gpt-4o", text, exact=True) == len(toy_tokenizer.encode(text))
+
+
+def test_registered_coefficients_and_bound(monkeypatch):
+    monkeypatch.setitem(token_tools._ESTIMATOR, "cl100k_base", token_tools._ESTIMATOR["cl100k_base"])
+    set_estimator_coefficients("cl100k_base", EstimatorCoefficients(
+        words=1, letters=0, digit_groups=0, punct_runs=0, newline_runs=0, non_ascii=0, rel_error=0.1,
+    ))
+    assert estimate_tokens("gpt-4", "one two three") == 3
+    assert estimator_error_bound("gpt-4") == 0.1
+    assert estimator_error_bound("gpt-4o-mini") == 0.195
@@ -4,23 +4,31 @@ Structured JSON Helper:
 - request JSON-only replies from the model (response_format = json_object)
 - validate against a JSON schema (jsonschema library)
 - safe retries for transient errors
+- openai / jsonschema are imported on first use, so importing this module is cheap
 """
 
 from __future__ import annotations
 
 import json
 import time
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-import jsonschema
-import openai as openai_errors  # for exception types
-from openai import OpenAI
+if TYPE_CHECKING:  # type hints only; the SDK is imported lazily below
+    from openai import OpenAI
 
 # --- Config ---
 RETRY_MAX = 2
 RETRY_SLEEP_BASE = 1.0  # seconds
 
-client = OpenAI()
+_client: Optional["OpenAI"] = None
+
+def _client_instance() -> "OpenAI":
+    """Create the OpenAI client the first time it is needed (not at import)."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI()
+    return _client
 
 def _retry_sleep(attempt: int) -> None:
     time.sleep(RETRY_SLEEP_BASE * (2 ** attempt))
@@ -32,9 +40,11 @@ def get_structured_response(
     """
     Ask the model for JSON only. Returns a Python dict (parsed JSON).
     """
+    import openai as openai_errors  # for exception types
+
     for attempt in range(RETRY_MAX + 1):
         try:
-            resp = client.chat.completions.create(
+            resp = _client_instance().chat.completions.create(
                 model=model,
                 messages=[{"role": "user", "content": prompt}],
                 response_format={"type": "json_object"},
@@ -55,6 +65,8 @@ def validate_json(
     """
     Validate data against schema. Raises jsonschema.ValidationError if invalid.
     """
+    import jsonschema
+
     jsonschema.validate(instance=data, schema=schema)
 
 def get_validated_json(
@@ -67,6 +79,8 @@ def get_validated_json(
     Request JSON, then validate. If validation fails, retry a few times
     with a gentle "fix" nudge.
     """
+    import jsonschema
+
     tries = 0
     last_err: Optional[Exception] = None
 
@@ -0,0 +1,219 @@
+# src/analytics/compact_logs.py
+"""
+Year-6 explanation:
+A JSONL log is like a diary: easy to write one line at a time, slow to
+read back because every line has to be read as text again. Once a day is
+over its diary page never changes, so we copy it into a "spreadsheet"
+kind of file that stores each column (tokens, cost, latency ...) on its
+own, already as numbers. We also file the pages in folders by day and by
+model. Then a question like "what did gpt-4o cost last week?" only opens
+the few folders and columns it needs.
+
+Technical notes:
+- Input: closed daily logs as prompt_lab's JsonlSink (rotate="day")
+  writes them: YYYY-MM-DD.jsonl, size-rolled YYYY-MM-DD.N.jsonl, and the
+  .jsonl.gz versions of both (--log-gzip). Today's files are still open
+  and are skipped; so is a file whose gzip copy is still being written
+  (plain and .gz side by side).
+- Output: <out>/day=YYYY-MM-DD/model=<name>/part-<source>.<ext>, one part
+  per source file and partition (<source> = file name without
+  .jsonl/.jsonl.gz, so a file that gets gzipped later replaces its own
+  parts instead of adding a second copy).
+  * Parquet when pyarrow/fastparquet is installed;
+  * otherwise compressed .npz (one NumPy array per column; np.load only
+    decompresses the columns you ask for). Feather needs pyarrow too, so
+    it isn't a separate fallback.
+- Every part stores the same analytics columns (COLUMNS; missing ones as
+  NaN/NaT), so any column subset can be read from any part. model_name
+  lives in the folder name and comes back as a pandas Categorical
+  (dictionary-encoded).
+- _manifest.json remembers which sources were compacted (name, size, mtime),
+  so re-running only converts new or changed files. Parts are written to
+  a temp name and renamed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from cost_dashboard import STREAM_COLUMNS, load_logs
+
+# Columns worth keeping for analytics (model_name is the partition key).
+COLUMNS = ["timestamp", "total_tokens", "latency_s", "cost_usd", "success",
+           "prompt_tokens", "completion_tokens", *STREAM_COLUMNS]
+MANIFEST = "_manifest.json"
+PART_FORMATS = ("parquet", "npz")
+# YYYY-MM-DD[.N].jsonl[.gz] -> groups: source id, day
+_DAILY = re.compile(r"^((\d{4}-\d{2}-\d{2})(?:\.\d+)?)\.jsonl(?:\.gz)?$")
+
+
+def parquet_available() -> bool:
+    for engine in ("pyarrow", "fastparquet"):
+        try:
+            __import__(engine)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+# ---------- Write ----------
+
+def _write_part(df: pd.DataFrame, path: Path, fmt: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "parquet":
+        df.to_parquet(tmp, index=False)
+    else:
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **{c: df[c].to_numpy() for c in df.columns})
+    os.replace(tmp, path)
+
+
+def _columns_for_storage(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    for col in COLUMNS:
+        values = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+        if col == "timestamp":
+            out[col] = pd.to_datetime(values, errors="coerce").astype("datetime64[ns]")
+        elif col == "success":
+            out[col] = values.astype("int8")
+        else:
+            values = pd.to_numeric(values, errors="coerce")
+            # token counts stay int64 unless they have gaps (NaN needs float)
+            whole = col.endswith("_tokens") and values.notna().all()
+            out[col] = values.astype("int64" if whole else "float64")
+    return out.reset_index(drop=True)
+
+
+def compact(
+    log_dir,
+    out_dir,
+    today: Optional[dt.date] = None,
+    fmt: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Convert closed daily JSONL logs in `log_dir` into partitions under
+    `out_dir`. Returns {source file name: rows written} for this run.
+    """
+    log_dir, out_dir = Path(log_dir), Path(out_dir)
+    today = today or dt.date.today()
+    fmt = fmt or ("parquet" if parquet_available() else "npz")
+    manifest_path = out_dir / MANIFEST
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {"sources": {}}
+
+    done: Dict[str, int] = {}
+    names = {p.name for p in log_dir.iterdir()}
+    for src in sorted(log_dir.iterdir()):
+        m = _DAILY.match(src.name)
+        if not m or dt.date.fromisoformat(m.group(2)) >= today:
+            continue   # not a daily log, or the day isn't over yet
+        if src.suffix == ".gz" and src.with_suffix("").name in names:
+            continue   # the sink is still gzipping this one
+        source, file_day = m.groups()
+        st = src.stat()
+        seen = manifest["sources"].get(source)
+        if seen and (seen.get("file"), seen["size"], seen["mtime"]) == (src.name, st.st_size, st.st_mtime):
+            continue
+
+        for ext in PART_FORMATS:   # source changed (or was gzipped): replace its parts
+            for old in out_dir.glob(f"day=*/model=*/part-{source}.{ext}"):
+                old.unlink()
+        df = load_logs(src)
+        day = pd.to_datetime(df["timestamp"], errors="coerce").dt.strftime("%Y-%m-%d") \
+            if "timestamp" in df.columns else pd.Series(file_day, index=df.index)
+        day = day.fillna(file_day)
+        for (d, model), part in df.groupby([day, "model_name"], sort=True):
+            path = out_dir / f"day={d}" / f"model={quote(str(model), safe='')}" / f"part-{source}.{fmt}"
+            _write_part(_columns_for_storage(part), path, fmt)
+
+        manifest["sources"][source] = {"file": src.name, "size": st.st_size, "mtime": st.st_mtime,
+                                       "rows": len(df), "format": fmt}
+        done[src.name] = len(df)
+
+    if done:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = manifest_path.with_name(MANIFEST + ".tmp")
+        tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        os.replace(tmp, manifest_path)
+    return done
+
+
+# ---------- Read ----------
+
+def _partitions(root: Path, since: Optional[str], until: Optional[str], models: Optional[Iterable[str]]):
+    wanted = set(models) if models else None
+    for day_dir in sorted(root.glob("day=*")):
+        day = day_dir.name[len("day="):]
+        if (since and day < since) or (until and day > until):
+            continue
+        for model_dir in sorted(day_dir.glob("model=*")):
+            model = unquote(model_dir.name[len("model="):])
+            if wanted is None or model in wanted:
+                yield model, model_dir
+
+
+def _read_part(path: Path, columns: Sequence[str]) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path, columns=list(columns))
+    with np.load(path) as npz:
+        return pd.DataFrame({c: npz[c] for c in columns})
+
+
+def read_columnar(
+    root,
+    columns: Optional[Sequence[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    models: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Load compacted logs: only partitions in [since, until] (YYYY-MM-DD,
+    inclusive) for `models`, and only `columns`. model_name is categorical.
+    """
+    root = Path(root)
+    columns = [c for c in (columns or COLUMNS) if c != "model_name"]
+    frames: List[pd.DataFrame] = []
+    names: List[str] = []
+    for model, model_dir in _partitions(root, since, until, models):
+        for part in sorted(model_dir.glob("part-*.*")):
+            if part.suffix.lstrip(".") not in PART_FORMATS:
+                continue
+            df = _read_part(part, columns)
+            frames.append(df)
+            names.append(model)
+    if not frames:
+        raise ValueError(f"No compacted logs under {root} for that selection.")
+
+    categories = sorted(set(names))
+    codes = np.repeat([categories.index(n) for n in names], [len(f) for f in frames])
+    df = pd.concat(frames, ignore_index=True)
+    df.insert(0, "model_name", pd.Categorical.from_codes(codes, categories=categories))
+    return df
+
+
+# ---------- CLI ----------
+def main():
+    ap = argparse.ArgumentParser(description="Compact closed daily JSONL logs into columnar partitions.")
+    ap.add_argument("--logs", required=True, help="Folder with YYYY-MM-DD[.N].jsonl[.gz] files")
+    ap.add_argument("--out", default="reports/columnar", help="Output root (day=/model= partitions)")
+    ap.add_argument("--format", choices=list(PART_FORMATS), default=None,
+                    help="Default: parquet if pyarrow/fastparquet is installed, else npz")
+    args = ap.parse_args()
+    done = compact(args.logs, args.out, fmt=args.format)
+    total = sum(done.values())
+    print(f"Compacted {len(done)} file(s), {total} rows → {args.out}" if done else "Nothing new to compact.")
+
+
+if __name__ == "__main__":
+    main()
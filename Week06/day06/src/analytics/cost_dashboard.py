@@ -1,37 +1,61 @@
-﻿import json
+﻿import os
+import gzip
+import json
 import argparse
 from pathlib import Path
 import pandas as pd
-import matplotlib.pyplot as plt
+
+# matplotlib is imported inside the plotting functions: `--no-plots` runs
+# (CI/headless) never load it.
 
 # ---------- Config ----------
 REQUIRED_COLUMNS = ["model_name", "total_tokens", "latency_s", "cost_usd", "success"]
 RENAME_MAP = {"model": "model_name", "tokens": "total_tokens", "latency": "latency_s", "cost": "cost_usd"}
+# Streaming calls also log time-to-first-token + mean inter-token latency.
+# Older logs don't have them, so they're optional (NaN rows are ignored by mean()).
+STREAM_COLUMNS = ["ttft_s", "itl_s"]
 
 # ---------- Load ----------
+def _parse_line(line: str):
+    # Files saved by some (Windows) editors start with a BOM
+    line = line.lstrip("\ufeff").strip()
+    return json.loads(line) if line else None
+
 def load_logs(path="logs/prompt_logs.jsonl") -> pd.DataFrame:
     fp = Path(path)
     if not fp.exists():
         raise FileNotFoundError(f"Log file not found: {fp}")
 
     records = []
-    with fp.open("r", encoding="utf-8") as f:
+    opener = gzip.open if fp.suffix == ".gz" else open   # rotated logs may be gzipped
+    with opener(fp, "rt", encoding="utf-8") as f:
         for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            records.append(json.loads(line))
+            record = _parse_line(line)
+            if record is not None:
+                records.append(record)
 
     if not records:
         raise ValueError("Log file is empty.")
 
-    df = pd.DataFrame(records)
+    return normalize(pd.DataFrame(records))
 
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename variant columns, check required ones, fix dtypes, drop broken rows."""
     # Rename variant column names if present
     available_renames = {k: v for k, v in RENAME_MAP.items() if k in df.columns}
     if available_renames:
         df = df.rename(columns=available_renames)
 
+    # prompt_lab / JsonlSink logs say status="ok" instead of success=true;
+    # api_error entries carry no tokens/cost and build_error entries not even
+    # a model or latency (a batch may hold nothing else)
+    if "success" not in df.columns and "status" in df.columns:
+        df["success"] = df["status"] == "ok"
+        for col in ["model_name", "total_tokens", "latency_s", "cost_usd"]:
+            if col not in df.columns:
+                df[col] = float("nan")
+        df = df[df["model_name"].notna()].copy()
+
     # Validate required columns
     missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
     if missing:
@@ -41,28 +65,44 @@ def load_logs(path="logs/prompt_logs.jsonl") -> pd.DataFrame:
     df["model_name"] = df["model_name"].astype(str)
     for num_col in ["total_tokens", "latency_s", "cost_usd"]:
         df[num_col] = pd.to_numeric(df[num_col], errors="coerce")
+    for num_col in STREAM_COLUMNS:
+        if num_col in df.columns:
+            df[num_col] = pd.to_numeric(df[num_col], errors="coerce")
     df["success"] = df["success"].astype(int)
 
+    # A failed call used no tokens and cost nothing; keep it so it counts as a failure
+    failed = df["success"] == 0
+    df.loc[failed, ["total_tokens", "cost_usd"]] = df.loc[failed, ["total_tokens", "cost_usd"]].fillna(0)
+
     # Drop rows with NaNs in numeric fields
     df = df.dropna(subset=["total_tokens", "latency_s", "cost_usd"])
 
+    # NaNs above made token counts float; they are whole numbers again now
+    if (df["total_tokens"] % 1 == 0).all():
+        df["total_tokens"] = df["total_tokens"].astype("int64")
+
     return df
 
 # ---------- Analyze ----------
 def analyze(df: pd.DataFrame) -> pd.DataFrame:
-    counts = df.groupby("model_name").size().rename("requests")
+    # observed=True: model_name may be categorical (columnar logs)
+    counts = df.groupby("model_name", observed=True).size().rename("requests")
 
-    agg = df.groupby("model_name").agg(
+    agg = df.groupby("model_name", observed=True).agg(
         total_tokens=("total_tokens", "sum"),
         cost_usd=("cost_usd", "sum"),
         latency_s=("latency_s", "mean"),
         success=("success", "mean"),
         avg_tokens_per_request=("total_tokens", "mean"),
         avg_cost_per_request=("cost_usd", "mean"),
+        **{c: (c, "mean") for c in STREAM_COLUMNS if c in df.columns},
     )
 
     summary = agg.join(counts, how="left").reset_index()
+    return _finish_summary(summary)
 
+def _finish_summary(summary: pd.DataFrame) -> pd.DataFrame:
+    """Shared by analyze() and the incremental path: derived columns + order."""
     def _cps(row):
         return (row["cost_usd"] / row["success"]) if row["success"] > 0 else float("inf")
 
@@ -72,15 +112,146 @@ def analyze(df: pd.DataFrame) -> pd.DataFrame:
         "model_name", "requests",
         "total_tokens", "avg_tokens_per_request",
         "cost_usd", "avg_cost_per_request",
-        "latency_s", "success", "cost_per_success"
+        "latency_s", *[c for c in STREAM_COLUMNS if c in summary.columns],
+        "success", "cost_per_success"
     ]
     summary = summary[cols]
     summary = summary.sort_values(by=["cost_per_success", "latency_s"], ascending=[True, True])
 
     return summary
 
+# ---------- Incremental ingestion ----------
+# Instead of re-reading every log on every run, remember per file how far we
+# got (byte offset) and keep running totals per model. Each refresh then only
+# parses the lines added since. Files are keyed by identity (device + inode),
+# not by name, so a log renamed by rotation (log.jsonl -> log.1.jsonl) resumes
+# where it was instead of being counted again.
+STATE_VERSION = 2
+HEAD_BYTES = 64   # first bytes of a file: tells a reused inode from the same file
+SUM_FIELDS = ["requests", "total_tokens", "cost_usd", "latency_s", "success"]   # running SUMS per model
+
+def _log_files(path) -> list:
+    """A .jsonl file, or every *.jsonl in a folder (e.g. daily prompt logs)."""
+    fp = Path(path)
+    if fp.is_dir():
+        return sorted(fp.glob("*.jsonl"))
+    if not fp.exists():
+        raise FileNotFoundError(f"Log file not found: {fp}")
+    return [fp]
+
+def load_state(state_path) -> dict:
+    fp = Path(state_path)
+    if fp.exists():
+        state = json.loads(fp.read_text(encoding="utf-8"))
+        if state.get("version") == STATE_VERSION:
+            return state
+    return {"version": STATE_VERSION, "files": {}, "models": {}}
+
+def save_state(state: dict, state_path) -> None:
+    # Write-then-rename: a crash mid-save leaves the old state, never half a file.
+    fp = Path(state_path)
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    tmp = fp.with_name(fp.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=1), encoding="utf-8")
+    os.replace(tmp, fp)
+
+def _file_key(st) -> str:
+    return f"{st.st_dev}:{st.st_ino}"
+
+def _read_new_lines(fp: Path, seen: dict):
+    """
+    Lines added since `seen` (offset/size/head). Returns (records, new seen).
+    A file smaller than our offset, or whose first bytes changed (inode
+    reused by another file), is read from 0. A half-written last line is
+    left for the next run.
+    """
+    st = fp.stat()
+    offset = seen.get("offset", 0)
+    with fp.open("rb") as f:
+        head = f.read(HEAD_BYTES)
+        if st.st_size < offset or not head.startswith(bytes.fromhex(seen.get("head", ""))):
+            offset = 0
+        f.seek(offset)
+        chunk = f.read(st.st_size - offset)
+    end = chunk.rfind(b"\n") + 1
+    records = [r for r in map(_parse_line, chunk[:end].decode("utf-8").splitlines()) if r is not None]
+    return records, {"path": str(fp.resolve()), "size": st.st_size, "offset": offset + end, "head": head.hex()}
+
+def _merge(models: dict, df: pd.DataFrame) -> None:
+    """Add one batch of normalized rows to the per-model running totals."""
+    df = df.assign(requests=1)
+    sums = df.groupby("model_name")[SUM_FIELDS].sum()
+    extra = {}
+    for col in STREAM_COLUMNS:
+        if col in df.columns:
+            extra[col] = df.groupby("model_name")[col].agg(["sum", "count"])
+    for model in sums.index:
+        totals = models.setdefault(model, {k: 0 for k in SUM_FIELDS})
+        for k in SUM_FIELDS:
+            totals[k] += sums.at[model, k].item()   # ints stay ints (token counts)
+        for col, stats in extra.items():
+            if model in stats.index and stats.at[model, "count"]:
+                totals[f"{col}_sum"] = totals.get(f"{col}_sum", 0.0) + float(stats.at[model, "sum"])
+                totals[f"{col}_n"] = totals.get(f"{col}_n", 0) + int(stats.at[model, "count"])
+
+def summary_from_state(state: dict) -> pd.DataFrame:
+    """Same table as analyze(), built from the running totals."""
+    rows = []
+    for model, t in state["models"].items():
+        n = t["requests"]
+        row = {
+            "model_name": model, "requests": int(n),
+            "total_tokens": t["total_tokens"], "avg_tokens_per_request": t["total_tokens"] / n,
+            "cost_usd": t["cost_usd"], "avg_cost_per_request": t["cost_usd"] / n,
+            "latency_s": t["latency_s"] / n, "success": t["success"] / n,
+        }
+        for col in STREAM_COLUMNS:
+            if any(f"{col}_n" in m for m in state["models"].values()):
+                row[col] = t[f"{col}_sum"] / t[f"{col}_n"] if t.get(f"{col}_n") else float("nan")
+        rows.append(row)
+    if not rows:
+        raise ValueError("No log records ingested yet.")
+    return _finish_summary(pd.DataFrame(rows))
+
+def ingest(log_path, state_path="reports/dashboard_state.json") -> pd.DataFrame:
+    """
+    Incremental load + analyze: parse only lines added since the last run,
+    fold them into the saved per-model totals and return the summary.
+    """
+    state = load_state(state_path)
+    new_rows = 0
+    files = {}
+    for fp in _log_files(log_path):
+        key = _file_key(fp.stat())
+        records, seen = _read_new_lines(fp, state["files"].get(key, {}))
+        if records:
+            df = normalize(pd.DataFrame(records))
+            _merge(state["models"], df)
+            new_rows += len(df)
+        files[key] = seen
+    state["files"] = files   # forget files that are gone
+    save_state(state, state_path)
+    print(f"Ingested {new_rows} new log rows → {state_path}")
+    return summary_from_state(state)
+
+# ---------- Columnar (compacted) logs ----------
+ANALYZE_COLUMNS = ["total_tokens", "latency_s", "cost_usd", "success", *STREAM_COLUMNS]
+
+def load_columnar(root, since=None, until=None, models=None) -> pd.DataFrame:
+    """
+    Read logs compacted by compact_logs.py: only the day/model partitions
+    asked for and only the columns analyze() uses.
+    """
+    from compact_logs import read_columnar
+
+    df = read_columnar(root, columns=ANALYZE_COLUMNS, since=since, until=until, models=models)
+    empty = [c for c in STREAM_COLUMNS if df[c].isna().all()]
+    return df.drop(columns=empty)
+
 # ---------- Visualize ----------
 def plot_bar(df, x, y, title, ylabel):
+    import matplotlib.pyplot as plt
+
     plt.figure()
     plt.bar(df[x], df[y])
     plt.title(title)
@@ -90,9 +261,6 @@ def plot_bar(df, x, y, title, ylabel):
     plt.tight_layout()
     plt.show()
 
-# --- Add near the top if not already imported ---
-import matplotlib.pyplot as plt
-
 def _as_percent(series):
     """Convert success rate from 0..1 to 0..100 for display only."""
     return (series.astype(float) * 100.0)
@@ -102,7 +270,10 @@ def visualize(summary: pd.DataFrame):
     Shows:
       - Avg Cost per Request (single bar chart)
       - Side-by-side: Avg Latency (s) and Success Rate (%)
+      - Avg Time to First Token (s), if the logs have streaming timings
     """
+    import matplotlib.pyplot as plt
+
     # --- 1) Average Cost per Request (single chart) ---
     plt.figure()
     plt.bar(summary["model_name"], summary["avg_cost_per_request"])
@@ -134,6 +305,11 @@ def visualize(summary: pd.DataFrame):
     plt.tight_layout()
     plt.show()
 
+    # --- 3) Time to first token (streamed calls only) ---
+    if "ttft_s" in summary.columns and summary["ttft_s"].notna().any():
+        streamed = summary.dropna(subset=["ttft_s"])
+        plot_bar(streamed, "model_name", "ttft_s", "Avg Time to First Token by Model", "Seconds")
+
 
 def save_report(summary: pd.DataFrame, out_csv="reports/model_cost_report.csv"):
     out_path = Path(out_csv)
@@ -147,12 +323,25 @@ def parse_args():
     p.add_argument("--log", default="logs/prompt_logs.jsonl", help="Path to JSONL logs")
     p.add_argument("--out", default="reports/model_cost_report.csv", help="Output CSV path")
     p.add_argument("--no-plots", action="store_true", help="Skip plots (for CI/headless)")
+    p.add_argument("--incremental", action="store_true",
+                   help="Only parse lines added since the last run (state in --state); --log may be a folder")
+    p.add_argument("--state", default="reports/dashboard_state.json", help="Checkpoint file for --incremental")
+    p.add_argument("--columnar", default=None,
+                   help="Read compacted logs from this folder (see compact_logs.py) instead of --log")
+    p.add_argument("--since", default=None, help="--columnar: first day, YYYY-MM-DD")
+    p.add_argument("--until", default=None, help="--columnar: last day, YYYY-MM-DD")
+    p.add_argument("--models", default="", help="--columnar: comma-separated models (default: all)")
     return p.parse_args()
 
 def main():
     args = parse_args()
-    df = load_logs(args.log)
-    summary = analyze(df)
+    if args.columnar:
+        models = [m.strip() for m in args.models.split(",") if m.strip()] or None
+        summary = analyze(load_columnar(args.columnar, args.since, args.until, models))
+    elif args.incremental:
+        summary = ingest(args.log, args.state)
+    else:
+        summary = analyze(load_logs(args.log))
     print("\n=== Model Cost & Performance Summary ===")
     print(summary.to_string(index=False))
     save_report(summary, args.out)
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Make src/analytics importable so 'import cost_dashboard' works
+ANALYTICS = Path(__file__).resolve().parents[1] / "src" / "analytics"
+if str(ANALYTICS) not in sys.path:
+    sys.path.insert(0, str(ANALYTICS))
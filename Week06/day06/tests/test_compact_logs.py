@@ -0,0 +1,117 @@
+import datetime as dt
+import gzip
+import json
+import shutil
+
+import pandas as pd
+import pytest
+
+import compact_logs as cl
+import cost_dashboard as cd
+
+
+def _row(ts, model, tokens, latency, cost, success=True):
+    return {"timestamp": ts, "model_name": model, "total_tokens": tokens,
+            "latency_s": latency, "cost_usd": cost, "success": success}
+
+
+DAYS = {
+    "2025-01-01": [_row("2025-01-01T09:00:00", "gpt-4o-mini", 120, 1.2, 0.0003),
+                   _row("2025-01-01T10:00:00", "gpt-4o", 640, 5.0, 0.0064)],
+    "2025-01-02": [_row("2025-01-02T09:00:00", "gpt-4o-mini", 135, 1.1, 0.00033, success=False),
+                   _row("2025-01-02T11:00:00", "gpt-4o", 610, 4.7, 0.0061),
+                   _row("2025-01-02T12:00:00", "gpt-4o/test", 5, 0.1, 0.0)],
+    "2025-01-03": [_row("2025-01-03T09:00:00", "gpt-4o", 1, 1.0, 0.1)],   # "today": still open
+}
+TODAY = dt.date(2025, 1, 3)
+
+
+@pytest.fixture
+def logs(tmp_path):
+    folder = tmp_path / "logs"
+    folder.mkdir()
+    for day, rows in DAYS.items():
+        (folder / f"{day}.jsonl").write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    (folder / "notes.jsonl").write_text("", encoding="utf-8")         # not a daily log
+    return folder
+
+
+def test_compacts_closed_days_into_partitions_once(logs, tmp_path):
+    out = tmp_path / "columnar"
+    assert cl.compact(logs, out, today=TODAY, fmt="npz") == {"2025-01-01.jsonl": 2, "2025-01-02.jsonl": 3}
+
+    parts = sorted(p.relative_to(out).as_posix() for p in out.glob("day=*/model=*/*"))
+    assert parts == [
+        "day=2025-01-01/model=gpt-4o-mini/part-2025-01-01.npz",
+        "day=2025-01-01/model=gpt-4o/part-2025-01-01.npz",
+        "day=2025-01-02/model=gpt-4o%2Ftest/part-2025-01-02.npz",
+        "day=2025-01-02/model=gpt-4o-mini/part-2025-01-02.npz",
+        "day=2025-01-02/model=gpt-4o/part-2025-01-02.npz",
+    ]
+    assert cl.compact(logs, out, today=TODAY, fmt="npz") == {}
+
+    with open(logs / "2025-01-01.jsonl", "a", encoding="utf-8") as f:   # late write to a closed day
+        f.write(json.dumps(_row("2025-01-01T23:59:00", "gpt-4o", 10, 1.0, 0.01)) + "\n")
+    assert cl.compact(logs, out, today=TODAY, fmt="npz") == {"2025-01-01.jsonl": 3}
+    assert len(cl.read_columnar(out, until="2025-01-01")) == 3
+
+
+def test_rolled_and_gzipped_sources_one_part_each(logs, tmp_path):
+    out = tmp_path / "columnar"
+    rows = DAYS["2025-01-01"]
+    (logs / "2025-01-01.jsonl").unlink()
+    with gzip.open(logs / "2025-01-01.jsonl.gz", "wt", encoding="utf-8") as f:   # --log-gzip day roll
+        f.write(json.dumps(rows[0]) + "\n")
+    (logs / "2025-01-01.1.jsonl").write_text(json.dumps(rows[1]) + "\n", encoding="utf-8")   # size roll
+    with gzip.open(logs / "2025-01-02.jsonl.gz", "wb") as f:                     # gzip still in progress
+        f.write(b'{"model_name": "gpt-4o", "tot')
+
+    assert cl.compact(logs, out, today=TODAY, fmt="npz") == \
+        {"2025-01-01.1.jsonl": 1, "2025-01-01.jsonl.gz": 1, "2025-01-02.jsonl": 3}
+    assert len(cl.read_columnar(out)) == 5
+
+    for plain in ("2025-01-01.1.jsonl", "2025-01-02.jsonl"):                   # the sink finishes gzipping
+        with open(logs / plain, "rb") as src, gzip.open(logs / f"{plain}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        (logs / plain).unlink()
+    assert cl.compact(logs, out, today=TODAY, fmt="npz") == {"2025-01-01.1.jsonl.gz": 1, "2025-01-02.jsonl.gz": 3}
+    assert len(cl.read_columnar(out)) == 5
+    assert sorted(p.name for p in out.glob("day=2025-01-01/model=gpt-4o/*")) == ["part-2025-01-01.1.npz"]
+
+
+def test_parquet_parts_round_trip(logs, tmp_path):
+    pytest.importorskip("pyarrow")
+    out = tmp_path / "columnar"
+    cl.compact(logs, out, today=TODAY, fmt="parquet")
+    assert {p.suffix for p in out.glob("day=*/model=*/*")} == {".parquet"}
+    df = cl.read_columnar(out, columns=["total_tokens", "success"], models=["gpt-4o"])
+    assert list(df.columns) == ["model_name", "total_tokens", "success"]
+    assert df["total_tokens"].tolist() == [640, 610]
+
+
+def test_read_prunes_partitions_and_columns(logs, tmp_path):
+    out = tmp_path / "columnar"
+    cl.compact(logs, out, today=TODAY, fmt="npz")
+
+    df = cl.read_columnar(out, columns=["cost_usd"], since="2025-01-02", models=["gpt-4o", "gpt-4o/test"])
+    assert list(df.columns) == ["model_name", "cost_usd"]
+    assert isinstance(df["model_name"].dtype, pd.CategoricalDtype)
+    assert sorted(df["model_name"].astype(str)) == ["gpt-4o", "gpt-4o/test"]
+    assert df["cost_usd"].sum() == pytest.approx(0.0061)
+
+    with pytest.raises(ValueError):
+        cl.read_columnar(out, since="2025-02-01")
+
+
+def test_dashboard_summary_matches_jsonl(logs, tmp_path):
+    out = tmp_path / "columnar"
+    cl.compact(logs, out, today=TODAY, fmt="npz")
+
+    from_jsonl = cd.analyze(pd.concat([cd.load_logs(logs / f"{d}.jsonl") for d in ("2025-01-01", "2025-01-02")]))
+    from_columnar = cd.analyze(cd.load_columnar(out))
+    pd.testing.assert_frame_equal(
+        from_columnar.assign(model_name=from_columnar["model_name"].astype(str)).reset_index(drop=True),
+        from_jsonl.reset_index(drop=True),
+        check_dtype=False,
+    )
+    assert from_columnar["total_tokens"].dtype == "int64"
@@ -0,0 +1,117 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import cost_dashboard as cd
+
+
+def _row(model, tokens, latency, cost, success=True, **extra):
+    return {"model_name": model, "total_tokens": tokens, "latency_s": latency,
+            "cost_usd": cost, "success": success, **extra}
+
+
+def _append(path, rows, tail=""):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r) + "\n" for r in rows) + tail)
+
+
+ROWS = [
+    _row("gpt-4o-mini", 120, 1.2, 0.0003),
+    _row("gpt-4o", 640, 5.0, 0.0064, ttft_s=0.4, itl_s=0.02),
+    _row("gpt-4o-mini", 135, 1.1, 0.00033, success=False),
+    _row("gpt-4o", 610, 4.7, 0.0061),
+]
+
+
+def _same(a, b):
+    pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False)
+
+
+def test_incremental_matches_full_and_reads_only_new_lines(tmp_path):
+    log, state = tmp_path / "prompt_logs.jsonl", tmp_path / "state.json"
+    log.write_text("﻿", encoding="utf-8")                     # BOM, like the sample log
+    _append(log, ROWS[:2])
+    _same(cd.ingest(log, state), cd.analyze(cd.load_logs(log)))
+
+    _append(log, ROWS[2:], tail='{"model_name": "gpt-4o", "total_')   # half-written line
+    summary = cd.ingest(log, state)
+    assert summary["requests"].sum() == 4
+    (seen,) = json.loads(state.read_text())["files"].values()
+    assert seen["offset"] < log.stat().st_size
+
+    with open(log, "a", encoding="utf-8") as f:                    # writer finishes the line
+        f.write('tokens": 1, "latency_s": 1, "cost_usd": 0, "success": true}\n')
+    summary = cd.ingest(log, state)
+    _same(summary, cd.analyze(cd.load_logs(log)))
+    assert summary.set_index("model_name").at["gpt-4o", "ttft_s"] == pytest.approx(0.4)
+
+
+def test_rotated_or_truncated_file_is_read_from_start(tmp_path):
+    logs, state = tmp_path / "logs", tmp_path / "state.json"
+    logs.mkdir()
+    log = logs / "2025-01-01.jsonl"
+    _append(log, ROWS[:2])
+    cd.ingest(logs, state)
+
+    os.replace(log, tmp_path / "archived.jsonl")                    # rotated away...
+    _append(log, [ROWS[0]])                                         # ...new file, same name
+    _append(logs / "2025-01-02.jsonl", [ROWS[2]])
+    summary = cd.ingest(logs, state).set_index("model_name")
+    assert summary.at["gpt-4o-mini", "requests"] == 3
+    assert summary.at["gpt-4o", "requests"] == 1
+
+
+def test_file_renamed_in_folder_resumes_from_its_offset(tmp_path):
+    logs, state = tmp_path / "logs", tmp_path / "state.json"
+    logs.mkdir()
+    log = logs / "log.jsonl"
+    _append(log, ROWS[:3])
+    cd.ingest(logs, state)
+
+    os.replace(log, logs / "log.1.jsonl")                           # JsonlSink-style size roll
+    _append(log, [ROWS[3]])
+    summary = cd.ingest(logs, state)
+    assert summary["requests"].sum() == 4
+    _append(logs / "log.1.jsonl", [ROWS[0]])                        # late line in the rolled file
+    assert cd.ingest(logs, state)["requests"].sum() == 5
+
+
+def test_state_survives_restart_and_no_new_lines(tmp_path):
+    log, state = tmp_path / "log.jsonl", tmp_path / "state.json"
+    _append(log, ROWS)
+    first = cd.ingest(log, state)
+    again = cd.ingest(log, state)
+    _same(first, again)
+    assert not (tmp_path / "state.json.tmp").exists()
+
+
+def test_prompt_lab_failures_are_counted(tmp_path):
+    log = tmp_path / "2025-01-01.jsonl"
+    _append(log, [
+        {"id": "a", "model": "gpt-4o-mini", "status": "ok", "latency_s": 0.8, "tokens": 50, "cost_usd": 0.0001},
+        {"id": "b", "model": "gpt-4o-mini", "status": "api_error", "latency_s": 2.0, "error": "HTTP 500"},
+        {"id": "c", "status": "build_error", "error": "bad template"},
+    ])
+    row = cd.analyze(cd.load_logs(log)).iloc[0]
+    assert (row["model_name"], row["requests"], row["success"]) == ("gpt-4o-mini", 2, 0.5)
+    assert (row["total_tokens"], row["cost_usd"]) == (50, 0.0001)
+
+
+def test_ingest_survives_a_batch_of_only_build_errors(tmp_path):
+    log, state = tmp_path / "2025-01-01.jsonl", tmp_path / "state.json"
+    ok = {"id": "a", "model": "gpt-4o-mini", "status": "ok", "latency_s": 0.8, "tokens": 20, "cost_usd": 0.0001}
+    _append(log, [ok])
+    cd.ingest(log, state)
+
+    _append(log, [{"id": "b", "status": "build_error", "error": "bad template"}] * 2)
+    summary = cd.ingest(log, state)
+    assert summary["requests"].sum() == 1
+    (seen,) = json.loads(state.read_text())["files"].values()
+    assert seen["offset"] == log.stat().st_size                     # checkpoint moved past them
+
+    _append(log, [ok, {"id": "c", "model": "gpt-4o-mini", "status": "api_error", "latency_s": 2.0}])
+    row = cd.ingest(log, state).iloc[0]
+    assert (row["requests"], row["success"]) == (3, 2 / 3)
+    assert isinstance(json.loads(state.read_text())["models"]["gpt-4o-mini"]["total_tokens"], int)
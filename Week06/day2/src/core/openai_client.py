@@ -1,20 +1,24 @@
-import os, time, logging
+import os, sys, time, logging
+from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
-from dotenv import load_dotenv
-from openai import OpenAI, OpenAIError
 
-load_dotenv()
+# dotenv + the OpenAI SDK are imported inside OpenAIClient, so importing this
+# module (e.g. for `prompt_runner --help` or `--dry-run`) stays cheap.
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-# Adjust pricing if your account shows different rates.
-# Prices are USD per 1K tokens (input/output).
-PRICING = {
-    "gpt-4o":       {"in": 0.005,   "out": 0.015},
-    "gpt-4o-mini":  {"in": 0.00015, "out": 0.00060},
-}
+# Prices come from the shared, dated registry (Week06/src/pricing.py).
+_WEEK_SRC = Path(__file__).resolve().parents[3] / "src"
+if str(_WEEK_SRC) not in sys.path:
+    sys.path.append(str(_WEEK_SRC))
+
+import pricing
 
 class OpenAIClient:
     def __init__(self, api_key: Optional[str] = None, timeout: int = 30):
+        from dotenv import load_dotenv
+        from openai import OpenAI
+
+        load_dotenv()
         api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY is not set in environment/.env")
@@ -25,14 +29,15 @@ class OpenAIClient:
         self.last_usage: Optional[int] = None
         self.last_cost: Optional[float] = None
         self.last_token_counts: Optional[Dict[str, int]] = None
+        self.last_ttft_s: Optional[float] = None   # stream=True only: time to first token
+        self.last_itl_s: Optional[float] = None    # stream=True only: mean gap between tokens
 
     def _calc_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
-        price = PRICING.get(model, PRICING["gpt-4o-mini"])
-        inp = (prompt_tokens / 1000.0) * price["in"]
-        out = (completion_tokens / 1000.0) * price["out"]
-        return inp + out
+        return pricing.cost_usd(model, prompt_tokens, completion_tokens)
 
     def _retry(self, func, *args, retries=3, delay=1, **kwargs):
+        from openai import OpenAIError
+
         for i in range(retries):
             try:
                 return func(*args, **kwargs)
@@ -48,11 +53,15 @@ class OpenAIClient:
         temperature: float = 0.7,
         top_p: float = 0.9,
         max_tokens: int = 300,
+        stream: bool = False,
     ) -> str:
         """Send a chat completion request. Returns assistant text.
-        Side effects: sets last_usage, last_cost, last_token_counts.
+        Side effects: sets last_usage, last_cost, last_token_counts, and with
+        stream=True also last_ttft_s / last_itl_s (the answer is streamed and
+        timed as it arrives; usage comes from the final chunk).
         """
         start = time.perf_counter()
+        extra = {"stream": True, "stream_options": {"include_usage": True}} if stream else {}
         resp = self._retry(
             self.client.chat.completions.create,
             model=model,
@@ -61,13 +70,19 @@ class OpenAIClient:
             top_p=top_p,
             max_tokens=max_tokens,
             timeout=self.timeout,
+            **extra,
         )
+        if stream:
+            text, usage, self.last_ttft_s, self.last_itl_s = self._read_stream(resp, start)
+        else:
+            text, usage = resp.choices[0].message.content, resp.usage
+            self.last_ttft_s = self.last_itl_s = None
         latency = time.perf_counter() - start
 
         # Usage
-        prompt_tokens = getattr(resp.usage, "prompt_tokens", None) or 0
-        completion_tokens = getattr(resp.usage, "completion_tokens", None) or 0
-        total_tokens = getattr(resp.usage, "total_tokens", None) or (prompt_tokens + completion_tokens)
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        total_tokens = getattr(usage, "total_tokens", None) or (prompt_tokens + completion_tokens)
 
         cost = self._calc_cost(model, prompt_tokens, completion_tokens)
 
@@ -79,10 +94,30 @@ class OpenAIClient:
             "total_tokens": total_tokens,
         }
 
+        timing = f" | ttft={self.last_ttft_s:.3f}s" if self.last_ttft_s is not None else ""
         logging.info(
             f"Model={model} | temp={temperature} top_p={top_p} max_tokens={max_tokens} | "
             f"tokens: in={prompt_tokens} out={completion_tokens} total={total_tokens} | "
-            f"cost=${cost:.6f} | latency={latency:.2f}s"
+            f"cost=${cost:.6f} | latency={latency:.2f}s{timing}"
         )
 
-        return resp.choices[0].message.content
+        return text
+
+    @staticmethod
+    def _read_stream(chunks, start: float) -> Tuple[str, Any, Optional[float], Optional[float]]:
+        """Collect a streamed answer: (text, usage, ttft_s, itl_s)."""
+        parts: List[str] = []
+        usage = None
+        first = last = None
+        for chunk in chunks:
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            piece = chunk.choices[0].delta.content
+            if piece:
+                last = time.perf_counter()
+                first = first or last
+                parts.append(piece)
+        ttft = None if first is None else first - start
+        itl = (last - first) / (len(parts) - 1) if len(parts) > 1 else None
+        return "".join(parts), usage, ttft, itl
@@ -0,0 +1,245 @@
+# src/prompt_lab/batch.py
+"""
+Year-6 explanation:
+Normally we ask the model one question and wait by the phone for the
+answer. For a test suite nobody is waiting by the phone, so we can post
+all the questions in one envelope instead (the "Batch API"): it's half
+price and has its own, bigger quota. We write every request into one
+JSONL file, hand it in, check back every so often, and when the answers
+arrive we file each one under its test, just like a normal run.
+
+Technical notes:
+- Request file = OpenAI batch format: one line per test with
+  custom_id, method, url=/v1/chat/completions and the request body.
+  custom_id is "<slot>:<test id>" so duplicate test ids still join back.
+- Backends are pluggable (submit / status / results):
+  * OpenAIBatchBackend: Files + Batches API (SDK imported lazily).
+  * LocalBatchBackend: a folder on disk that "completes" the batch with a
+    deterministic mock answer; for tests and offline practice.
+- Costs come from the shared pricing registry times the backend's
+  `discount` (0.5 = batch price). Per-test latency is unknown for a
+  batch, so each entry gets the batch turnaround time.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pricing
+
+LOGGER = logging.getLogger("prompt_runner")
+
+ENDPOINT = "/v1/chat/completions"
+DONE_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+# ---------- Request file ----------
+
+def _custom_id(slot: int, test_id: Any) -> str:
+    return f"{slot}:{test_id}"
+
+
+def write_batch_file(jobs: List[Tuple[int, Dict[str, Any]]], path: Path) -> Path:
+    """One chat-completions request per (slot, job); returns the file path."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for slot, job in jobs:
+            body = {k: job[k] for k in ("model", "messages", "temperature", "top_p", "max_tokens")}
+            line = {"custom_id": _custom_id(slot, job["id"]), "method": "POST", "url": ENDPOINT, "body": body}
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return path
+
+
+# ---------- Backends ----------
+
+class OpenAIBatchBackend:
+    """The real Batch API (50% cheaper, results within the completion window)."""
+
+    discount = 0.5
+
+    def __init__(self, client: Any = None, completion_window: str = "24h"):
+        if client is None:
+            from dotenv import load_dotenv
+            from openai import OpenAI
+
+            load_dotenv()
+            client = OpenAI()
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, path: Path) -> str:
+        with open(path, "rb") as f:
+            upload = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id, endpoint=ENDPOINT, completion_window=self.completion_window
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _mock_answer(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Deterministic stand-in completion (word counts as token counts)."""
+    prompt = body["messages"][-1]["content"]
+    content = f"[BATCH] {prompt}"
+    prompt_tokens = sum(len(m["content"].split()) for m in body["messages"])
+    completion_tokens = len(content.split())
+    return {
+        "object": "chat.completion",
+        "model": body["model"],
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+class LocalBatchBackend:
+    """
+    File-system stand-in: root/<batch_id>/input.jsonl -> output.jsonl.
+    The batch reports "in_progress" for `polls_until_done` status checks,
+    then answers every request with `responder(body)` (a chat.completion
+    dict; raise to make that request fail).
+    """
+
+    discount = 0.5
+
+    def __init__(
+        self,
+        root: Path,
+        responder: Callable[[Dict[str, Any]], Dict[str, Any]] = _mock_answer,
+        polls_until_done: int = 1,
+    ):
+        self.root = Path(root)
+        self.responder = responder
+        self.polls_until_done = polls_until_done
+        self._polls: Dict[str, int] = {}
+
+    def submit(self, path: Path) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex[:12]}"
+        folder = self.root / batch_id
+        folder.mkdir(parents=True)
+        shutil.copyfile(path, folder / "input.jsonl")
+        self._polls[batch_id] = 0
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        folder = self.root / batch_id
+        if (folder / "output.jsonl").exists():
+            return "completed"
+        self._polls[batch_id] = self._polls.get(batch_id, 0) + 1
+        if self._polls[batch_id] <= self.polls_until_done:
+            return "in_progress"
+        self._complete(folder)
+        return "completed"
+
+    def _complete(self, folder: Path) -> None:
+        lines = []
+        with open(folder / "input.jsonl", encoding="utf-8") as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                req = json.loads(raw)
+                try:
+                    out = {"custom_id": req["custom_id"], "error": None,
+                           "response": {"status_code": 200, "body": self.responder(req["body"])}}
+                except Exception as e:
+                    out = {"custom_id": req["custom_id"], "response": None,
+                           "error": {"code": "local_error", "message": str(e)}}
+                lines.append(json.dumps(out, ensure_ascii=False) + "\n")
+        tmp = folder / "output.jsonl.tmp"
+        tmp.write_text("".join(lines), encoding="utf-8")
+        tmp.replace(folder / "output.jsonl")
+
+    def results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        with open(self.root / batch_id / "output.jsonl", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+# ---------- Submit, poll, join ----------
+
+def _entry(job: Dict[str, Any], result: Dict[str, Any], batch_id: str,
+           latency: float, discount: float) -> Dict[str, Any]:
+    """One batch result -> the same log entry shape as a live call."""
+    base = {k: job[k] for k in ("id", "model", "temperature", "top_p", "max_tokens")}
+    base.update(latency_s=latency, timestamp=datetime.datetime.now().isoformat(), batch_id=batch_id)
+
+    response = result.get("response") or {}
+    body = response.get("body") or {}
+    if result.get("error") or response.get("status_code") != 200:
+        error = result.get("error") or body.get("error") or f"HTTP {response.get('status_code')}"
+        return {**base, "status": "api_error", "error": json.dumps(error) if isinstance(error, dict) else str(error)}
+
+    usage = body.get("usage") or {}
+    prompt_tokens = usage.get("prompt_tokens") or 0
+    completion_tokens = usage.get("completion_tokens") or 0
+    total_tokens = usage.get("total_tokens") or prompt_tokens + completion_tokens
+    cost = pricing.cost_usd(job["model"], prompt_tokens, completion_tokens) * discount
+    return {
+        **base,
+        "status": "ok",
+        "tokens": total_tokens,
+        "token_detail": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                         "total_tokens": total_tokens},
+        "context": job["context"],
+        "cost_usd": cost,
+        "output": body["choices"][0]["message"]["content"],
+        "tags": job["tags"],
+    }
+
+
+def run_batch(
+    jobs: List[Tuple[int, Dict[str, Any]]],
+    backend: Any,
+    work_dir: Path,
+    poll_interval_s: float = 30.0,
+    timeout_s: Optional[float] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Write the request file, submit it, poll until the batch is done and
+    return {slot: log entry}. Requests with no (or a failed) result come
+    back as api_error entries, so every slot is filled.
+    """
+    stamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    path = write_batch_file(jobs, Path(work_dir) / f"{stamp}_{uuid.uuid4().hex[:6]}.input.jsonl")
+
+    start = time.perf_counter()
+    batch_id = backend.submit(path)
+    LOGGER.info(f"Batch {batch_id}: submitted {len(jobs)} requests ({path})")
+    while True:
+        state = backend.status(batch_id)
+        if state in DONE_STATES:
+            break
+        if timeout_s is not None and time.perf_counter() - start > timeout_s:
+            raise TimeoutError(f"Batch {batch_id} still '{state}' after {timeout_s}s")
+        LOGGER.info(f"Batch {batch_id}: {state}, checking again in {poll_interval_s}s")
+        time.sleep(poll_interval_s)
+    latency = round(time.perf_counter() - start, 3)
+    LOGGER.info(f"Batch {batch_id}: {state} after {latency}s")
+
+    # Expired batches still return whatever finished in time.
+    by_id = {r.get("custom_id"): r for r in backend.results(batch_id)} if state in ("completed", "expired") else {}
+    missing = {"error": f"batch {state} without a result for this request"}
+    discount = getattr(backend, "discount", 1.0)
+    return {
+        slot: _entry(job, by_id.get(_custom_id(slot, job["id"]), missing), batch_id, latency, discount)
+        for slot, job in jobs
+    }
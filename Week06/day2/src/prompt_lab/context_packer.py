@@ -0,0 +1,173 @@
+# src/prompt_lab/context_packer.py
+"""
+Year-6 explanation:
+A prompt is made of pieces: the system rules, some extra context, a few
+worked examples ("shots") and the real question. The model can only read
+so many tokens, and every token we send costs money. The packer is like
+packing a school bag with a weight limit: the must-haves go in first
+(system + question), then the optional pieces in priority order while
+they still fit. Anything left out is reported, so nothing disappears
+silently.
+
+Technical notes:
+- Token counts are per part and cached (lru_cache on model + text), so the
+  same shot reused across a suite is only tokenized once.
+- Message overhead follows OpenAI's chat format: 3 tokens per message
+  (+ the role) and 3 to prime the reply.
+- Fast path: UTF-8 byte length is an upper bound on BPE tokens, so if the
+  byte bound already fits the budget we skip the tokenizer completely.
+- tiktoken is imported lazily; if it (or its BPE file) can't be loaded,
+  byte counts are used instead (safe: they never under-count).
+- Optional parts are tried by (priority desc, original order); kept parts
+  are emitted in their original order so the conversation still reads right.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+TOKENS_PER_MESSAGE = 3
+REPLY_PRIMING = 3
+
+# Total context window per model (input + output tokens).
+CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "gpt-4-turbo": 128_000,
+}
+DEFAULT_CONTEXT_WINDOW = 8_192
+
+_DATE_SUFFIX = re.compile(r"-\d{4}-\d{2}-\d{2}$")
+
+
+@dataclass
+class Part:
+    """One piece of the prompt (one or more chat messages)."""
+    name: str
+    messages: List[Dict[str, str]]
+    priority: int = 0
+    required: bool = False
+
+
+@dataclass
+class PackResult:
+    messages: List[Dict[str, str]]
+    tokens: int                      # prompt tokens (upper bound if exact=False)
+    budget: Optional[int]
+    dropped: List[str] = field(default_factory=list)
+    exact: bool = True
+
+
+# ---------- Token counting ----------
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # not installed / BPE file not downloadable (offline)
+        logging.warning(f"[context_packer] No tokenizer for {model} ({e}); using byte counts.")
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_text_tokens(model: str, text: str) -> int:
+    """Tokens for one string (cached per model + text)."""
+    enc = _encoding(model)
+    if enc is None:
+        return len(text.encode("utf-8"))
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def part_tokens(part: Part, model: str) -> int:
+    """Exact tokens this part adds to a chat request."""
+    return sum(
+        TOKENS_PER_MESSAGE + count_text_tokens(model, m["role"]) + count_text_tokens(model, m["content"])
+        for m in part.messages
+    )
+
+
+def _byte_bound(part: Part) -> int:
+    return sum(
+        TOKENS_PER_MESSAGE + len(m["role"].encode("utf-8")) + len(m["content"].encode("utf-8"))
+        for m in part.messages
+    )
+
+
+def input_budget(model: str, max_tokens: int) -> int:
+    """Room left for the prompt once the reply (max_tokens) is reserved."""
+    window = CONTEXT_WINDOWS.get(model) or CONTEXT_WINDOWS.get(_DATE_SUFFIX.sub("", model), DEFAULT_CONTEXT_WINDOW)
+    return window - max_tokens
+
+
+# ---------- Packing ----------
+
+def pack_context(parts: Sequence[Part], budget: Optional[int], model: str = "gpt-4o-mini") -> PackResult:
+    """
+    Keep every required part, then add optional parts (highest priority
+    first) while they fit in `budget` prompt tokens. budget=None keeps all.
+    Raises ValueError if the required parts alone are over budget.
+    """
+    bound = REPLY_PRIMING + sum(_byte_bound(p) for p in parts)
+    if budget is None or bound <= budget:
+        messages = [m for p in parts for m in p.messages]
+        return PackResult(messages, bound, budget, [], exact=False)
+
+    counts = [part_tokens(p, model) for p in parts]
+    used = REPLY_PRIMING + sum(c for p, c in zip(parts, counts) if p.required)
+    if used > budget:
+        raise ValueError(f"Required prompt parts need {used} tokens, budget is {budget}.")
+
+    keep = {i for i, p in enumerate(parts) if p.required}
+    optional = sorted((i for i, p in enumerate(parts) if not p.required), key=lambda i: (-parts[i].priority, i))
+    for i in optional:
+        if used + counts[i] <= budget:
+            keep.add(i)
+            used += counts[i]
+
+    messages = [m for i, p in enumerate(parts) if i in keep for m in p.messages]
+    dropped = [p.name for i, p in enumerate(parts) if i not in keep]
+    return PackResult(messages, used, budget, dropped, exact=_encoding(model) is not None)
+
+
+def collect_parts(cfg: Dict[str, Any], defaults: Dict[str, Any]) -> List[Part]:
+    """
+    Turn a test config into prompt parts (cfg overrides defaults):
+      - system: str                                  (required)
+      - context: list of str | {text, priority}      (optional, system messages)
+      - shots: list of {user, assistant, priority?}  (optional few-shot pairs)
+      - prompt: final user content                   (required)
+    """
+    system_text = cfg.get("system", defaults.get("system", "You are a clear, concise writing assistant."))
+    parts = [Part("system", [{"role": "system", "content": system_text}], required=True)]
+
+    for i, item in enumerate(cfg.get("context", defaults.get("context", [])) or []):
+        text, priority = (item, 0) if isinstance(item, str) else (item.get("text"), item.get("priority", 0))
+        if text:
+            parts.append(Part(f"context[{i}]", [{"role": "system", "content": text}], priority=priority))
+
+    # Few-shot: list of {user, assistant}
+    for i, ex in enumerate(cfg.get("shots", [])):
+        u = ex.get("user")
+        a = ex.get("assistant")
+        if not (u and a):
+            continue
+        parts.append(Part(
+            f"shot[{i}]",
+            [{"role": "user", "content": u}, {"role": "assistant", "content": a}],
+            priority=ex.get("priority", 0),
+        ))
+
+    # Final task prompt
+    prompt = cfg.get("prompt")
+    if not prompt:
+        raise ValueError(f"Test '{cfg.get('id')}' missing 'prompt' field.")
+    parts.append(Part("prompt", [{"role": "user", "content": prompt}], required=True))
+    return parts
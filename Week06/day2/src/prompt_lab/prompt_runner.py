@@ -2,21 +2,31 @@
 """
 Prompt Lab Runner — Week 6 Day 2
 - Loads prompts from YAML (supports simple list OR {defaults, tests} schema)
-- Builds chat messages (system + few-shot + user)
+- Builds chat messages (system + context + few-shot + user), packed into a token budget
 - Calls OpenAI via shared OpenAIClient
-- Logs output, tokens, cost, latency to JSONL per day
+- Logs output, tokens, cost, latency to JSONL per day (buffered background
+  writer: batched + fsynced, optional size rotation / gzip, flushed on exit)
 - CLI flags: choose file, filter by id/tag, override model/params, dry-run
+- Optional concurrency (--concurrency N) with per-model rate caps (--rate-cap);
+  log entries stay in test order and wall time / throughput are reported
+- --batch: send the whole suite as one Batch API job (cheaper, no live
+  latency), poll until done and log results in the same per-test format
 
 Run:
   python Day2/src/prompt_lab/prompt_runner.py
   python Day2/src/prompt_lab/prompt_runner.py --file Day2/prompts.yaml --ids concise_summary,creative_story
   python Day2/src/prompt_lab/prompt_runner.py --tags qa --model gpt-4o-mini --temperature 0.3
+  python Day2/src/prompt_lab/prompt_runner.py --concurrency 8 --rate-cap gpt-4o=60
+  python Day2/src/prompt_lab/prompt_runner.py --batch --batch-backend local
+  python Day2/src/prompt_lab/prompt_runner.py --stream                       # logs ttft_s / itl_s
+  PROMPT_LOG_DIR=/tmp/prompt_lab python Day2/src/prompt_lab/prompt_runner.py   # keep scratch logs out of the repo
 """
 
 from __future__ import annotations
-import os, sys, time, json, argparse, datetime, logging
+import os, sys, time, json, argparse, datetime, logging, queue, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 # ---------- Path setup (works when run from Day2 or repo root) ----------
 HERE = Path(__file__).resolve()
@@ -30,7 +40,11 @@ for p in (DAY2_SRC, WEEK_SRC):
         sys.path.insert(0, ps)
 
 import yaml  # pip install pyyaml
-from core.openai_client import OpenAIClient  # Week06/src/core/openai_client.py
+from jsonl_sink import JsonlSink
+from prompt_lab.batch import LocalBatchBackend, OpenAIBatchBackend, run_batch
+from prompt_lab.context_packer import PackResult, collect_parts, input_budget, pack_context
+# core.openai_client (and the OpenAI SDK behind it) is imported in run_suite,
+# only when a real call is about to happen — --help / --dry-run skip it.
 
 # ---------- Logging ----------
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -38,7 +52,10 @@ LOGGER = logging.getLogger("prompt_runner")
 
 # ---------- Constants ----------
 DEFAULT_PROMPTS_FILE = HERE.parents[2] / "prompts.yaml"      # Day2/prompts.yaml
-LOG_DIR = HERE.parents[3] / "Day2" / "logs" / "prompts"      # Day2/logs/prompts
+# PROMPT_LOG_DIR moves all run output elsewhere (e.g. a temp dir for dev runs)
+LOG_ROOT = Path(os.getenv("PROMPT_LOG_DIR") or HERE.parents[3] / "Day2" / "logs")
+LOG_DIR = LOG_ROOT / "prompts"                                # Day2/logs/prompts
+BATCH_DIR = LOG_ROOT / "batches"                              # batch request files (+ local backend)
 
 
 # ---------- YAML Loading (supports two schemas) ----------
@@ -76,39 +93,137 @@ def build_messages(cfg: Dict[str, Any], defaults: Dict[str, Any]) -> List[Dict[s
     Compose messages with precedence: cfg overrides defaults.
     Supports optional:
       - system: str
-      - shots: list of {user: "...", assistant: "..."} pairs for few-shot
+      - context: list of str | {text, priority} (extra system messages)
+      - shots: list of {user: "...", assistant: "...", priority?} pairs for few-shot
       - prompt: final user content
+    No size check here; see pack_messages for the budgeted version.
     """
-    system_text = cfg.get("system", defaults.get("system", "You are a clear, concise writing assistant."))
-    messages = [{"role": "system", "content": system_text}]
-
-    # Few-shot: list of {user, assistant}
-    shots = cfg.get("shots", [])
-    for ex in shots:
-        u = ex.get("user")
-        a = ex.get("assistant")
-        if not (u and a):
-            continue
-        messages.append({"role": "user", "content": u})
-        messages.append({"role": "assistant", "content": a})
+    return pack_context(collect_parts(cfg, defaults), budget=None).messages
 
-    # Final task prompt
-    prompt = cfg.get("prompt")
-    if not prompt:
-        raise ValueError(f"Test '{cfg.get('id')}' missing 'prompt' field.")
-    messages.append({"role": "user", "content": prompt})
 
-    return messages
+def pack_messages(
+    cfg: Dict[str, Any],
+    defaults: Dict[str, Any],
+    model: str,
+    max_tokens: int,
+    max_input_tokens: int | None = None,
+) -> PackResult:
+    """
+    Like build_messages, but fits the prompt into a token budget:
+    --max-input-tokens, else the test's `max_input_tokens`, else
+    (model context window - max_tokens). Optional context/shots that don't
+    fit are dropped (lowest priority first) and listed in result.dropped.
+    """
+    budget = max_input_tokens or cfg.get("max_input_tokens") or input_budget(model, max_tokens)
+    return pack_context(collect_parts(cfg, defaults), budget=budget, model=model)
 
 
 # ---------- Logging ----------
-def save_log(entry: Dict[str, Any]) -> str:
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-    date_str = datetime.date.today().isoformat()
-    log_path = LOG_DIR / f"{date_str}.jsonl"
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-    return str(log_path)
+def open_log_sink(**options: Any) -> JsonlSink:
+    """
+    Daily JSONL files in LOG_DIR, written in batches by a background thread.
+    options go to JsonlSink (flush_interval_s, batch_size, max_bytes, compress...).
+    """
+    return JsonlSink(LOG_DIR, **options)
+
+
+# ---------- Concurrency helpers ----------
+class ModelPacer:
+    """
+    Per-model request-rate caps (requests per minute), shared by all workers.
+    Each call books the next free slot for its model and sleeps until then,
+    so a model with rpm=60 gets at most one request started per second.
+    """
+
+    def __init__(self, caps: Dict[str, float] | None = None):
+        self.caps = dict(caps or {})
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, model: str) -> float:
+        """Block until `model` may start a request. Returns seconds waited."""
+        rpm = self.caps.get(model)
+        if not rpm:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(model, now))
+            self._next[model] = slot + 60.0 / rpm
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+def parse_rate_caps(spec: str) -> Dict[str, float]:
+    """'gpt-4o=60,gpt-4o-mini=300' -> {'gpt-4o': 60.0, 'gpt-4o-mini': 300.0}"""
+    caps: Dict[str, float] = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        model, _, rpm = item.partition("=")
+        if not rpm:
+            raise ValueError(f"Bad --rate-cap entry '{item}' (use MODEL=RPM).")
+        caps[model.strip()] = float(rpm)
+    return caps
+
+
+def _call_model(job: Dict[str, Any], clients: "queue.Queue", pacer: ModelPacer) -> Dict[str, Any]:
+    """Run one prepared test on a borrowed client; always returns a log entry."""
+    pacer.wait(job["model"])
+    client = clients.get()
+    try:
+        return _chat_entry(job, client)
+    finally:
+        clients.put(client)
+
+
+def _chat_entry(job: Dict[str, Any], client: Any) -> Dict[str, Any]:
+    base = {k: job[k] for k in ("id", "model", "temperature", "top_p", "max_tokens")}
+    start = time.perf_counter()
+    try:
+        output = client.chat(
+            messages=job["messages"],
+            model=job["model"],
+            temperature=job["temperature"],
+            top_p=job["top_p"],
+            max_tokens=job["max_tokens"],
+            **({"stream": True} if job.get("stream") else {}),
+        )
+        latency = round(time.perf_counter() - start, 3)
+        if job.get("stream"):   # time to first token / between tokens, for the dashboards
+            for key in ("ttft_s", "itl_s"):
+                value = getattr(client, f"last_{key}", None)
+                if value is not None:
+                    base[key] = round(value, 4)
+        return {
+            **base,
+            "status": "ok",
+            "latency_s": latency,
+            "timestamp": datetime.datetime.now().isoformat(),
+            "tokens": client.last_usage,
+            "token_detail": client.last_token_counts or {},
+            "context": job["context"],
+            "cost_usd": client.last_cost,
+            "output": output,
+            "tags": job["tags"],
+        }
+    except Exception as e:
+        latency = round(time.perf_counter() - start, 3)
+        return {
+            **base,
+            "status": "api_error",
+            "latency_s": latency,
+            "timestamp": datetime.datetime.now().isoformat(),
+            "error": str(e),
+        }
+
+
+def _report(entry: Dict[str, Any], path: str) -> None:
+    test_id = entry.get("id")
+    if entry["status"] == "ok":
+        LOGGER.info(f"[{test_id}] logged -> {path} (lat={entry['latency_s']}s, "
+                    f"tokens={entry['tokens']}, cost={entry['cost_usd']})")
+    elif entry["status"] == "api_error":
+        LOGGER.error(f"[{test_id}] ERROR -> {entry['error']} (logged {path})")
 
 
 # ---------- Runner Core ----------
@@ -121,7 +236,25 @@ def run_suite(
     top_p: float | None,
     max_tokens: int | None,
     dry_run: bool,
+    max_input_tokens: int | None = None,
+    concurrency: int = 1,
+    rate_caps: Dict[str, float] | None = None,
+    client_factory: Callable[[], Any] | None = None,
+    log_sink: JsonlSink | None = None,
+    batch_backend: Any | None = None,
+    batch_poll_s: float = 30.0,
+    stream: bool = False,
 ):
+    """
+    Run the selected tests. Up to `concurrency` API calls are in flight at
+    once (each in-flight call borrows its own client from a small pool, since
+    the client keeps last-call metadata); `rate_caps` limits requests/minute
+    per model. With `batch_backend`, all calls go out as one batch job
+    instead (see prompt_lab.batch) and concurrency/rate caps don't apply.
+    `stream` streams each answer so its entry records ttft_s / itl_s.
+    Log entries are still written in test order, through `log_sink` (default:
+    open_log_sink(), closed = flushed when the suite ends). Returns a summary dict.
+    """
     data = load_tests(file)
     defaults = data.get("defaults", {})
     tests: List[Dict[str, Any]] = data.get("tests", [])
@@ -142,9 +275,9 @@ def run_suite(
         LOGGER.warning("No tests matched your filters.")
         return
 
-    # Client
-    client = OpenAIClient()
-
+    # Prepare every test first (cheap, serial); `slots` keeps test order.
+    slots: List[Dict[str, Any] | None] = []   # finished log entry per test (None = pending)
+    jobs: List[tuple] = []                    # (slot index, job)
     for raw in selected:
         # Merge defaults with test (test overrides)
         cfg = {**defaults, **raw}
@@ -155,73 +288,99 @@ def run_suite(
         p = top_p if top_p is not None else cfg.get("top_p", 0.9)
         mx = max_tokens if max_tokens is not None else cfg.get("max_tokens", 200)
 
-        # Build messages (system + shots + user)
+        # Build messages (system + context + shots + user) within the token budget
         try:
-            messages = build_messages(cfg, defaults)
+            packed = pack_messages(cfg, defaults, model, mx, max_input_tokens)
+            messages = packed.messages
         except Exception as e:
             LOGGER.error(f"[{test_id}] Message build failed: {e}")
-            save_log({
+            slots.append({
                 "id": test_id, "status": "build_error", "error": str(e),
                 "timestamp": datetime.datetime.now().isoformat()
             })
             continue
+        context_info = {"budget": packed.budget, "prompt_tokens": packed.tokens,
+                        "exact": packed.exact, "dropped": packed.dropped}
+        if packed.dropped:
+            LOGGER.info(f"[{test_id}] dropped to fit {packed.budget} tokens: {', '.join(packed.dropped)}")
 
         # Dry-run prints the composed config/messages without calling API
         if dry_run:
             print(json.dumps({
                 "id": test_id, "model": model, "temperature": t, "top_p": p, "max_tokens": mx,
-                "messages": messages
+                "context": context_info, "messages": messages
             }, ensure_ascii=False, indent=2))
             continue
 
-        # Call model
-        start = time.perf_counter()
-        try:
-            output = client.chat(
-                messages=messages,
-                model=model,
-                temperature=t,
-                top_p=p,
-                max_tokens=mx,
-            )
-            latency = round(time.perf_counter() - start, 3)
-            usage = client.last_usage
-            cost = client.last_cost
-            token_detail = client.last_token_counts or {}
-
-            entry = {
-                "id": test_id,
-                "status": "ok",
-                "model": model,
-                "temperature": t,
-                "top_p": p,
-                "max_tokens": mx,
-                "latency_s": latency,
-                "timestamp": datetime.datetime.now().isoformat(),
-                "tokens": usage,
-                "token_detail": token_detail,
-                "cost_usd": cost,
-                "output": output,
-                "tags": cfg.get("tags", []),
-            }
-            path = save_log(entry)
-            LOGGER.info(f"[{test_id}] logged -> {path} (lat={latency}s, tokens={usage}, cost={cost})")
-
-        except Exception as e:
-            latency = round(time.perf_counter() - start, 3)
-            entry = {
-                "id": test_id,
-                "status": "api_error",
-                "model": model,
-                "temperature": t,
-                "top_p": p,
-                "max_tokens": mx,
-                "latency_s": latency,
-                "timestamp": datetime.datetime.now().isoformat(),
-                "error": str(e),
-            }
-            path = save_log(entry)
-            LOGGER.error(f"[{test_id}] ERROR -> {e} (logged {path})")
+        jobs.append((len(slots), {
+            "id": test_id, "model": model, "temperature": t, "top_p": p, "max_tokens": mx,
+            "messages": messages, "context": context_info, "tags": cfg.get("tags", []),
+            "stream": stream,
+        }))
+        slots.append(None)
+
+    # Clients: one per worker, created up front so a bad key fails fast (not needed for dry/batch runs)
+    workers = 1 if batch_backend is not None else max(1, min(concurrency, len(jobs)))
+    clients: "queue.Queue" = queue.Queue()
+    if jobs and batch_backend is None:
+        if client_factory is None:
+            from core.openai_client import OpenAIClient  # Week06/day2/src/core/openai_client.py
+            client_factory = OpenAIClient
+        for _ in range(workers):
+            clients.put(client_factory())
+
+    pacer = ModelPacer(rate_caps)
+    sink = log_sink or open_log_sink()
+    written = 0
+
+    def flush_ready() -> None:
+        # Queue the finished prefix, so the log order never depends on timing.
+        nonlocal written
+        while written < len(slots) and slots[written] is not None:
+            entry = slots[written]
+            _report(entry, str(sink.write(entry)))
+            written += 1
+
+    start = time.perf_counter()
+    try:
+        flush_ready()
+        if jobs and batch_backend is not None:
+            for slot, entry in run_batch(jobs, batch_backend, BATCH_DIR, poll_interval_s=batch_poll_s).items():
+                slots[slot] = entry
+            flush_ready()
+        elif jobs:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prompt-suite") as pool:
+                futures = {pool.submit(_call_model, job, clients, pacer): slot for slot, job in jobs}
+                for fut in as_completed(futures):
+                    slots[futures[fut]] = fut.result()
+                    flush_ready()
+    finally:
+        if log_sink is None:
+            sink.close()
+        else:
+            sink.flush()
+    wall = time.perf_counter() - start
+
+    called = [slots[i] for i, _ in jobs]
+    summary = {
+        "tests": len(selected),
+        "called": len(called),
+        "ok": sum(1 for e in called if e["status"] == "ok"),
+        "errors": sum(1 for e in slots if e and e["status"] != "ok"),
+        "mode": "batch" if batch_backend is not None else "live",
+        "concurrency": workers,
+        "wall_s": round(wall, 3),
+        "sum_latency_s": round(sum(e["latency_s"] for e in called), 3),
+        "throughput_per_s": round(len(called) / wall, 3) if wall > 0 else 0.0,
+        "cost_usd": round(sum(e.get("cost_usd") or 0.0 for e in called), 6),
+    }
+    if called:
+        LOGGER.info(
+            f"Suite done: {summary['called']} calls in {summary['wall_s']}s "
+            f"({summary['throughput_per_s']}/s, concurrency={summary['concurrency']}, "
+            f"sum of latencies={summary['sum_latency_s']}s, ok={summary['ok']}, errors={summary['errors']})"
+        )
+    return summary
 
 
 # ---------- CLI ----------
@@ -234,6 +393,24 @@ def parse_args():
     ap.add_argument("--temperature", type=float, default=None, help="Override temperature")
     ap.add_argument("--top_p", type=float, default=None, help="Override top_p")
     ap.add_argument("--max_tokens", type=int, default=None, help="Override max_tokens")
+    ap.add_argument("--max-input-tokens", type=int, default=None,
+                    help="Prompt token budget (default: model context window - max_tokens)")
+    ap.add_argument("--concurrency", type=int, default=1, help="Max API calls in flight at once")
+    ap.add_argument("--rate-cap", default="",
+                    help="Per-model request caps, e.g. gpt-4o=60,gpt-4o-mini=300 (requests/minute)")
+    ap.add_argument("--log-flush-interval", type=float, default=1.0,
+                    help="Seconds between background log flushes")
+    ap.add_argument("--log-batch-size", type=int, default=256, help="Flush the log after this many entries")
+    ap.add_argument("--log-rotate-mb", type=float, default=None,
+                    help="Roll the day's log over to <date>.N.jsonl once it reaches this size")
+    ap.add_argument("--log-gzip", action="store_true", help="gzip rotated log files")
+    ap.add_argument("--batch", action="store_true",
+                    help="Send all calls as one Batch API job (cheaper; results when the batch finishes)")
+    ap.add_argument("--batch-backend", choices=["openai", "local"], default="openai",
+                    help="Where --batch jobs go (local = file-system stand-in, no API calls)")
+    ap.add_argument("--batch-poll-s", type=float, default=30.0, help="Seconds between batch status checks")
+    ap.add_argument("--stream", action="store_true",
+                    help="Stream answers and log time-to-first-token / inter-token latency")
     ap.add_argument("--dry-run", action="store_true", help="Print messages/config without calling the API")
     return ap.parse_args()
 
@@ -244,16 +421,37 @@ def main():
     ids = [s for s in args.ids.split(",") if s.strip()] or None
     tags = [s for s in args.tags.split(",") if s.strip()] or None
 
-    run_suite(
-        file=file,
-        ids=ids,
-        tags=tags,
-        override_model=args.model,
-        temperature=args.temperature,
-        top_p=args.top_p,
-        max_tokens=args.max_tokens,
-        dry_run=args.dry_run,
+    log_options = dict(
+        flush_interval_s=args.log_flush_interval,
+        batch_size=args.log_batch_size,
+        max_bytes=int(args.log_rotate_mb * 1024 * 1024) if args.log_rotate_mb else None,
+        compress=args.log_gzip,
     )
+    batch_backend = None
+    if args.batch and not args.dry_run:
+        if args.batch_backend == "local":
+            batch_backend = LocalBatchBackend(BATCH_DIR / "local")
+        else:
+            batch_backend = OpenAIBatchBackend()
+
+    with open_log_sink(**log_options) as sink:
+        run_suite(
+            file=file,
+            ids=ids,
+            tags=tags,
+            override_model=args.model,
+            temperature=args.temperature,
+            top_p=args.top_p,
+            max_tokens=args.max_tokens,
+            dry_run=args.dry_run,
+            max_input_tokens=args.max_input_tokens,
+            concurrency=args.concurrency,
+            rate_caps=parse_rate_caps(args.rate_cap),
+            log_sink=sink,
+            batch_backend=batch_backend,
+            batch_poll_s=args.batch_poll_s,
+            stream=args.stream,
+        )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make 'src' importable so 'from prompt_lab.context_packer import ...' works,
+# plus Week06/src for the shared modules (jsonl_sink, pricing, ...)
+SRC = Path(__file__).resolve().parents[1] / "src"
+WEEK_SRC = Path(__file__).resolve().parents[2] / "src"
+for p in (SRC, WEEK_SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from prompt_lab import context_packer, prompt_runner
+
+
+class _WordTokenizer:
+    """One token per whitespace-separated word (offline, deterministic)."""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def word_tokenizer(monkeypatch):
+    counter = context_packer.count_text_tokens
+    monkeypatch.setattr(context_packer, "_encoding", lambda model: _WordTokenizer())
+    counter.cache_clear()
+    yield
+    counter.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def scratch_log_dirs(tmp_path, monkeypatch):
+    """Run logs and batch files go to tmp_path, never into the repo."""
+    monkeypatch.setattr(prompt_runner, "LOG_DIR", tmp_path / "logs")
+    monkeypatch.setattr(prompt_runner, "BATCH_DIR", tmp_path / "batches")
@@ -0,0 +1,63 @@
+import json
+
+import pricing
+from prompt_lab import prompt_runner
+from prompt_lab.batch import LocalBatchBackend, run_batch, write_batch_file
+from prompt_lab.prompt_runner import run_suite
+
+
+def _responder(body):
+    prompt = body["messages"][-1]["content"]
+    if "fail" in prompt:
+        raise RuntimeError("model refused")
+    return {"choices": [{"message": {"role": "assistant", "content": prompt.upper()}}],
+            "usage": {"prompt_tokens": 1000, "completion_tokens": 500, "total_tokens": 1500}}
+
+
+def _job(test_id, prompt):
+    return {"id": test_id, "model": "gpt-4o-mini", "temperature": 0.2, "top_p": 1.0, "max_tokens": 50,
+            "messages": [{"role": "user", "content": prompt}], "context": {}, "tags": ["x"]}
+
+
+def test_request_file_format(tmp_path):
+    path = write_batch_file([(0, _job("a", "hi")), (2, _job("a", "again"))], tmp_path / "in.jsonl")
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["custom_id"] for line in lines] == ["0:a", "2:a"]    # duplicate ids stay distinct
+    assert lines[0]["url"] == "/v1/chat/completions" and lines[0]["method"] == "POST"
+    assert lines[1]["body"]["messages"][0]["content"] == "again"
+
+
+def test_run_batch_polls_and_joins(tmp_path, monkeypatch):
+    monkeypatch.setattr("prompt_lab.batch.time.sleep", lambda s: None)
+    backend = LocalBatchBackend(tmp_path / "backend", responder=_responder, polls_until_done=3)
+    entries = run_batch([(0, _job("ok", "hello")), (1, _job("bad", "please fail"))],
+                        backend, tmp_path / "work", poll_interval_s=0)
+
+    assert backend._polls[entries[0]["batch_id"]] == 4
+    ok, bad = entries[0], entries[1]
+    assert ok["status"] == "ok" and ok["output"] == "HELLO" and ok["tokens"] == 1500
+    assert ok["cost_usd"] == pricing.cost_usd("gpt-4o-mini", 1000, 500) * 0.5
+    assert bad["status"] == "api_error" and "model refused" in bad["error"]
+
+
+def test_run_suite_batch_logs_like_live(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompt_runner, "LOG_DIR", tmp_path / "logs")
+    monkeypatch.setattr(prompt_runner, "BATCH_DIR", tmp_path / "batches")
+    tests = [{"id": "t1", "prompt": "one"}, {"id": "broken"}, {"id": "t2", "prompt": "two"}]
+    suite = tmp_path / "prompts.yaml"
+    suite.write_text(json.dumps({"tests": tests}), encoding="utf-8")
+
+    def no_live_calls():
+        raise AssertionError("batch mode must not build live clients")
+
+    summary = run_suite(suite, None, None, None, None, None, None, dry_run=False,
+                        client_factory=no_live_calls,
+                        batch_backend=LocalBatchBackend(tmp_path / "batches" / "local"), batch_poll_s=0)
+
+    (log,) = (tmp_path / "logs").glob("*.jsonl")
+    entries = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    assert [e["id"] for e in entries] == ["t1", "broken", "t2"]
+    assert entries[2]["output"] == "[BATCH] two" and entries[2]["token_detail"]["total_tokens"] > 0
+    assert summary["mode"] == "batch" and summary["ok"] == 2
+    assert summary["cost_usd"] == round(entries[0]["cost_usd"] + entries[2]["cost_usd"], 6)
+    assert len(list((tmp_path / "batches").glob("*.input.jsonl"))) == 1
@@ -0,0 +1,75 @@
+import pytest
+
+from prompt_lab import context_packer
+from prompt_lab.context_packer import collect_parts, input_budget, pack_context
+from prompt_lab.prompt_runner import build_messages, pack_messages
+
+CFG = {
+    "id": "t",
+    "system": "be brief",                                            # 3 + 1 + 2 = 6
+    "context": ["alpha beta gamma delta", {"text": "key fact", "priority": 5}],
+    "shots": [
+        {"user": "one two three four five six", "assistant": "ok"},  # 10 + 5 = 15
+        {"user": "hi", "assistant": "hello"},                        # 5 + 5 = 10
+    ],
+    "prompt": "answer this now",                                     # 3 + 1 + 3 = 7
+}
+
+
+def test_no_budget_keeps_everything_in_order():
+    msgs = build_messages(CFG, {})
+    assert [m["content"] for m in msgs] == [
+        "be brief", "alpha beta gamma delta", "key fact",
+        "one two three four five six", "ok", "hi", "hello", "answer this now",
+    ]
+
+
+def test_priority_then_order_and_report():
+    # required: 3 (priming) + 6 + 7 = 16; context[1] = 6, context[0] = 8.
+    # shot[0] (15) no longer fits, but the smaller shot[1] (10) still does.
+    res = pack_context(collect_parts(CFG, {}), budget=16 + 6 + 8 + 10, model="m")
+    assert res.dropped == ["shot[0]"]
+    assert res.tokens == 40 and res.exact
+    assert [m["content"] for m in res.messages] == [
+        "be brief", "alpha beta gamma delta", "key fact", "hi", "hello", "answer this now",
+    ]
+    res = pack_context(collect_parts(CFG, {}), budget=16 + 6, model="m")
+    assert res.dropped == ["context[0]", "shot[0]", "shot[1]"]
+
+
+def test_fast_path_skips_tokenizer(monkeypatch):
+    def boom(model, text):
+        raise AssertionError("tokenizer should not run when the byte bound fits")
+    monkeypatch.setattr(context_packer, "count_text_tokens", boom)
+    res = pack_context(collect_parts(CFG, {}), budget=10_000, model="m")
+    assert res.dropped == [] and not res.exact and len(res.messages) == 8
+
+
+def test_required_over_budget_raises():
+    with pytest.raises(ValueError):
+        pack_context(collect_parts(CFG, {}), budget=10, model="m")
+
+
+def test_counts_are_cached(monkeypatch):
+    calls = []
+
+    class Counting:
+        def encode(self, text, disallowed_special=()):
+            calls.append(text)
+            return text.split()
+
+    monkeypatch.setattr(context_packer, "_encoding", lambda model: Counting())
+    parts = collect_parts(CFG, {})
+    pack_context(parts, budget=20, model="m")
+    first = len(calls)
+    pack_context(parts, budget=20, model="m")
+    assert len(calls) == first
+
+
+def test_pack_messages_budget_sources():
+    res = pack_messages({**CFG, "max_input_tokens": 23}, {}, model="gpt-4o-mini", max_tokens=100)
+    assert res.budget == 23 and res.dropped == ["context[0]", "shot[0]", "shot[1]"]
+    res = pack_messages(CFG, {}, model="gpt-4o-mini", max_tokens=100, max_input_tokens=16)
+    assert res.budget == 16
+    assert input_budget("gpt-4o-mini-2024-07-18", 1000) == 127_000
+    assert input_budget("unknown", 192) == 8_000
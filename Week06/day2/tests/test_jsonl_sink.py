@@ -0,0 +1,103 @@
+import datetime as dt
+import gzip
+import json
+import threading
+import time
+
+import pytest
+
+from jsonl_sink import JsonlSink
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_threads_write_whole_lines_in_batches(tmp_path):
+    with JsonlSink(tmp_path, batch_size=50, flush_interval_s=5) as sink:
+        def worker(w):
+            for i in range(100):
+                sink.write({"worker": w, "i": i, "text": "x" * 200})
+
+        threads = [threading.Thread(target=worker, args=(w,)) for w in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    (log,) = tmp_path.glob("*.jsonl")
+    rows = _lines(log)
+    assert len(rows) == 800
+    for w in range(8):   # each writer's lines stay in its own order
+        assert [r["i"] for r in rows if r["worker"] == w] == list(range(100))
+    assert sink.stats["batches"] <= 800 // 50 + 8
+
+
+def test_flush_waits_for_disk_and_interval_flushes(tmp_path):
+    sink = JsonlSink(tmp_path, batch_size=1000, flush_interval_s=0.05)
+    path = sink.write({"a": 1})
+    sink.flush()
+    assert _lines(path) == [{"a": 1}]
+    sink.write({"a": 2})
+    sink.close()
+    assert _lines(path) == [{"a": 1}, {"a": 2}]
+    with pytest.raises(RuntimeError):
+        sink.write({"a": 3})
+
+
+def test_write_racing_close_is_not_lost(tmp_path):
+    sink = JsonlSink(tmp_path)
+    put, inside = sink._queue.put, threading.Event()
+
+    def slow_put(item, *a, **kw):
+        if isinstance(item, tuple):       # a record, not the stop marker
+            inside.set()
+            time.sleep(0.2)
+        put(item, *a, **kw)
+    sink._queue.put = slow_put
+
+    writer = threading.Thread(target=sink.write, args=({"last": 1},))
+    writer.start()
+    inside.wait()
+    sink.close()                          # must not stop the flusher ahead of that record
+    writer.join()
+    assert _lines(sink.path_for()) == [{"last": 1}]
+
+
+def test_steady_trickle_is_flushed_every_interval(tmp_path):
+    with JsonlSink(tmp_path, batch_size=1000, flush_interval_s=0.2) as sink:
+        path = sink.path_for()
+        for i in range(10):               # faster than the interval: the queue is never idle
+            sink.write({"i": i})
+            time.sleep(0.05)
+        assert path.exists() and _lines(path)   # on disk before close()
+
+
+def test_day_rotation_gzips_yesterday(tmp_path):
+    day = [dt.date(2025, 1, 31)]
+    with JsonlSink(tmp_path, compress=True, today=lambda: day[0]) as sink:
+        sink.write({"n": 1})
+        sink.flush()
+        day[0] = dt.date(2025, 2, 1)
+        sink.write({"n": 2})
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2025-01-31.jsonl.gz", "2025-02-01.jsonl"]
+    with gzip.open(tmp_path / "2025-01-31.jsonl.gz", "rt", encoding="utf-8") as f:
+        assert json.loads(f.read()) == {"n": 1}
+
+
+def test_size_rotation(tmp_path):
+    with JsonlSink(tmp_path, rotate="size", max_bytes=100, batch_size=1) as sink:
+        for n in range(6):
+            sink.write({"n": n, "pad": "y" * 30})   # ~45 bytes per line
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == ["log.1.jsonl", "log.2.jsonl", "log.jsonl"]
+    rows = [r for name in ("log.1.jsonl", "log.2.jsonl", "log.jsonl") for r in _lines(tmp_path / name)]
+    assert [r["n"] for r in rows] == list(range(6))
+    assert all((tmp_path / name).stat().st_size <= 100 for name in names)
+
+
+def test_appends_after_torn_line(tmp_path):
+    (tmp_path / "log.jsonl").write_text('{"ok": 1}\n{"half": ', encoding="utf-8")
+    with JsonlSink(tmp_path, rotate="size", max_bytes=10_000) as sink:
+        sink.write({"ok": 2})
+    lines = (tmp_path / "log.jsonl").read_text(encoding="utf-8").splitlines()
+    assert lines == ['{"ok": 1}', '{"half": ', '{"ok": 2}']
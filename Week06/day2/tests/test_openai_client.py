@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+
+from core.openai_client import OpenAIClient
+
+
+def _chunk(text=None, usage=None):
+    choices = [] if text is None else [SimpleNamespace(delta=SimpleNamespace(content=text))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class _Completions:
+    def __init__(self):
+        self.kwargs = None
+
+    def create(self, **kwargs):
+        self.kwargs = kwargs
+        usage = SimpleNamespace(prompt_tokens=12, completion_tokens=3, total_tokens=15)
+        return iter([_chunk("Hel"), _chunk("lo"), _chunk(" there"), _chunk(None, usage)])
+
+
+def test_stream_times_tokens_and_reads_usage():
+    client = OpenAIClient(api_key="sk-test")
+    completions = _Completions()
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    text = client.chat([{"role": "user", "content": "hi"}], model="gpt-4o-mini", stream=True)
+    assert text == "Hello there"
+    assert completions.kwargs["stream_options"] == {"include_usage": True}
+    assert client.last_token_counts == {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15}
+    assert client.last_ttft_s >= 0 and client.last_itl_s >= 0
@@ -0,0 +1,111 @@
+import json
+import random
+import threading
+import time
+
+import pytest
+
+from prompt_lab import prompt_runner
+from prompt_lab.prompt_runner import ModelPacer, parse_rate_caps, run_suite
+
+
+class FakeClient:
+    """Sleeps like a real call; keeps last-call metadata like OpenAIClient."""
+    created = 0
+
+    def __init__(self):
+        FakeClient.created += 1
+        self.last_usage = self.last_cost = self.last_token_counts = None
+
+    def chat(self, messages, model, temperature, top_p, max_tokens):
+        prompt = messages[-1]["content"]
+        time.sleep(random.uniform(0.02, 0.1))
+        if "fail" in prompt:
+            raise RuntimeError("boom")
+        self.last_usage, self.last_cost = len(prompt), 0.001
+        self.last_token_counts = {"prompt_tokens": len(prompt), "completion_tokens": 0,
+                                  "total_tokens": len(prompt)}
+        return f"echo:{prompt}"
+
+
+class FakeStreamClient(FakeClient):
+    """Also takes stream=True and reports stream timings like OpenAIClient."""
+
+    def chat(self, messages, model, temperature, top_p, max_tokens, stream=False):
+        output = super().chat(messages, model, temperature, top_p, max_tokens)
+        self.last_ttft_s, self.last_itl_s = (0.25, 0.01) if stream else (None, None)
+        return output
+
+
+@pytest.fixture
+def suite(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompt_runner, "LOG_DIR", tmp_path / "logs")
+    tests = [{"id": f"t{i}", "prompt": "please fail" if i == 5 else f"prompt {i}"} for i in range(20)]
+    tests.insert(3, {"id": "no_prompt"})
+    path = tmp_path / "prompts.yaml"
+    path.write_text(json.dumps({"tests": tests}), encoding="utf-8")  # JSON is valid YAML
+    FakeClient.created = 0
+    return path
+
+
+def _run(path, **kw):
+    return run_suite(path, None, None, None, None, None, None, dry_run=False,
+                     client_factory=FakeClient, **kw)
+
+
+def _logged(tmp_path):
+    (log,) = (tmp_path / "logs").glob("*.jsonl")
+    return [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+
+
+def test_concurrent_suite_keeps_order_and_reports(suite, tmp_path):
+    summary = _run(suite, concurrency=10)
+    entries = _logged(tmp_path)
+
+    expected = [f"t{i}" for i in range(20)]
+    expected.insert(3, "no_prompt")
+    assert [e["id"] for e in entries] == expected
+    assert [e["status"] for e in entries].count("build_error") == 1
+    assert entries[6]["status"] == "api_error"           # t5
+    assert entries[0]["output"] == "echo:prompt 0"
+    assert FakeClient.created == 10
+
+    assert summary["called"] == 20 and summary["ok"] == 19 and summary["errors"] == 2
+    # ~2 waves of <=0.1s calls instead of ~20 serial ones
+    assert summary["wall_s"] < summary["sum_latency_s"] / 3
+    assert summary["throughput_per_s"] > 0
+
+
+def test_rate_caps_space_requests():
+    pacer = ModelPacer({"m": 600})        # one start per 0.1s
+    starts = []
+    lock = threading.Lock()
+
+    def go():
+        pacer.wait("m")
+        with lock:
+            starts.append(time.monotonic())
+
+    threads = [threading.Thread(target=go) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    starts.sort()
+    assert all(b - a >= 0.09 for a, b in zip(starts, starts[1:]))
+    assert pacer.wait("uncapped") == 0.0
+
+
+def test_parse_rate_caps():
+    assert parse_rate_caps("gpt-4o=60, gpt-4o-mini=300") == {"gpt-4o": 60.0, "gpt-4o-mini": 300.0}
+    assert parse_rate_caps("") == {}
+    with pytest.raises(ValueError):
+        parse_rate_caps("gpt-4o")
+
+
+def test_stream_logs_ttft_and_itl(suite, tmp_path):
+    run_suite(suite, ["t1", "t5"], None, None, None, None, None, dry_run=False,
+              client_factory=FakeStreamClient, stream=True)
+    ok, failed = _logged(tmp_path)
+    assert (ok["status"], ok["ttft_s"], ok["itl_s"]) == ("ok", 0.25, 0.01)
+    assert failed["status"] == "api_error" and "ttft_s" not in failed
@@ -0,0 +1,98 @@
+# scripts/importtime_report.py
+"""
+Year-6 explanation:
+Before a CLI does any work, Python has to load every library it imports.
+Some libraries (the OpenAI SDK, tiktoken, matplotlib, pandas) are big, so
+just asking for `--help` could take ages. This script starts each of our
+tools with `python -X importtime`, adds up how long the imports took, and
+shows the slowest ones, so we can check heavy stuff is only loaded when
+it's really needed.
+
+Technical notes:
+- Each target runs in a fresh interpreter (nothing is cached between runs).
+- `-X importtime` writes one line per module to stderr:
+      import time: self [us] | cumulative | imported package
+  "total" = sum of self times; the table lists top-level imports by cumulative.
+- DRY_RUN=1 is set so nothing can reach the network.
+
+Run (from the repo root or Week06/):
+    python Week06/scripts/importtime_report.py
+    python Week06/scripts/importtime_report.py --top 5 --only dashboard
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+WEEK_ROOT = Path(__file__).resolve().parents[1]   # .../Week06
+
+# label -> (working dir, argv after `python -X importtime`)
+TARGETS: Dict[str, Tuple[Path, List[str]]] = {
+    "token_runner": (WEEK_ROOT / "day03", ["src/prompt_runner/prompt_runner.py", "--help"]),
+    "prompt_lab": (WEEK_ROOT / "day2", ["src/prompt_lab/prompt_runner.py", "--help"]),
+    "dashboard": (WEEK_ROOT / "day06", ["src/analytics/cost_dashboard.py", "--help"]),
+    "json_handler": (WEEK_ROOT / "day04", ["-c", "import src.structured.json_handler"]),
+    "openai_client": (WEEK_ROOT / "day01" / "src" / "core", ["-c", "import openai_client"]),
+}
+
+# Modules we expect NOT to be loaded just to start a tool.
+HEAVY = ("openai", "tiktoken", "matplotlib", "jsonschema", "dotenv")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Return (module, self_us, cumulative_us, depth) for every import line."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cum_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def measure(label: str) -> Tuple[int, List[Tuple[str, int, int, int]], int]:
+    """Run one target; returns (total_us, rows, exit_code)."""
+    cwd, argv = TARGETS[label]
+    env = {**os.environ, "DRY_RUN": "1", "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    rows = parse_importtime(proc.stderr)
+    return sum(r[1] for r in rows), rows, proc.returncode
+
+
+def report(label: str, top: int) -> None:
+    total_us, rows, code = measure(label)
+    status = "" if code == 0 else f"  (exit code {code})"
+    print(f"\n=== {label}: {total_us / 1000:.1f} ms of imports, {len(rows)} modules{status} ===")
+
+    top_level = sorted((r for r in rows if r[3] == 0), key=lambda r: r[2], reverse=True)
+    for name, _, cum_us, _ in top_level[:top]:
+        print(f"  {cum_us / 1000:8.1f} ms  {name}")
+
+    loaded = {r[0].split(".")[0] for r in rows}
+    heavy = [h for h in HEAVY if h in loaded]
+    print(f"  heavy deps loaded: {', '.join(heavy) if heavy else 'none'}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Import-time report for the Week06 CLIs")
+    ap.add_argument("--top", type=int, default=8, help="How many top-level imports to list")
+    ap.add_argument("--only", choices=sorted(TARGETS), default=None, help="Measure one target")
+    args = ap.parse_args(argv)
+
+    for label in ([args.only] if args.only else list(TARGETS)):
+        report(label, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# src/jsonl_sink.py  (Week06 shared)
+"""
+Year-6 explanation:
+Writing one log line = open the file, add the line, close it. Doing that
+for every single test result is like walking to the post box with each
+letter separately. The sink is a letter tray: callers drop their line in
+the tray and get straight back to work, and one helper (a background
+thread) walks to the post box every second, or as soon as the tray holds
+a full batch, and posts everything in one go.
+
+Technical notes:
+- write(record) turns the record into one JSON line on the caller's
+  thread (bad records fail right there) and puts it on a bounded queue.
+  A full queue blocks the caller (back-pressure) instead of dropping logs.
+- One flusher thread owns the open file: a batch = one write() + flush +
+  fsync, so lines from different threads never interleave. A batch is
+  written at most flush_interval_s after its first record arrived, even
+  while more records keep trickling in.
+- Files are named by day ("2025-01-31.jsonl"); rotate="size" uses one
+  name ("log.jsonl"). max_bytes rolls a full file over to
+  "<name>.1.jsonl", "<name>.2.jsonl" ... Rotated files (old days and full
+  files) can be gzipped.
+- Crash-safe: only whole, fsynced lines are ever added. If a crash left a
+  half line at the end of a file, a newline is added before appending, so
+  the next good line is never glued to the broken one.
+- flush() waits until everything written so far is on disk; close() (also
+  run at interpreter exit) flushes and stops the thread.
+"""
+
+from __future__ import annotations
+
+import atexit
+import datetime as dt
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_STOP = object()
+
+
+class JsonlSink:
+    """
+    Buffered, thread-safe JSONL writer.
+
+        with JsonlSink("logs/prompts", flush_interval_s=1.0, batch_size=256) as sink:
+            sink.write({"id": "t1", "status": "ok"})
+    """
+
+    def __init__(
+        self,
+        directory,
+        rotate: str = "day",
+        max_bytes: Optional[int] = None,
+        compress: bool = False,
+        flush_interval_s: float = 1.0,
+        batch_size: int = 256,
+        max_queue: int = 10_000,
+        name: str = "log",
+        fsync: bool = True,
+        today: Callable[[], dt.date] = dt.date.today,
+    ):
+        if rotate not in ("day", "size"):
+            raise ValueError("rotate must be 'day' or 'size'")
+        if rotate == "size" and not max_bytes:
+            raise ValueError("rotate='size' needs max_bytes")
+        if batch_size < 1 or flush_interval_s <= 0:
+            raise ValueError("batch_size must be >= 1 and flush_interval_s > 0")
+        self.directory = Path(directory)
+        self.rotate = rotate
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.name = name
+        self.fsync = fsync
+        self.today = today
+        self.stats = {"records": 0, "batches": 0, "rotations": 0}
+        self.error: Optional[BaseException] = None
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._file_path: Optional[Path] = None
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="jsonl-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------- Public API ----------
+
+    def path_for(self, day: Optional[dt.date] = None) -> Path:
+        """The file a record written on `day` (default: today) goes to."""
+        stem = (day or self.today()).isoformat() if self.rotate == "day" else self.name
+        return self.directory / f"{stem}.jsonl"
+
+    def write(self, record: Dict[str, Any]) -> Path:
+        """Queue one record; returns the file it will land in."""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        path = self.path_for()
+        # Check and enqueue under close()'s lock, so a record can't land behind _STOP.
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("JsonlSink is closed")
+            self._queue.put((path, line))
+        return path
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every record written before this call is on disk."""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            raise TimeoutError("JsonlSink.flush timed out")
+        self._raise_error()
+
+    def close(self) -> None:
+        """Flush what's queued, close the file and stop the flusher thread."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_error()
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------- Flusher thread ----------
+
+    def _run(self) -> None:
+        batch: List[Tuple[Path, str]] = []
+        deadline = 0.0   # when the oldest record in `batch` must be on disk
+        while True:
+            try:
+                timeout = max(0.0, deadline - time.monotonic()) if batch else None
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write_batch(batch)
+                continue
+            if isinstance(item, tuple):
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval_s
+                batch.append(item)
+                if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                    self._write_batch(batch)
+                continue
+            self._write_batch(batch)
+            if item is _STOP:
+                self._close_file()
+                return
+            item.set()   # a flush() marker
+
+    def _write_batch(self, batch: List[Tuple[Path, str]]) -> None:
+        if not batch:
+            return
+        try:
+            # Usually one group; a batch straddling midnight splits in two.
+            groups: Dict[Path, List[str]] = {}
+            for path, line in batch:
+                groups.setdefault(path, []).append(line)
+            for path, lines in groups.items():
+                data = "".join(lines).encode("utf-8")
+                f = self._open(path, len(data))
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.stats["records"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:  # keep the thread alive; surface on flush()/close()
+            logging.error(f"[jsonl_sink] Could not write {len(batch)} log records: {e}")
+            self.error = e
+        finally:
+            batch.clear()
+
+    def _open(self, path: Path, incoming: int):
+        if self._file_path != path:
+            previous = self._file_path
+            self._close_file()
+            if previous is not None and self.rotate == "day" and previous.exists():
+                self._retire(previous, previous)   # yesterday's file is finished
+        elif self.max_bytes and 0 < self._file.tell() and self._file.tell() + incoming > self.max_bytes:
+            self._close_file()
+            self._roll(path)
+
+        if self._file is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if self.max_bytes and path.exists() and 0 < path.stat().st_size and \
+                    path.stat().st_size + incoming > self.max_bytes:
+                self._roll(path)
+            self._file = open(path, "ab")
+            self._file_path = path
+            self._repair_tail(path)
+        return self._file
+
+    def _repair_tail(self, path: Path) -> None:
+        """Start on a fresh line if a crash left a half-written one."""
+        size = path.stat().st_size
+        if not size:
+            return
+        with open(path, "rb") as f:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                self._file.write(b"\n")
+
+    def _roll(self, path: Path) -> None:
+        """Move a full file out of the way: name.jsonl -> name.N.jsonl."""
+        n = 1
+        while any(self._rolled_name(path, n, gz).exists() for gz in (False, True)):
+            n += 1
+        self._retire(path, self._rolled_name(path, n, False))
+        self.stats["rotations"] += 1
+
+    @staticmethod
+    def _rolled_name(path: Path, n: int, gz: bool) -> Path:
+        return path.with_name(f"{path.stem}.{n}.jsonl" + (".gz" if gz else ""))
+
+    def _retire(self, path: Path, target: Path) -> None:
+        if target != path:
+            os.replace(path, target)
+        if self.compress:
+            with open(target, "rb") as src, gzip.open(f"{target}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(target)
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._file_path = None
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            e, self.error = self.error, None
+            raise RuntimeError(f"JsonlSink lost log records: {e}") from e
@@ -0,0 +1,200 @@
+# src/pricing.py  (Week06 shared)
+"""
+Year-6 explanation:
+Every tool that asks "how much did that cost?" needs the same price list.
+This file is that ONE price list for the whole week. Prices change over
+time, so each price has a start date ("effective") and a version label:
+- to price an old log line fairly, use the price that was live that day;
+- to ask "what would all of this cost today?", use the newest price.
+
+Technical notes:
+- Rates are USD per 1K tokens (input / output), same unit as before.
+- get_rate(model, on=date) -> newest rate whose effective date <= `on`
+  (dates before a model's first rate use that first rate).
+- Model ids with a date suffix ("gpt-4o-mini-2024-07-18") use their base name.
+- Unknown models: strict=True raises KeyError, otherwise "_default" is used.
+- estimate_costs(df) prices a whole DataFrame in one pass: the model column
+  is factorized once, rates are gathered from tiny per-model arrays and the
+  maths is NumPy (no per-row Python). numpy/pandas are imported inside it,
+  so importing this module stays cheap for the API clients.
+"""
+
+from __future__ import annotations
+
+import bisect
+import datetime as dt
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+DateLike = Union[None, str, dt.date, dt.datetime]
+
+DEFAULT_MODEL = "_default"
+
+
+@dataclass(frozen=True)
+class Rate:
+    """One dated price for one model (USD per 1K tokens)."""
+    model: str
+    input_per_1k: float
+    output_per_1k: float
+    effective: dt.date
+    version: str
+
+
+# model, input, output, effective from, version label
+_RATES = [
+    ("gpt-4o",       0.005,   0.015,   "2024-05-13", "2024-05 launch"),
+    ("gpt-4o",       0.0025,  0.010,   "2024-10-02", "2024-10 price cut"),
+    ("gpt-4o-mini",  0.00015, 0.00060, "2024-07-18", "2024-07 launch"),
+    ("gpt-4-turbo",  0.010,   0.030,   "2024-04-09", "2024-04 GA"),
+    # fallback if an unknown model is used (strict=False)
+    (DEFAULT_MODEL,  0.00020, 0.00080, "1970-01-01", "fallback"),
+]
+
+_LOCK = threading.Lock()
+REGISTRY: Dict[str, List[Rate]] = {}
+
+_DATE_SUFFIX = re.compile(r"-\d{4}-\d{2}-\d{2}$")
+
+
+def _as_date(on: DateLike) -> Optional[dt.date]:
+    if on is None:
+        return None
+    if isinstance(on, dt.datetime):
+        return on.date()
+    if isinstance(on, dt.date):
+        return on
+    return dt.date.fromisoformat(str(on)[:10])
+
+
+def register_rate(
+    model: str,
+    input_per_1k: float,
+    output_per_1k: float,
+    effective: DateLike,
+    version: str = "",
+) -> Rate:
+    """
+    Add (or replace) the rate for `model` starting on `effective`.
+    Use this when a price changes; older log lines keep their old price.
+    """
+    day = _as_date(effective)
+    if day is None:
+        raise ValueError("register_rate needs an effective date.")
+    rate = Rate(model, float(input_per_1k), float(output_per_1k), day, version or day.isoformat())
+    with _LOCK:
+        versions = [r for r in REGISTRY.get(model, []) if r.effective != day]
+        bisect.insort(versions, rate, key=lambda r: r.effective)
+        REGISTRY[model] = versions
+    return rate
+
+
+for _row in _RATES:
+    register_rate(*_row)
+
+
+def canonical_model(model: str) -> str:
+    """'gpt-4o-mini-2024-07-18' -> 'gpt-4o-mini' (only if the dated id isn't registered)."""
+    if model in REGISTRY:
+        return model
+    return _DATE_SUFFIX.sub("", model)
+
+
+def rate_history(model: str, strict: bool = True) -> List[Rate]:
+    """All versions for a model, oldest first."""
+    versions = REGISTRY.get(canonical_model(model))
+    if versions:
+        return list(versions)
+    if strict:
+        raise KeyError(
+            f"[pricing] No rate for model '{model}'. Add one with "
+            f"register_rate('{model}', INPUT_PER_1K, OUTPUT_PER_1K, 'YYYY-MM-DD')."
+        )
+    return list(REGISTRY[DEFAULT_MODEL])
+
+
+def get_rate(model: str, on: DateLike = None, strict: bool = True) -> Rate:
+    """The rate live on `on` (default: the newest one)."""
+    versions = rate_history(model, strict=strict)
+    day = _as_date(on)
+    if day is None:
+        return versions[-1]
+    i = bisect.bisect_right([r.effective for r in versions], day) - 1
+    return versions[max(i, 0)]
+
+
+def cost_usd(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int = 0,
+    on: DateLike = None,
+    strict: bool = False,
+) -> float:
+    """Price one request (unrounded)."""
+    rate = get_rate(model, on=on, strict=strict)
+    return (prompt_tokens * rate.input_per_1k + completion_tokens * rate.output_per_1k) / 1000.0
+
+
+# ---------- Vectorized pricing ----------
+
+def estimate_costs(
+    df,
+    model_col: str = "model_name",
+    prompt_col: str = "prompt_tokens",
+    completion_col: str = "completion_tokens",
+    time_col: Optional[str] = None,
+    on: DateLike = None,
+    strict: bool = False,
+    decimals: Optional[int] = 8,
+):
+    """
+    Price every row of a DataFrame at once. Returns a float Series named
+    "cost_usd", aligned with df.index.
+
+    - time_col=None: every row uses the rate live on `on` (default: newest),
+      i.e. "re-cost all of history at today's price".
+    - time_col="timestamp": each row uses the rate live when it was logged
+      (rows without a usable timestamp get the rate for `on`).
+    - Rows with no model get NaN. Missing token counts count as 0.
+    """
+    import numpy as np
+    import pandas as pd
+
+    n = len(df)
+    codes, uniques = pd.factorize(df[model_col])
+    prompt = pd.to_numeric(df[prompt_col], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+    completion = pd.to_numeric(df[completion_col], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+
+    # One rate per distinct model (as of `on`) -> gathered for every row below.
+    fixed = [get_rate(str(m), on=on, strict=strict) for m in uniques]
+    in_by_model = np.array([r.input_per_1k for r in fixed] + [np.nan])
+    out_by_model = np.array([r.output_per_1k for r in fixed] + [np.nan])
+    # codes == -1 (missing model) picks the trailing NaN
+    rate_in = in_by_model[codes]
+    rate_out = out_by_model[codes]
+
+    if time_col is not None and n:
+        when = pd.to_datetime(df[time_col], errors="coerce")
+        if getattr(when.dt, "tz", None) is not None:
+            when = when.dt.tz_convert("UTC").dt.tz_localize(None)
+        days = when.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        dated = ~np.isnat(days)
+        for k, m in enumerate(uniques):
+            versions = rate_history(str(m), strict=strict)
+            if len(versions) < 2:
+                continue  # only one price ever: the gather above is already right
+            rows = np.flatnonzero((codes == k) & dated)
+            if not rows.size:
+                continue
+            starts = np.array([r.effective.isoformat() for r in versions], dtype="datetime64[D]")
+            idx = np.searchsorted(starts, days[rows], side="right") - 1
+            idx = np.clip(idx, 0, len(versions) - 1)
+            rate_in[rows] = np.array([r.input_per_1k for r in versions])[idx]
+            rate_out[rows] = np.array([r.output_per_1k for r in versions])[idx]
+
+    cost = (prompt * rate_in + completion * rate_out) / 1000.0
+    if decimals is not None:
+        cost = np.round(cost, decimals)
+    return pd.Series(cost, index=df.index, name="cost_usd")
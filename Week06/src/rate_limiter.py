@@ -0,0 +1,231 @@
+# src/rate_limiter.py  (Week06 shared)
+"""
+Year-6 explanation:
+OpenAI only lets each model take so many requests per minute (RPM) and so
+many tokens per minute (TPM). Instead of finding out with a "429 Too Many
+Requests" and then waiting, we keep two piggy banks per model that refill
+a little every second. Before a call we take coins out (1 request + our
+guess of its tokens). If there aren't enough coins yet, we wait just long
+enough for them to refill. After the call we look at the real token count
+and put back (or take out) the difference.
+
+Technical notes:
+- Token buckets with "debt": a caller always books its coins straight away
+  and gets its own wait time, so waiting callers are served in order and
+  nobody spins. capacity = limit * burst_s / 60, refill = limit / 60 per s.
+- Token guess before the call (like OpenAI's own limiter): characters / 4
+  per message + a few tokens overhead + max_tokens. Pass `token_counter`
+  to use an exact tokenizer instead.
+- MemoryBuckets: shared by threads (one lock).
+- SQLiteBuckets: shared by processes through one SQLite file
+  (BEGIN IMMEDIATE = one writer at a time; wall-clock time).
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# (bucket name, amount, capacity, refill per second)
+Take = Tuple[str, float, float, float]
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Per-model quota. None = not limited on that axis."""
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+
+
+@dataclass
+class Reservation:
+    """What acquire()/reserve() booked; hand it back to reconcile()."""
+    model: str
+    tokens: int
+    wait_s: float
+
+
+def _take(level: float, updated: float, amount: float, capacity: float, rate: float, now: float):
+    """Refill since `updated`, then remove `amount`. Returns (new level, wait seconds)."""
+    level = min(capacity, level + max(0.0, now - updated) * rate) - amount
+    level = min(level, capacity)
+    return level, (-level / rate if level < 0 else 0.0)
+
+
+# ---------- Bucket storage ----------
+
+class MemoryBuckets:
+    """Buckets in a dict; safe to share between threads."""
+
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Dict[str, Tuple[float, float]] = {}
+
+    def take(self, items: Sequence[Take]) -> List[float]:
+        waits = []
+        with self._lock:
+            now = time.monotonic()
+            for name, amount, capacity, rate in items:
+                level, updated = self._state.get(name, (capacity, now))
+                level, wait = _take(level, updated, amount, capacity, rate, now)
+                self._state[name] = (level, now)
+                waits.append(wait)
+        return waits
+
+
+class SQLiteBuckets:
+    """Buckets in a SQLite file, so several processes share one quota."""
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    level REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def take(self, items: Sequence[Take]) -> List[float]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                waits = []
+                for name, amount, capacity, rate in items:
+                    row = conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                    level, updated = row if row else (capacity, now)
+                    level, wait = _take(level, updated, amount, capacity, rate, now)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO buckets (name, level, updated) VALUES (?, ?, ?)",
+                        (name, level, now),
+                    )
+                    waits.append(wait)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return waits
+        finally:
+            conn.close()
+
+
+# ---------- Limiter ----------
+
+def estimate_request_tokens(messages: Sequence[Dict[str, str]], max_tokens: int) -> int:
+    """Rough pre-call guess: ~4 characters per token, +4 per message, + max_tokens."""
+    prompt = sum(math.ceil(len(m.get("content") or "") / 4) + 4 for m in messages)
+    return prompt + 2 + int(max_tokens or 0)
+
+
+class RateLimiter:
+    """
+    RPM + TPM buckets per model.
+
+        limiter = RateLimiter({"gpt-4o-mini": Limit(rpm=500, tpm=200_000)})
+        res = limiter.acquire("gpt-4o-mini", messages, max_tokens=300)   # may sleep
+        ...call the API...
+        limiter.reconcile(res, actual_total_tokens)
+
+    Models without a Limit (and no `default`) pass straight through.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Limit]] = None,
+        default: Optional[Limit] = None,
+        buckets=None,
+        burst_s: float = 60.0,
+        token_counter: Optional[Callable[[Sequence[Dict[str, str]], int], int]] = None,
+        sleep_fn: Callable[[float], None] = time.sleep,
+    ):
+        if burst_s <= 0:
+            raise ValueError("burst_s must be > 0")
+        self.limits = dict(limits or {})
+        self.default = default
+        self.buckets = buckets if buckets is not None else MemoryBuckets()
+        self.burst_s = burst_s
+        self.token_counter = token_counter or estimate_request_tokens
+        self.sleep_fn = sleep_fn
+        self.stats = {"acquired": 0, "waited": 0, "wait_s": 0.0, "refunded_tokens": 0, "extra_tokens": 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec: str, db_path: str = "", **kwargs) -> "RateLimiter":
+        """
+        'gpt-4o=500:30000,gpt-4o-mini=500:200000,*=60:40000' (MODEL=RPM:TPM,
+        either side may be empty; '*' = default). db_path -> SQLite buckets.
+        """
+        limits: Dict[str, Limit] = {}
+        for item in filter(None, (s.strip() for s in spec.split(","))):
+            model, _, rates = item.partition("=")
+            rpm, _, tpm = rates.partition(":")
+            if not rates:
+                raise ValueError(f"Bad rate limit entry '{item}' (use MODEL=RPM:TPM).")
+            limits[model.strip()] = Limit(float(rpm) if rpm else None, float(tpm) if tpm else None)
+        default = limits.pop("*", None)
+        buckets = SQLiteBuckets(db_path) if db_path else None
+        return cls(limits, default=default, buckets=buckets, **kwargs)
+
+    def _limit(self, model: str) -> Optional[Limit]:
+        return self.limits.get(model, self.default)
+
+    def _items(self, model: str, requests: float, tokens: float) -> List[Take]:
+        limit = self._limit(model)
+        items: List[Take] = []
+        if limit is None:
+            return items
+        for axis, per_min, amount in (("rpm", limit.rpm, requests), ("tpm", limit.tpm, tokens)):
+            if per_min and amount:
+                items.append((f"{model}:{axis}", amount, per_min * self.burst_s / 60.0, per_min / 60.0))
+        return items
+
+    def reserve(self, model: str, messages: Sequence[Dict[str, str]], max_tokens: int) -> Reservation:
+        """Book 1 request + estimated tokens. Never sleeps: returns how long to wait."""
+        tokens = int(self.token_counter(messages, max_tokens))
+        items = self._items(model, 1, tokens)
+        wait = max(self.buckets.take(items), default=0.0) if items else 0.0
+        with self._stats_lock:
+            self.stats["acquired"] += 1
+            if wait > 0:
+                self.stats["waited"] += 1
+                self.stats["wait_s"] += wait
+        if wait > 0:
+            logging.info(f"RateLimiter: {model} over its RPM/TPM budget → waiting {wait:.2f}s (est. {tokens} tokens)")
+        return Reservation(model, tokens, wait)
+
+    def acquire(self, model: str, messages: Sequence[Dict[str, str]], max_tokens: int) -> Reservation:
+        """reserve() and then sleep for the wait (blocking callers)."""
+        res = self.reserve(model, messages, max_tokens)
+        if res.wait_s > 0:
+            self.sleep_fn(res.wait_s)
+        return res
+
+    def reconcile(self, res: Reservation, actual_tokens: int) -> None:
+        """Put back over-estimated tokens (or take the extra) once usage is known."""
+        delta = int(actual_tokens) - res.tokens
+        items = self._items(res.model, 0, delta)
+        if not items:
+            return
+        self.buckets.take(items)
+        with self._stats_lock:
+            key = "extra_tokens" if delta > 0 else "refunded_tokens"
+            self.stats[key] += abs(delta)
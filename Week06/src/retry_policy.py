@@ -0,0 +1,159 @@
+# src/retry_policy.py  (Week06 shared)
+"""
+Year-6 explanation:
+When a call fails because the service is busy, we try again — but how
+long should we wait? If every worker waits exactly 1s, then 2s, then 4s,
+they all come back at the same moment and knock the service over again
+(a "thundering herd"). So each worker adds a bit of randomness (jitter).
+If the service tells us how long to wait ("Retry-After"), we listen.
+And we never keep trying forever: there's a total time budget (deadline),
+and each single try gets its own time limit.
+
+Technical notes:
+- Backoff before retry n (0-based): cap = min(max_delay_s, base_delay_s * 2**n)
+  * "none":         cap                       (old behaviour: 1s, 2s, 4s ...)
+  * "full":         uniform(0, cap)           (default; best at spreading out)
+  * "equal":        cap/2 + uniform(0, cap/2) (never retries instantly)
+  * "decorrelated": min(max_delay_s, uniform(base_delay_s, 3 * previous sleep))
+- Retry-After (seconds, HTTP-date or OpenAI's retry-after-ms) is a lower
+  bound on the wait, capped at max_retry_after_s.
+- Only some failures are worth retrying: timeouts, dropped connections,
+  and HTTP statuses in retry_statuses (408/409/429/5xx). A 400/404/422
+  will fail the same way again, so it is raised straight away.
+- deadline_s covers every attempt and every sleep. A retry whose sleep
+  would cross the deadline is not attempted; each attempt's timeout is
+  cut down to the time left.
+- A RetryState (one per call) counts attempts and seconds slept, so the
+  caller can report them.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, FrozenSet, Mapping, Optional
+
+JITTER_MODES = ("none", "full", "equal", "decorrelated")
+
+
+def _header(headers: Any, name: str) -> Optional[str]:
+    if headers is None:
+        return None
+    value = headers.get(name)
+    if value is None and isinstance(headers, Mapping):
+        lowered = name.lower()
+        value = next((v for k, v in headers.items() if str(k).lower() == lowered), None)
+    return value
+
+
+def parse_retry_after(headers: Any, now_epoch: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds the server asked us to wait, or None if it didn't say.
+    Accepts retry-after-ms, Retry-After as seconds or as an HTTP-date.
+    """
+    now_epoch = time.time() if now_epoch is None else now_epoch
+
+    ms = _header(headers, "retry-after-ms")
+    if ms is not None:
+        try:
+            return max(0.0, float(ms) / 1000.0)
+        except (TypeError, ValueError):
+            pass
+
+    raw = _header(headers, "Retry-After")
+    if raw is None:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(raw).timestamp() - now_epoch)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """How (and for how long) to retry one API call."""
+
+    max_attempts: int = 3
+    base_delay_s: float = 1.0
+    max_delay_s: float = 30.0
+    jitter: str = "full"
+    deadline_s: Optional[float] = None           # whole call incl. sleeps; None = no limit
+    attempt_timeout_s: Optional[float] = None    # per try; None = caller's timeout
+    respect_retry_after: bool = True
+    max_retry_after_s: float = 60.0
+    retry_statuses: FrozenSet[int] = frozenset({408, 409, 429, 500, 502, 503, 504})
+    rng: random.Random = field(default_factory=random.Random, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.jitter not in JITTER_MODES:
+            raise ValueError(f"jitter must be one of {JITTER_MODES}, got '{self.jitter}'")
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be >= 1")
+
+    def backoff(self, retry: int, previous_s: float = 0.0) -> float:
+        """Jittered wait before retry number `retry` (0 = first retry)."""
+        cap = min(self.max_delay_s, self.base_delay_s * (2 ** retry))
+        if self.jitter == "none":
+            return cap
+        if self.jitter == "full":
+            return self.rng.uniform(0.0, cap)
+        if self.jitter == "equal":
+            return cap / 2 + self.rng.uniform(0.0, cap / 2)
+        previous_s = previous_s or self.base_delay_s
+        return min(self.max_delay_s, self.rng.uniform(self.base_delay_s, previous_s * 3))
+
+    def start(self, max_attempts: Optional[int] = None) -> "RetryState":
+        return RetryState(self, max_attempts or self.max_attempts)
+
+
+class RetryState:
+    """Bookkeeping for one call: attempts made, time slept, deadline."""
+
+    def __init__(self, policy: RetryPolicy, max_attempts: int):
+        self.policy = policy
+        self.max_attempts = max_attempts
+        self.started = time.monotonic()
+        self.attempts = 0
+        self.slept_s = 0.0
+        self._last_sleep = 0.0
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def remaining_s(self) -> Optional[float]:
+        if self.policy.deadline_s is None:
+            return None
+        return self.policy.deadline_s - (time.monotonic() - self.started)
+
+    def attempt_timeout(self, default: Optional[float]) -> Optional[float]:
+        """Timeout for the next try: policy/caller value, cut to the time left."""
+        self.attempts += 1
+        timeout = self.policy.attempt_timeout_s or default
+        left = self.remaining_s()
+        if left is not None:
+            timeout = left if timeout is None else min(timeout, left)
+            timeout = max(timeout, 0.001)
+        return timeout
+
+    def next_wait(self, retry_after_s: Optional[float] = None) -> Optional[float]:
+        """Seconds to sleep before the next try, or None = give up."""
+        if self.attempts >= self.max_attempts:
+            return None
+        wait = self.policy.backoff(self.attempts - 1, self._last_sleep)
+        if retry_after_s is not None and self.policy.respect_retry_after:
+            wait = max(wait, min(retry_after_s, self.policy.max_retry_after_s))
+        left = self.remaining_s()
+        if left is not None and wait >= left:
+            return None
+        return wait
+
+    def record_sleep(self, wait_s: float) -> None:
+        self._last_sleep = wait_s
+        self.slept_s += wait_s
@@ -28,18 +28,34 @@ def fake_model_reply(prompt: str) -> str:
 # ---------------- Agent ----------------
 
 class ManualAgent:
-    def __init__(self, embeddings_lookup: Callable[[str], List[float]] = _toy_embed, top_k: int = 3):
+    def __init__(
+        self,
+        embeddings_lookup: Callable[[str], List[float]] = _toy_embed,
+        top_k: int = 3,
+        diverse: bool = False,
+        fetch_k: int = 20,
+    ):
         """
         embeddings_lookup: function that turns text -> list[float] (the embedding)
         top_k: how many memories to inject each time
+        diverse: re-rank with MMR so near-duplicate memories don't waste prompt tokens
+        fetch_k: how many candidates MMR chooses from
         """
         init_db()
         self.embeddings_lookup = embeddings_lookup
         self.top_k = top_k
+        self.diverse = diverse
+        self.fetch_k = fetch_k
 
     def run(self, user_query: str, remember_response: bool = True) -> str:
         # ---- retrieve relevant memories before model call ----
-        relevant = get_relevant_memories(user_query, self.embeddings_lookup, top_k=self.top_k)
+        relevant = get_relevant_memories(
+            user_query,
+            self.embeddings_lookup,
+            top_k=self.top_k,
+            mmr=self.diverse,
+            fetch_k=self.fetch_k,
+        )
         context = "\n".join(relevant) if relevant else "(none)"
 
         # ---- build the final prompt sent to the model ----
@@ -0,0 +1,181 @@
+# src/memory/group_writer.py
+"""
+Year-6 explanation:
+When lots of agent threads all try to write a memory at the same time,
+they queue up at SQLite's single door and each one waits for its own save.
+The group writer is one helper who stands at the door, collects everyone's
+notes for a few milliseconds, then saves them all in one go.
+Each thread gets a "ticket" (a Future) that turns into the new row id
+once its note is safely saved.
+
+Technical notes:
+- One background thread owns the only write connection.
+- Inserts are coalesced until `max_batch` rows or `max_delay_s` has passed,
+  then written in ONE transaction (one commit, one WAL fsync).
+- Embeddings are computed by the caller's thread before submitting, so the
+  slow part runs in parallel and only the cheap INSERT is serialized.
+- A ticket cancelled before its batch is written is skipped (no row).
+- If the writer thread dies (e.g. the database can't be opened), every
+  queued ticket and every later submit()/flush() fails with that error
+  instead of waiting forever.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import List, Optional, Sequence, Tuple
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Thread-safe, batching writer for the `memory` table."""
+
+    def __init__(self, db_path: str, max_batch: int = 256, max_delay_s: float = 0.005):
+        if max_batch <= 0:
+            raise ValueError("max_batch must be > 0")
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.max_delay_s = max_delay_s
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._error: Optional[BaseException] = None   # why the writer thread died
+        self._lock = threading.Lock()
+
+        # simple counters (handy for checking coalescing works)
+        self.commits = 0
+        self.rows_written = 0
+
+        self._thread = threading.Thread(target=self._run, name="memory-group-writer", daemon=True)
+        self._thread.start()
+
+    # ---------- Public API ----------
+
+    def submit(self, text: str, embedding: Sequence[float]) -> Future:
+        """
+        Queue one row. Returns a Future that resolves to the new row id
+        after the batch containing it has committed.
+        """
+        fut: Future = Future()
+        with self._lock:
+            if self._error is not None:
+                fut.set_exception(self._error)
+                return fut
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter is closed.")
+            self._queue.put((text, json.dumps(list(embedding)), fut))
+        return fut
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until everything submitted so far has been committed."""
+        fut: Future = Future()
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter is closed.")
+            self._queue.put((None, None, fut))  # barrier: resolves once its batch commits
+        fut.result(timeout=timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Commit anything pending, then stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def __enter__(self) -> "GroupCommitWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------- Writer thread ----------
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        """Gather a batch starting with `first` until size/time limits hit."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, conn: sqlite3.Connection, batch: List) -> None:
+        # Claim every ticket first: cancelled ones are skipped, the rest can
+        # no longer be cancelled, so resolving them below can't fail.
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        rows = [item for item in batch if item[0] is not None]
+        ids: List[int] = []
+        try:
+            with conn:  # one transaction for the whole batch
+                for text, emb_json, _ in rows:
+                    cur = conn.execute(
+                        "INSERT INTO memory (text, embedding) VALUES (?, ?)",
+                        (text, emb_json),
+                    )
+                    ids.append(cur.lastrowid)
+        except Exception as e:
+            for _, _, fut in batch:
+                fut.set_exception(e)
+            return
+
+        if rows:
+            self.commits += 1
+        self.rows_written += len(rows)
+        row_ids = iter(ids)
+        for text, _, fut in batch:
+            fut.set_result(next(row_ids) if text is not None else None)
+
+    def _run(self) -> None:
+        conn = None
+        batch: List = []
+        try:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            stop = False
+            while not stop:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch = [first]
+                batch, stop = self._collect(first)
+                self._write(conn, batch)
+        except BaseException as e:
+            self._fail(e, batch)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _fail(self, error: BaseException, batch: List) -> None:
+        """The thread is dying: fail its current batch, the queue, and later calls."""
+        with self._lock:
+            self._error = error
+            self._closed = True
+        pending = list(batch)
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for item in pending:
+            if item is not _STOP and not item[2].done():
+                try:
+                    item[2].set_exception(error)
+                except InvalidStateError:   # cancelled meanwhile
+                    pass
@@ -0,0 +1,173 @@
+# src/memory/memory_index.py
+"""
+Year-6 explanation:
+Reading every memory out of SQLite for each question is like flipping
+through the whole notebook every time. The resident index keeps a copy of
+all the vectors in one NumPy table in RAM, so a search is a single
+multiply. Deleted memories get a "crossed out" mark (tombstone) instead of
+being ripped out straight away; `rebuild()` tidies the table later.
+
+Technical notes:
+- Vectors are L2-normalized on insert, so cosine = one matrix-vector dot.
+- `alive` is a boolean mask; tombstoned rows score -inf and are never
+  returned, without rescanning or re-reading the database.
+- Storage grows by doubling, so appends are amortized O(dim).
+- One lock guards all mutation; searches take it too (cheap, short).
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def _unit(vec: Sequence[float]) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32)
+    n = float(np.linalg.norm(v))
+    return v / n if n != 0.0 else v
+
+
+class MemoryIndex:
+    """In-memory dense vector index with tombstones."""
+
+    def __init__(self, dim: int = 0, capacity: int = 64):
+        self._lock = threading.RLock()
+        self.dim = dim
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._texts: List[str] = []
+        self._pos: Dict[int, int] = {}   # row id -> slot
+        self._n = 0                      # slots used (alive + tombstoned)
+
+    # ---------- Build ----------
+
+    @classmethod
+    def from_db(cls, db_path: str) -> "MemoryIndex":
+        """Load every live row from the memory table."""
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(
+                "SELECT id, text, embedding FROM memory WHERE deleted = 0 ORDER BY id"
+            ).fetchall()
+        finally:
+            conn.close()
+        dim = len(json.loads(rows[0][2])) if rows else 0
+        index = cls(dim=dim, capacity=max(64, len(rows)))
+        for row_id, text, emb_json in rows:
+            index.add(row_id, text, json.loads(emb_json))
+        return index
+
+    # ---------- Mutations ----------
+
+    def _grow(self, need: int) -> None:
+        cap = self._vectors.shape[0]
+        if need <= cap and self._vectors.shape[1] == self.dim:
+            return
+        new_cap = max(need, cap * 2, 64)
+        vectors = np.zeros((new_cap, self.dim), dtype=np.float32)
+        if self._n:
+            vectors[: self._n] = self._vectors[: self._n]
+        alive = np.zeros(new_cap, dtype=bool)
+        alive[: self._n] = self._alive[: self._n]
+        ids = np.zeros(new_cap, dtype=np.int64)
+        ids[: self._n] = self._ids[: self._n]
+        self._vectors, self._alive, self._ids = vectors, alive, ids
+
+    def add(self, row_id: int, text: str, vec: Sequence[float]) -> None:
+        v = _unit(vec)
+        with self._lock:
+            if self.dim == 0 and self._n == 0:
+                self.dim = v.shape[0]
+            if v.shape[0] != self.dim:
+                raise ValueError(f"Embedding dim {v.shape[0]} != index dim {self.dim}")
+            if row_id in self._pos:
+                self.update(row_id, text, vec)
+                return
+            self._grow(self._n + 1)
+            slot = self._n
+            self._vectors[slot] = v
+            self._alive[slot] = True
+            self._ids[slot] = row_id
+            self._texts.append(text)
+            self._pos[row_id] = slot
+            self._n += 1
+
+    def delete(self, row_id: int) -> bool:
+        """Tombstone one row. Returns False if it wasn't live."""
+        with self._lock:
+            slot = self._pos.pop(row_id, None)
+            if slot is None:
+                return False
+            self._alive[slot] = False
+            return True
+
+    def update(self, row_id: int, text: str, vec: Sequence[float]) -> bool:
+        """Overwrite a live row's text + vector in place."""
+        v = _unit(vec)
+        with self._lock:
+            slot = self._pos.get(row_id)
+            if slot is None:
+                return False
+            self._vectors[slot] = v
+            self._texts[slot] = text
+            return True
+
+    def rebuild(self) -> None:
+        """Drop tombstoned slots so the live rows are dense again."""
+        with self._lock:
+            keep = np.flatnonzero(self._alive[: self._n])
+            vectors = self._vectors[keep].copy()
+            ids = self._ids[keep].copy()
+            texts = [self._texts[i] for i in keep]
+            n = len(keep)
+            cap = max(64, n)
+            self._vectors = np.zeros((cap, self.dim), dtype=np.float32)
+            self._vectors[:n] = vectors
+            self._alive = np.zeros(cap, dtype=bool)
+            self._alive[:n] = True
+            self._ids = np.zeros(cap, dtype=np.int64)
+            self._ids[:n] = ids
+            self._texts = texts
+            self._pos = {int(i): slot for slot, i in enumerate(ids)}
+            self._n = n
+
+    # ---------- Reads ----------
+
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    @property
+    def tombstones(self) -> int:
+        return self._n - len(self._pos)
+
+    def search(self, query_vec: Sequence[float], top_k: int = 3) -> List[Tuple[float, int, str]]:
+        """Return up to top_k live (score, id, text), best first."""
+        scores, ids, texts, _ = self.candidates(query_vec, top_k)
+        return [(float(sc), int(i), t) for sc, i, t in zip(scores, ids, texts)]
+
+    def candidates(self, query_vec: Sequence[float], top_k: int):
+        """
+        Like search(), but also hands back the candidates' unit vectors
+        (scores, ids, texts, vectors) -> used for MMR re-ranking.
+        """
+        q = _unit(query_vec)
+        with self._lock:
+            if top_k <= 0 or not self._pos or q.shape[0] != self.dim:
+                return np.empty(0, dtype=np.float32), [], [], np.empty((0, self.dim), dtype=np.float32)
+            n = self._n
+            scores = self._vectors[:n] @ q
+            scores[~self._alive[:n]] = -np.inf
+            k = min(top_k, len(self._pos))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return (
+                scores[top],
+                self._ids[top].tolist(),
+                [self._texts[i] for i in top],
+                self._vectors[top].copy(),
+            )
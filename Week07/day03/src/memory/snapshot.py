@@ -0,0 +1,292 @@
+# src/memory/snapshot.py
+"""
+Year-6 explanation:
+Copying the memory database around is slow because every vector is saved as
+JSON text. A "snapshot" is a packed-up copy of the whole notebook:
+- all the numbers (vectors) go in one big block,
+- all the words (text + metadata) get squashed (compressed) together,
+- a little table of contents (offsets) says where each memory starts.
+`restore` unpacks it straight back into SQLite in one go.
+
+Technical notes:
+Bundle layout (all little-endian):
+    [header]        fixed struct, see _HEADER below
+    [vector block]  float32, shape (count, dim), 64-byte aligned (memmap-able)
+    [ids]           int64, shape (count,)
+    [offsets]       uint64, shape (2 * count + 1,) -> boundaries of text/meta
+                    strings inside the decompressed payload
+    [payload]       zlib( text_0 meta_0 text_1 meta_1 ... ) as UTF-8
+
+Works for both stores we have:
+- "memory"      -> vector_memory.py (memory table, JSON `embedding`)
+- "embeddings"  -> Week06 embedding_engine.py (embeddings.db, JSON `vector`)
+
+CLI:
+    python src/memory/snapshot.py snapshot --out data/memory.snap
+    python src/memory/snapshot.py restore  --src data/memory.snap --db replica.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"VMSNAP\x00\x01"
+VERSION = 1
+ALIGN = 64
+
+# magic, version, layout name, count, dim, vectors_at, ids_at, offsets_at, payload_at, payload_len
+_HEADER = struct.Struct("<8sI16sQIQQQQQ")
+
+
+@dataclass(frozen=True)
+class StoreLayout:
+    """Where a store keeps its rows (table + column names)."""
+    name: str
+    table: str
+    text_col: str
+    vector_col: str
+    meta_col: str
+    create_sql: str
+    live_where: str = "1 = 1"   # rows to export (skips tombstones)
+
+
+LAYOUTS: Dict[str, StoreLayout] = {
+    "memory": StoreLayout(
+        name="memory",
+        table="memory",
+        text_col="text",
+        vector_col="embedding",
+        meta_col="created_at",
+        create_sql="""
+            CREATE TABLE IF NOT EXISTS memory(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT NOT NULL,
+                embedding TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+        """,
+        live_where="deleted = 0",
+    ),
+    "embeddings": StoreLayout(
+        name="embeddings",
+        table="embeddings",
+        text_col="text",
+        vector_col="vector",
+        meta_col="metadata",
+        create_sql="""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT UNIQUE,
+                metadata TEXT,
+                vector TEXT
+            )
+        """,
+    ),
+}
+
+
+@dataclass
+class Snapshot:
+    """What `load_snapshot` gives back (vectors stay memory-mapped)."""
+    layout: StoreLayout
+    ids: np.ndarray
+    vectors: np.ndarray
+    texts: list
+    metas: list
+
+
+def _default_db_path() -> str:
+    # Imported lazily so tests can point vector_memory.DB_PATH somewhere else.
+    from memory import vector_memory
+    return vector_memory.DB_PATH
+
+
+def _aligned(pos: int) -> int:
+    return (pos + ALIGN - 1) // ALIGN * ALIGN
+
+
+# ---------- Export ----------
+
+def snapshot(out_path: str, db_path: Optional[str] = None, layout: str = "memory") -> int:
+    """
+    Write every live row of the store into one binary bundle at `out_path`.
+    Returns the number of rows written.
+    """
+    lay = LAYOUTS[layout]
+    db_path = db_path or _default_db_path()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT id, {lay.text_col}, {lay.vector_col}, {lay.meta_col} "
+            f"FROM {lay.table} WHERE {lay.live_where} ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    count = len(rows)
+    dim = len(json.loads(rows[0][2])) if rows else 0
+
+    ids = np.empty(count, dtype=np.int64)
+    vectors = np.empty((count, dim), dtype=np.float32)
+    offsets = np.empty(2 * count + 1, dtype=np.uint64)
+    parts = []
+    pos = 0
+    offsets[0] = 0
+    for i, (row_id, text, vec_json, meta) in enumerate(rows):
+        ids[i] = row_id
+        vec = json.loads(vec_json)
+        if len(vec) != dim:
+            raise ValueError(f"Row {row_id} has dim {len(vec)}, expected {dim}.")
+        vectors[i] = vec
+        for j, field in enumerate((text, meta)):
+            b = ("" if field is None else str(field)).encode("utf-8")
+            parts.append(b)
+            pos += len(b)
+            offsets[2 * i + 1 + j] = pos
+
+    payload = zlib.compress(b"".join(parts), 6)
+
+    vectors_at = _aligned(_HEADER.size)
+    ids_at = _aligned(vectors_at + vectors.nbytes)
+    offsets_at = ids_at + ids.nbytes
+    payload_at = offsets_at + offsets.nbytes
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, lay.name.encode("ascii"), count, dim,
+        vectors_at, ids_at, offsets_at, payload_at, len(payload),
+    )
+
+    # Write to a temp file first, then rename (a half-written bundle never appears).
+    tmp_path = f"{out_path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"\x00" * (vectors_at - _HEADER.size))
+        f.write(vectors.tobytes())
+        f.write(b"\x00" * (ids_at - vectors_at - vectors.nbytes))
+        f.write(ids.tobytes())
+        f.write(offsets.tobytes())
+        f.write(payload)
+    os.replace(tmp_path, out_path)
+    return count
+
+
+# ---------- Import ----------
+
+def _read_header(path: str) -> Tuple:
+    with open(path, "rb") as f:
+        raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        raise ValueError(f"{path} is too small to be a snapshot.")
+    fields = _HEADER.unpack(raw)
+    if fields[0] != MAGIC:
+        raise ValueError(f"{path} is not a vector snapshot (bad magic).")
+    if fields[1] != VERSION:
+        raise ValueError(f"Unsupported snapshot version {fields[1]} (expected {VERSION}).")
+    return fields
+
+
+def load_snapshot(path: str) -> Snapshot:
+    """
+    Open a bundle without copying the vectors: `vectors` is a read-only memmap.
+    Handy for warm-starting an in-memory index straight from disk.
+    """
+    (_, _, name, count, dim, vectors_at, ids_at, offsets_at,
+     payload_at, payload_len) = _read_header(path)
+    lay = LAYOUTS[name.rstrip(b"\x00").decode("ascii")]
+
+    if count == 0:
+        empty = np.empty((0, dim), dtype=np.float32)
+        return Snapshot(lay, np.empty(0, dtype=np.int64), empty, [], [])
+
+    vectors = np.memmap(path, dtype=np.float32, mode="r", offset=vectors_at, shape=(count, dim))
+    ids = np.memmap(path, dtype=np.int64, mode="r", offset=ids_at, shape=(count,))
+    offsets = np.memmap(path, dtype=np.uint64, mode="r", offset=offsets_at, shape=(2 * count + 1,))
+
+    with open(path, "rb") as f:
+        f.seek(payload_at)
+        blob = zlib.decompress(f.read(payload_len))
+
+    bounds = offsets.tolist()
+    strings = [blob[bounds[k]:bounds[k + 1]].decode("utf-8") for k in range(2 * count)]
+    return Snapshot(lay, ids, vectors, strings[0::2], strings[1::2])
+
+
+def restore(src_path: str, db_path: Optional[str] = None) -> int:
+    """
+    Replace the store's rows with the bundle's rows (ids are kept, so
+    replicas line up with the primary). One transaction, one bulk insert.
+    Returns the number of rows restored.
+    """
+    snap = load_snapshot(src_path)
+    lay = snap.layout
+    db_path = db_path or _default_db_path()
+
+    # JSON text is what the stores read back, so re-encode each row once here.
+    vec_json = [json.dumps(v) for v in snap.vectors.tolist()]
+    metas = [m if m != "" else None for m in snap.metas]
+    rows = zip(snap.ids.tolist(), snap.texts, vec_json, metas)
+
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute(lay.create_sql)
+        with conn:  # single transaction
+            conn.execute(f"DELETE FROM {lay.table}")
+            conn.executemany(
+                f"INSERT INTO {lay.table} (id, {lay.text_col}, {lay.vector_col}, {lay.meta_col}) "
+                f"VALUES (?, ?, ?, ?)",
+                rows,
+            )
+    finally:
+        conn.close()
+    return len(snap.texts)
+
+
+# ---------- CLI ----------
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Binary snapshot export/import for vector stores")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("snapshot", help="Write a binary bundle from a SQLite store")
+    s.add_argument("--db", default=None, help="SQLite file (default: vector_memory.DB_PATH)")
+    s.add_argument("--out", required=True, help="Bundle file to write")
+    s.add_argument("--layout", choices=sorted(LAYOUTS), default="memory", help="Store schema")
+
+    r = sub.add_parser("restore", help="Load a bundle into a SQLite store")
+    r.add_argument("--src", required=True, help="Bundle file to read")
+    r.add_argument("--db", default=None, help="SQLite file (default: vector_memory.DB_PATH)")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    if args.command == "snapshot":
+        n = snapshot(args.out, db_path=args.db, layout=args.layout)
+        print(f"Wrote {n} rows → {args.out} ({time.perf_counter() - start:.2f}s)")
+    else:
+        n = restore(args.src, db_path=args.db)
+        print(f"Restored {n} rows from {args.src} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    # Allow `python src/memory/snapshot.py ...` (puts src/ on the path).
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
@@ -13,7 +13,9 @@ Technical notes:
 
 import sqlite3
 import json
-from typing import Callable, List, Tuple
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
 import numpy as np
 import os
 
@@ -43,11 +45,17 @@ def init_db() -> None:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 text TEXT NOT NULL,
                 embedding TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                deleted INTEGER NOT NULL DEFAULT 0
             )
             """
         )
 
+        # 4b) Older DBs were made before tombstones existed -> add the column
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(memory)")}
+        if "deleted" not in cols:
+            conn.execute("ALTER TABLE memory ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0;")
+
         # 5) (Nice-to-have) small index to speed up age-based ops later
         conn.execute(
             "CREATE INDEX IF NOT EXISTS idx_memory_created_at ON memory(created_at);"
@@ -112,6 +120,8 @@ def clear_all_memories() -> None:
     conn.execute("DELETE FROM memory")
     conn.commit()
     conn.close()
+    if _index is not None:
+        load_index()
 
 # ---------- Simple local embed (for testing only) ----------
 
@@ -138,47 +148,220 @@ def _normalize(vec: np.ndarray) -> np.ndarray:
     return vec / norm
 
 
-def add_memory(text: str, embed_func: Callable[[str], List[float]]) -> None:
+def add_memory(text: str, embed_func: Callable[[str], List[float]]) -> Optional[int]:
     """
     Save one memory row:
     - text (what to remember)
     - embedding (list[float] from embed_func), stored as JSON
+    Returns the new row id (None for blank text).
     """
     if not text or not text.strip():
-        return
+        return None
     emb = embed_func(text)
     conn = sqlite3.connect(DB_PATH)
     try:
-        conn.execute(
+        cur = conn.execute(
             "INSERT INTO memory (text, embedding) VALUES (?, ?)",
             (text, json.dumps(emb)),
         )
         conn.commit()
+        row_id = cur.lastrowid
     finally:
         conn.close()
+    if _index is not None:
+        _index.add(row_id, text, emb)
+    return row_id
 
-def add_memories(texts: List[str], embed_func: Callable[[str], List[float]]) -> None:
+def add_memories(texts: List[str], embed_func: Callable[[str], List[float]]) -> List[int]:
     """
     Bulk insert convenience (faster when seeding many facts).
+    One transaction for all rows. Returns the new row ids.
     """
     if not texts:
-        return
+        return []
     rows = []
     for t in texts:
         if not t or not t.strip():
             continue
-        rows.append((t, json.dumps(embed_func(t))))
+        rows.append((t, embed_func(t)))
     if not rows:
-        return
+        return []
+    ids: List[int] = []
     conn = sqlite3.connect(DB_PATH)
     try:
-        conn.executemany(
-            "INSERT INTO memory (text, embedding) VALUES (?, ?)",
-            rows,
+        with conn:
+            for t, emb in rows:
+                cur = conn.execute(
+                    "INSERT INTO memory (text, embedding) VALUES (?, ?)",
+                    (t, json.dumps(emb)),
+                )
+                ids.append(cur.lastrowid)
+    finally:
+        conn.close()
+    if _index is not None:
+        for row_id, (t, emb) in zip(ids, rows):
+            _index.add(row_id, t, emb)
+    return ids
+
+# ---------- Add: concurrent writes (group commit) ----------
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """
+    Shared GroupCommitWriter for DB_PATH (started on first use).
+    Year-6: one helper at the notebook door for all threads.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer.db_path != DB_PATH:
+            if _writer is not None:
+                _writer.close()
+            from memory.group_writer import GroupCommitWriter
+            _writer = GroupCommitWriter(DB_PATH)
+        return _writer
+
+def add_memory_async(text: str, embed_func: Callable[[str], List[float]]) -> Optional[Future]:
+    """
+    Thread-safe add: embeds in the caller's thread, then hands the row to the
+    shared group-commit writer. Returns a Future with the new row id
+    (resolves after commit), or None for blank text.
+    """
+    if not text or not text.strip():
+        return None
+    emb = embed_func(text)
+    fut = get_writer().submit(text, emb)
+
+    def _index_after_commit(f: Future) -> None:
+        if _index is not None and f.exception() is None:
+            _index.add(f.result(), text, emb)
+
+    fut.add_done_callback(_index_after_commit)
+    return fut
+
+def close_writer() -> None:
+    """Flush and stop the shared writer (safe to call if never started)."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
+# ---------- Resident index (optional, in RAM) ----------
+
+_index = None
+
+def load_index():
+    """
+    Build (or rebuild) the in-RAM MemoryIndex from DB_PATH and switch
+    retrieval over to it. Writes/deletes below keep it in sync.
+    """
+    global _index
+    from memory.memory_index import MemoryIndex
+    _index = MemoryIndex.from_db(DB_PATH)
+    return _index
+
+def drop_index() -> None:
+    """Go back to scanning SQLite on every query."""
+    global _index
+    _index = None
+
+# ---------- Edit ops: delete / update (tombstones) ----------
+
+# Compact once this share of rows are tombstones.
+COMPACT_THRESHOLD = 0.25
+
+def delete_memory(memory_id: int) -> bool:
+    """
+    Tombstone one memory (it stops showing up in searches straight away).
+    Returns False if the id doesn't exist or was already deleted.
+    Year-6: cross the line out now, tidy the notebook later.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cur = conn.execute(
+            "UPDATE memory SET deleted = 1 WHERE id = ? AND deleted = 0",
+            (memory_id,),
         )
         conn.commit()
+        changed = cur.rowcount > 0
     finally:
         conn.close()
+    if _index is not None:
+        _index.delete(memory_id)
+    if changed:
+        maybe_compact()
+    return changed
+
+def update_memory(memory_id: int, text: str, embed_func: Callable[[str], List[float]]) -> bool:
+    """
+    Replace one live memory's text (and re-embed it). Keeps the same id.
+    Returns False if the id doesn't exist or was deleted.
+    """
+    if not text or not text.strip():
+        raise ValueError("text must not be blank (use delete_memory instead)")
+    emb = embed_func(text)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cur = conn.execute(
+            "UPDATE memory SET text = ?, embedding = ? WHERE id = ? AND deleted = 0",
+            (text, json.dumps(emb), memory_id),
+        )
+        conn.commit()
+        changed = cur.rowcount > 0
+    finally:
+        conn.close()
+    if changed and _index is not None:
+        _index.update(memory_id, text, emb)
+    return changed
+
+def tombstone_stats() -> Tuple[int, int]:
+    """Return (live_rows, tombstoned_rows)."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        total, dead = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(deleted), 0) FROM memory"
+        ).fetchone()
+    finally:
+        conn.close()
+    return total - dead, dead
+
+_compact_lock = threading.Lock()
+
+def compact() -> int:
+    """
+    Physically remove tombstoned rows, VACUUM the file, and make the
+    resident index dense again. Returns how many rows were purged.
+    """
+    with _compact_lock:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            with conn:
+                purged = conn.execute("DELETE FROM memory WHERE deleted = 1").rowcount
+            if purged:
+                conn.execute("VACUUM")  # must run outside a transaction
+        finally:
+            conn.close()
+        if _index is not None:
+            _index.rebuild()
+        return purged
+
+def maybe_compact(threshold: float = COMPACT_THRESHOLD, background: bool = True) -> Optional[threading.Thread]:
+    """
+    Run compact() if tombstones make up more than `threshold` of all rows.
+    By default it runs on a background thread (returned so callers can join).
+    """
+    live, dead = tombstone_stats()
+    total = live + dead
+    if total == 0 or dead / total <= threshold or _compact_lock.locked():
+        return None
+    if not background:
+        compact()
+        return None
+    t = threading.Thread(target=compact, name="memory-compact", daemon=True)
+    t.start()
+    return t
 
 # ---------- Add: read ops (retrieval) ----------
 
@@ -186,19 +369,67 @@ def get_relevant_memories(
     query: str,
     embed_func: Callable[[str], List[float]],
     top_k: int = 3,
+    mmr: bool = False,
+    fetch_k: int = 20,
+    mmr_lambda: float = 0.5,
 ) -> List[str]:
     """
     Return only the top_k memory texts most similar to the query (cosine).
     """
-    return [t for _, t in get_relevant_with_scores(query, embed_func, top_k)]
+    return [
+        t for _, t in get_relevant_with_scores(
+            query, embed_func, top_k, mmr=mmr, fetch_k=fetch_k, mmr_lambda=mmr_lambda
+        )
+    ]
+
+def mmr_select(
+    scores: np.ndarray,
+    vectors: np.ndarray,
+    top_k: int,
+    mmr_lambda: float = 0.5,
+) -> List[int]:
+    """
+    Maximal Marginal Relevance: pick top_k candidate positions that are
+    relevant to the query but not too similar to each other.
+    Year-6: take the best answer, then prefer answers that say something new.
+
+    scores:  (n,) cosine(query, candidate)
+    vectors: (n, dim) unit vectors of the candidates
+    Each pick maximizes  lambda * relevance - (1 - lambda) * max_sim_to_picked.
+    """
+    n = len(scores)
+    k = min(max(0, top_k), n)
+    if k == 0:
+        return []
+    sim = vectors @ vectors.T                   # (n, n) candidate-candidate cosine
+    max_sim = np.zeros(n, dtype=np.float32)     # closeness to anything already picked
+    taken = np.zeros(n, dtype=bool)
+    picked: List[int] = []
+    for step in range(k):
+        redundancy = max_sim if step else 0.0
+        mmr = mmr_lambda * scores - (1.0 - mmr_lambda) * redundancy
+        mmr[taken] = -np.inf
+        best = int(np.argmax(mmr))
+        picked.append(best)
+        taken[best] = True
+        max_sim = sim[best] if step == 0 else np.maximum(max_sim, sim[best])
+    return picked
 
 def get_relevant_with_scores(
     query: str,
     embed_func: Callable[[str], List[float]],
     top_k: int = 3,
+    mmr: bool = False,
+    fetch_k: int = 20,
+    mmr_lambda: float = 0.5,
 ) -> List[Tuple[float, str]]:
     """
     Return list of (score, text) sorted desc by cosine similarity.
+
+    mmr=True: take the fetch_k best candidates, then re-rank them with
+    Maximal Marginal Relevance so near-duplicates don't crowd out the top_k.
+    Results are in pick order; score is still the cosine to the query.
+    mmr_lambda=1.0 is plain relevance, lower values favour diversity.
     """
     if not query or not query.strip():
         return []
@@ -206,29 +437,44 @@ def get_relevant_with_scores(
     # Embed + normalize query
     q = np.array(embed_func(query), dtype=np.float32)
     q = _normalize(q)
-
-    # Load all rows
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        rows = conn.execute("SELECT text, embedding FROM memory").fetchall()
-    finally:
-        conn.close()
-
-    # Score each row
-    scored: List[Tuple[float, str]] = []
-    for text, emb_json in rows:
-        e = np.array(json.loads(emb_json), dtype=np.float32)
-        e = _normalize(e)
-        # If either vector is zero, skip
-        if e.size == 0 or q.size == 0:
-            continue
-        # Cosine = dot of normalized vectors
-        sim = float(np.dot(q, e))
-        scored.append((sim, text))
-
-    # Sort by highest similarity
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return scored[: max(0, top_k)]
+    pool = max(top_k, fetch_k) if mmr else top_k
+
+    # Fast path: resident index already has every live vector in RAM
+    if _index is not None:
+        scores, _, texts, vectors = _index.candidates(q, pool)
+    else:
+        # Load all live rows (tombstones are filtered by SQLite)
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            rows = conn.execute("SELECT text, embedding FROM memory WHERE deleted = 0").fetchall()
+        finally:
+            conn.close()
+
+        # Score each row
+        scored: List[Tuple[float, str, np.ndarray]] = []
+        for text, emb_json in rows:
+            e = np.array(json.loads(emb_json), dtype=np.float32)
+            e = _normalize(e)
+            # If either vector is zero, skip
+            if e.size == 0 or q.size == 0:
+                continue
+            # Cosine = dot of normalized vectors
+            sim = float(np.dot(q, e))
+            scored.append((sim, text, e))
+
+        # Sort by highest similarity
+        scored.sort(key=lambda x: x[0], reverse=True)
+        scored = scored[: max(0, pool)]
+        if not mmr:
+            return [(sim, text) for sim, text, _ in scored]
+        scores = np.array([x[0] for x in scored], dtype=np.float32)
+        texts = [x[1] for x in scored]
+        vectors = np.stack([x[2] for x in scored]) if scored else np.empty((0, q.size), dtype=np.float32)
+
+    if not mmr:
+        return [(float(sc), t) for sc, t in zip(scores, texts)]
+    order = mmr_select(scores, vectors, top_k, mmr_lambda)
+    return [(float(scores[i]), texts[i]) for i in order]
 
 
 
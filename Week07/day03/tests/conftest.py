@@ -0,0 +1,20 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make 'src' importable so 'from memory.vector_memory import ...' works
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from memory import vector_memory
+
+
+@pytest.fixture
+def memory_db(tmp_path, monkeypatch):
+    """Point vector_memory at a fresh SQLite file inside tmp_path."""
+    db_path = str(tmp_path / "embeddings.sqlite")
+    monkeypatch.setattr(vector_memory, "DB_PATH", db_path)
+    vector_memory.init_db()
+    return db_path
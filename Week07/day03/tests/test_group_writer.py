@@ -0,0 +1,77 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from memory import vector_memory
+from memory.group_writer import GroupCommitWriter
+from memory.vector_memory import _toy_embed
+
+
+def test_concurrent_submits_are_coalesced(memory_db):
+    with GroupCommitWriter(memory_db, max_batch=64, max_delay_s=0.05) as writer:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = list(pool.map(lambda i: writer.submit(f"fact {i}", [float(i), 1.0]), range(200)))
+        ids = [f.result(timeout=5) for f in futures]
+
+    assert sorted(ids) == list(range(1, 201))
+    assert writer.rows_written == 200
+    assert writer.commits < 200  # many rows per transaction
+
+    conn = sqlite3.connect(memory_db)
+    (count,) = conn.execute("SELECT COUNT(*) FROM memory").fetchone()
+    conn.close()
+    assert count == 200
+
+
+def test_future_id_matches_row(memory_db):
+    with GroupCommitWriter(memory_db) as writer:
+        row_id = writer.submit("hello", [1.0, 0.0]).result(timeout=5)
+
+    conn = sqlite3.connect(memory_db)
+    (text,) = conn.execute("SELECT text FROM memory WHERE id=?", (row_id,)).fetchone()
+    conn.close()
+    assert text == "hello"
+
+
+def test_close_flushes_pending(memory_db):
+    writer = GroupCommitWriter(memory_db, max_delay_s=1.0)
+    fut = writer.submit("pending", [1.0])
+    writer.close()
+    assert fut.done() and fut.result() == 1
+
+
+def test_cancelled_ticket_is_skipped(memory_db):
+    with GroupCommitWriter(memory_db, max_delay_s=0.2) as writer:
+        cancelled = writer.submit("never mind", [1.0])
+        assert cancelled.cancel()
+        kept = writer.submit("keep", [0.0, 1.0])
+        assert kept.result(timeout=5) == 1
+        assert writer.submit("later", [1.0]).result(timeout=5) == 2
+    assert writer.rows_written == 2
+
+
+def test_dead_writer_fails_pending_and_later_calls(tmp_path):
+    writer = GroupCommitWriter(str(tmp_path / "missing" / "memory.db"))   # connect() fails
+    queued = writer.submit("lost", [1.0])
+    with pytest.raises(sqlite3.OperationalError):
+        queued.result(timeout=5)
+
+    writer._thread.join(5)
+    with pytest.raises(sqlite3.OperationalError):
+        writer.submit("later", [1.0]).result(timeout=5)
+    with pytest.raises(sqlite3.OperationalError):
+        writer.flush(timeout=5)
+    writer.close()
+
+
+def test_add_memory_async_uses_shared_writer(memory_db):
+    try:
+        futs = [vector_memory.add_memory_async(t, _toy_embed) for t in ("a one", "b two", "  ")]
+        assert futs[2] is None
+        vector_memory.get_writer().flush(timeout=5)
+        assert all(f.done() for f in futs[:2])
+    finally:
+        vector_memory.close_writer()
+
+    assert set(vector_memory.get_relevant_memories("a one", _toy_embed, top_k=5)) == {"a one", "b two"}
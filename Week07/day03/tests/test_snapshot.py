@@ -0,0 +1,73 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from memory import snapshot as snap
+from memory.vector_memory import add_memories, get_relevant_memories, _toy_embed
+
+
+def test_snapshot_roundtrip_keeps_ids_text_and_vectors(memory_db, tmp_path):
+    add_memories(["User lives in Melbourne.", "User likes luxury fashion.", "Café ☕ notes"], _toy_embed)
+    bundle = str(tmp_path / "memory.snap")
+
+    assert snap.snapshot(bundle) == 3
+
+    loaded = snap.load_snapshot(bundle)
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.vectors.shape == (3, 64)
+    assert loaded.ids.tolist() == [1, 2, 3]
+    assert loaded.texts[2] == "Café ☕ notes"
+    np.testing.assert_allclose(loaded.vectors[0], _toy_embed("User lives in Melbourne."), rtol=1e-6)
+
+    replica = str(tmp_path / "replica.sqlite")
+    assert snap.restore(bundle, db_path=replica) == 3
+
+    conn = sqlite3.connect(replica)
+    rows = conn.execute("SELECT id, text, created_at FROM memory ORDER BY id").fetchall()
+    conn.close()
+    assert [r[1] for r in rows] == ["User lives in Melbourne.", "User likes luxury fashion.", "Café ☕ notes"]
+    assert all(r[2] for r in rows)  # created_at carried across
+
+
+def test_restore_replaces_existing_rows(memory_db, tmp_path):
+    add_memories(["only row"], _toy_embed)
+    bundle = str(tmp_path / "memory.snap")
+    snap.snapshot(bundle)
+
+    add_memories(["added after snapshot"], _toy_embed)
+    snap.restore(bundle)
+
+    assert get_relevant_memories("row", _toy_embed, top_k=5) == ["only row"]
+
+
+def test_empty_store_snapshot(memory_db, tmp_path):
+    bundle = str(tmp_path / "empty.snap")
+    assert snap.snapshot(bundle) == 0
+    assert snap.restore(bundle, db_path=str(tmp_path / "r.sqlite")) == 0
+
+
+def test_embeddings_layout_keeps_metadata(tmp_path):
+    db = str(tmp_path / "embeddings.db")
+    conn = sqlite3.connect(db)
+    conn.execute(snap.LAYOUTS["embeddings"].create_sql)
+    conn.execute(
+        "INSERT INTO embeddings (text, metadata, vector) VALUES (?, ?, ?)",
+        ("hello", '{"src": "demo"}', "[0.5, 0.25]"),
+    )
+    conn.commit()
+    conn.close()
+
+    bundle = str(tmp_path / "e.snap")
+    snap.snapshot(bundle, db_path=db, layout="embeddings")
+    loaded = snap.load_snapshot(bundle)
+    assert loaded.layout.name == "embeddings"
+    assert loaded.metas == ['{"src": "demo"}']
+    assert loaded.vectors.tolist() == [[0.5, 0.25]]
+
+
+def test_rejects_non_snapshot_file(tmp_path):
+    bad = tmp_path / "bad.snap"
+    bad.write_bytes(b"not a snapshot" * 20)
+    with pytest.raises(ValueError):
+        snap.load_snapshot(str(bad))
@@ -0,0 +1,101 @@
+import sqlite3
+
+import pytest
+
+from memory import vector_memory as vm
+from memory.vector_memory import _toy_embed
+
+
+@pytest.fixture(params=[False, True], ids=["sqlite", "index"])
+def store(memory_db, request):
+    """Run each test against the SQLite scan and the resident index."""
+    if request.param:
+        vm.load_index()
+    yield vm
+    vm.drop_index()
+
+
+def test_delete_hides_row_immediately(store):
+    keep, gone = store.add_memories(["User lives in Melbourne.", "User lives in Sydney."], _toy_embed)
+    assert store.delete_memory(gone) is True
+    assert store.delete_memory(gone) is False
+    assert store.get_relevant_memories("User lives in Sydney.", _toy_embed, top_k=5) == ["User lives in Melbourne."]
+
+
+def test_update_keeps_id_and_changes_text(store):
+    row_id = store.add_memory("Favourite color is blue.", _toy_embed)
+    assert store.update_memory(row_id, "Favourite color is green.", _toy_embed) is True
+    hits = store.get_relevant_with_scores("Favourite color is green.", _toy_embed, top_k=1)
+    assert hits[0][1] == "Favourite color is green."
+    assert hits[0][0] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_update_of_deleted_row_fails(store):
+    row_id = store.add_memory("temp", _toy_embed)
+    store.delete_memory(row_id)
+    assert store.update_memory(row_id, "again", _toy_embed) is False
+
+
+def test_compaction_after_threshold(store, memory_db):
+    ids = store.add_memories([f"fact number {i}" for i in range(8)], _toy_embed)
+    store.delete_memory(ids[0])
+    assert store.tombstone_stats() == (7, 1)  # 1/8 is under the threshold
+
+    for row_id in ids[1:4]:
+        store.delete_memory(row_id)  # crosses 25% -> background compaction kicks in
+    store.compact()  # waits on the background run's lock; purges anything left
+    assert store.tombstone_stats() == (4, 0)
+    if store._index is not None:
+        assert store._index.tombstones == 0
+        assert len(store._index) == 4
+
+    conn = sqlite3.connect(memory_db)
+    (n,) = conn.execute("SELECT COUNT(*) FROM memory").fetchone()
+    conn.close()
+    assert n == 4
+    assert len(store.get_relevant_memories("fact", _toy_embed, top_k=10)) == 4
+
+
+def test_maybe_compact_foreground(memory_db):
+    ids = vm.add_memories(["a", "b", "c"], _toy_embed)
+    conn = sqlite3.connect(memory_db)
+    conn.execute("UPDATE memory SET deleted = 1 WHERE id IN (?, ?)", ids[:2])
+    conn.commit()
+    conn.close()
+    assert vm.maybe_compact(threshold=0.5, background=False) is None
+    assert vm.tombstone_stats() == (1, 0)
+
+
+def test_init_db_migrates_old_table(tmp_path, monkeypatch):
+    db = str(tmp_path / "old.sqlite")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE memory(id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL, "
+                 "embedding TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO memory (text, embedding) VALUES ('old', '[1.0]')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(vm, "DB_PATH", db)
+    vm.init_db()
+    assert vm.tombstone_stats() == (1, 0)
+
+
+def test_mmr_skips_near_duplicates(store):
+    for i in range(3):
+        store.add_memory(f"User lives in Melbourne{'!' * i}", _toy_embed)
+    store.add_memory("Melbourne user likes fashion", _toy_embed)
+
+    plain = store.get_relevant_memories("User lives in Melbourne", _toy_embed, top_k=3)
+    diverse = store.get_relevant_memories("User lives in Melbourne", _toy_embed, top_k=3, mmr=True, mmr_lambda=0.3)
+
+    # Plain top-k spends every slot on the same fact; MMR makes room for a different one.
+    assert all(t.startswith("User lives in Melbourne") for t in plain)
+    assert plain[0] == diverse[0] == "User lives in Melbourne"
+    assert "Melbourne user likes fashion" in diverse and "Melbourne user likes fashion" not in plain
+
+
+def test_mmr_lambda_one_matches_plain_ranking(store):
+    store.add_memories([f"memory {i} about topic {i % 3}" for i in range(12)], _toy_embed)
+    plain = store.get_relevant_with_scores("memory about topic 1", _toy_embed, top_k=4)
+    mmr = store.get_relevant_with_scores("memory about topic 1", _toy_embed, top_k=4, mmr=True, mmr_lambda=1.0)
+    assert [t for _, t in mmr] == [t for _, t in plain]